@@ -0,0 +1,129 @@
+"""Decoding of the stringified per-article annotation fields.
+
+Some scrapes store `content-segmented`, `kws-l`, `loc-l`, `org-l`, `per-l`,
+`kws`, `loc`, `org` and `per` as Python-repr strings:
+    "[[['FSR', 'El Fasher']], [['FSR']]]"    "{'FSR': 5}"
+
+ast.literal_eval builds a full syntax tree for every one of them. Here the
+repr is rewritten into JSON (quotes only, with a regex) and handed to the C
+json parser; anything that is not plain lists/dicts/str/int falls back to
+literal_eval. Already-decoded values (lists, dicts) pass through unchanged.
+
+    python bench_annotations.py    compares both on the bundled Sputnik file
+"""
+import ast
+import json
+import re
+import shelve
+from concurrent.futures import ProcessPoolExecutor
+
+ANNOTATION_FIELDS = ['content-segmented', 'kws-l', 'loc-l', 'org-l', 'per-l', 'kws', 'loc', 'org', 'per']
+
+# Python string literals: '...' or "..." (unrolled loops, backslash escapes allowed)
+_PY_STRING = re.compile(r"""'[^'\\]*(?:\\.[^'\\]*)*'|"[^"\\]*(?:\\.[^"\\]*)*\"""", re.S)
+
+
+def _string_to_json(match):
+    token = match.group()
+    body = token[1:-1]
+    if '\\' in body:
+        # \xe9, \' ... : rare, let Python resolve the escapes of this token only
+        return json.dumps(ast.literal_eval(token), ensure_ascii=False)
+    if token[0] == '"':
+        return token
+    return '"' + body.replace('"', '\\"') + '"'
+
+
+def repr_to_json(text):
+    """Rewrite a Python literal made of lists/dicts/str/int into JSON text."""
+    if '"' not in text and '\\' not in text:
+        # Every string is single-quoted and contains no quote at all
+        return text.replace("'", '"')
+    return _PY_STRING.sub(_string_to_json, text)
+
+
+def decode_field(value):
+    """Return the native list/dict for an annotation value (str or already decoded)."""
+    if not isinstance(value, str):
+        return value
+    try:
+        return json.loads(repr_to_json(value))
+    except ValueError:
+        # Tuples, True/None, sets...: not expressible in JSON
+        return ast.literal_eval(value)
+
+
+def decode_annotations(article, fields=ANNOTATION_FIELDS):
+    """Return {field: decoded value} for the annotation fields present in `article`."""
+    return {field: decode_field(article[field]) for field in fields if field in article}
+
+
+def decode_article(article, fields=ANNOTATION_FIELDS):
+    """Return a copy of `article` with its annotation fields decoded."""
+    decoded = dict(article)
+    decoded.update(decode_annotations(article, fields))
+    return decoded
+
+
+class DecodeCache:
+    """Decoded annotations keyed by article URL.
+
+    In memory by default; give a path to keep them on disk (shelve) between runs.
+    """
+
+    def __init__(self, path=None):
+        self._db = shelve.open(path) if path else {}
+
+    def get(self, url):
+        return self._db.get(url)
+
+    def put(self, url, annotations):
+        self._db[url] = annotations
+
+    def __contains__(self, url):
+        return url in self._db
+
+    def __len__(self):
+        return len(self._db)
+
+    def close(self):
+        if hasattr(self._db, 'close'):
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def decode_articles(articles, processes=None, cache=None, chunksize=64, fields=ANNOTATION_FIELDS):
+    """Decode a batch of articles, returning a list of decoded copies in the same order.
+
+    processes -- if > 1, the cache misses are decoded across a process pool
+    cache     -- a DecodeCache; hits skip decoding, misses are stored in it
+    """
+    articles = list(articles)
+    results = [None] * len(articles)
+    todo = []
+    for i, article in enumerate(articles):
+        url = article.get('url')
+        hit = cache.get(url) if cache is not None and url else None
+        if hit is not None:
+            results[i] = {**article, **hit}
+        else:
+            todo.append(i)
+
+    pending = [articles[i] for i in todo]
+    if processes and processes > 1 and len(pending) > chunksize:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            decoded = list(pool.map(decode_annotations, pending, [fields] * len(pending), chunksize=chunksize))
+    else:
+        decoded = [decode_annotations(article, fields) for article in pending]
+
+    for i, annotations in zip(todo, decoded):
+        article = articles[i]
+        results[i] = {**article, **annotations}
+        if cache is not None and article.get('url'):
+            cache.put(article['url'], annotations)
+    return results
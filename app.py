@@ -3,6 +3,10 @@ import pandas as pd
 import pydeck as pdk
 import plotly.express as px
 
+from entity_index import EntityIndex
+from location_layer import LocationLayer
+from snapshot import read_table
+
 
 
 st.set_page_config(layout="wide", page_title="Géographie de l'Information - Sputnik Analysis", page_icon="🌍")
@@ -63,31 +67,42 @@ st.markdown("**Visualisation Avancée des Flux d'Information (Sputnik News)**")
 
 
 # --- Loading Data ---
-@st.cache_data
-def load_data():
+# cache_resource, not cache_data: the same indexed layer is shared by every rerun
+# (cache_data would hand back a fresh copy of the frames each time)
+@st.cache_resource
+def load_location_layer():
     try:
-        df_map = pd.read_csv('aggregated_locations_geocoded.csv')
+        # Projetées depuis snapshot/ quand il est à jour (python snapshot.py), sinon lues du CSV
+        df_map = read_table('aggregated_locations_geocoded.csv')
         if 'Count' in df_map.columns:
             df_map['normalized'] = df_map['Count'] / df_map['Count'].max()
     except:
         df_map = pd.DataFrame()
 
     try:
-        df_year = pd.read_csv('locations_by_year.csv')
+        df_year = read_table('locations_by_year.csv')
     except:
         df_year = pd.DataFrame()
         
-    return df_map, df_year
+    return LocationLayer(df_map, df_year)
+
+layer = load_location_layer()
 
-df_map, df_year = load_data()
+@st.cache_resource
+def load_entity_index():
+    # Inverted index entity -> articles (python entity_index.py)
+    try:
+        return EntityIndex()
+    except FileNotFoundError:
+        return None
 
-if df_map.empty:
+if layer.global_frame.empty:
     st.error("Les données géographiques ne sont pas encore prêtes. Veuillez vérifier vos fichiers CSV.")
     st.stop()
 
 # --- Sidebar Controls ---
 st.sidebar.title("⚙️ Paramètres")
-years = sorted(df_year['Year'].unique()) if not df_year.empty else []
+years = layer.years
 view_mode = st.sidebar.radio("Mode de Vue", ["Vue Globale (Cumulée)", "Évolution Temporelle"])
 
 selected_year = None
@@ -99,11 +114,12 @@ map_type = st.sidebar.selectbox(
     ["Colonnes 3D (Volume)", "Heatmap & Densité (Analyse)", "Cellules Hexagonales (Précision)", "Scatter (Points)"]
 )
 
-# Filter Data
+# Filter Data (frames indexed and ranked once, shared between reruns: not modified here)
 if view_mode == "Évolution Temporelle" and selected_year:
-    current_df = df_year[df_year['Year'] == selected_year].copy()
+    current_year = selected_year
 else:
-    current_df = df_map.copy()
+    current_year = None
+current_df = layer.frame(current_year)
 
 # --- Main Dashboard ---
 
@@ -124,7 +140,7 @@ col_left, col_right = st.columns(2)
 
 with col_left:
     st.subheader("📊 Top 15 des Lieux")
-    top_15 = current_df.nlargest(15, 'Count')
+    top_15 = current_df.head(15)    # already sorted by Count
     fig_bar = px.bar(
         top_15, x='Count', y='Location', orientation='h',
         color='Count', color_continuous_scale='Oranges',
@@ -135,10 +151,9 @@ with col_left:
 
 with col_right:
     st.subheader("📈 Évolution des Top Lieux")
-    if not df_year.empty:
+    if years:
         # On prend les 5 lieux les plus importants historiquement
-        top_5_ever = df_map.nlargest(5, 'Count')['Location'].tolist()
-        df_top_evolution = df_year[df_year['Location'].isin(top_5_ever)]
+        df_top_evolution = layer.top_series(5)
         
         fig_line = px.line(
             df_top_evolution, x='Year', y='Count', color='Location',
@@ -189,30 +204,26 @@ else:
 # 4. ANALYSE DÉTAILLÉE AU CLIC
 if selection and selection.get('selection', {}).get('point_indices'):
     idx = selection['selection']['point_indices'][0]
-    target_location = current_df.iloc[idx]['Location']
+    target_location = current_df['Location'].iat[idx]
     
     st.divider()
     st.markdown(f"## 🔎 Focus : **{target_location}**")
     # (Le reste de votre code d'analyse détaillée peut rester ici)
     
     # 1. Stats Cards
-    # Ensure we can find the location in current_df
-    loc_data_rows = current_df[current_df['Location'] == target_location]
-    if not loc_data_rows.empty:
-        loc_data = loc_data_rows.iloc[0]
+    # Count and rank precomputed for the current view
+    loc_stats = layer.stats(target_location, current_year)
+    if loc_stats is not None:
+        count, rank = loc_stats
         c1, c2 = st.columns(2)
-        c1.metric("Occurrences Totales", loc_data['Count'])
-        
-        # Calculate Rank
-        current_df_sorted = current_df.sort_values(by="Count", ascending=False).reset_index(drop=True)
-        rank = current_df_sorted[current_df_sorted['Location'] == target_location].index[0] + 1
+        c1.metric("Occurrences Totales", count)
         c2.metric("Classement Global", f"#{rank}")
     
     # 2. Dynamic Evolution (Line Chart) or Heatmap context
     st.subheader("📈 Dynamique Temporelle")
     
-    if not df_year.empty:
-        trend_data = df_year[df_year['Location'] == target_location].sort_values(by='Year')
+    if years:
+        trend_data = layer.series(target_location)
         
         if not trend_data.empty:
             fig_trend = px.area(
@@ -237,5 +248,18 @@ if selection and selection.get('selection', {}).get('point_indices'):
     else:
         st.warning("Données annuelles non disponibles.")
 
+    # 3. Articles mentioning the location, resolved through the entity index
+    st.subheader("📰 Articles Récents")
+    entity_index = load_entity_index()
+    if entity_index is None:
+        st.info("Index des entités introuvable. Lancez `python entity_index.py`.")
+    else:
+        articles = entity_index.top('loc', target_location, n=5, by='recency')
+        if articles:
+            for article in articles:
+                st.markdown(f"- [{article['title']}]({article['url']}) — {article['date']}")
+        else:
+            st.info("Aucun article indexé pour ce lieu.")
+
 st.divider()
 st.caption("Données extraites de Sputnik News. Visualisation générée par Deepmind Agent.")
\ No newline at end of file
@@ -1,10 +1,23 @@
+import functools
+import os
+
 import dash
+import flask
 from dash import dcc
 from dash import html
-from dash.dependencies import Input, Output
-import pandas as pd
-import plotly.express as px
+from dash.dependencies import Input, Output, State
 import plotly.graph_objects as go
+
+from aggregates import MONTHS, ThemeCube
+from figure_cache import FigureCache
+from lazy_imports import lazy_import
+from scatter_lod import PointCloud
+from search import Searcher
+from snapshot import TABLES, prebuilt_layout, read_table, write_layouts
+
+# pandas et plotly.express ne sont importés qu'au premier graphique construit
+pd = lazy_import('pandas')
+px = lazy_import('plotly.express')
 # Style CSS personnalisé pour un look épuré
 custom_style = {
     'backgroundColor': '#F4F7F9',
@@ -76,48 +89,105 @@ def apply_global_style(fig, title_text):
     )
     return fig
 # --- 1. CHARGEMENT ET PRÉPARATION GLOBALE DES DONNÉES ---
-try:
-    df_dashboard = pd.read_csv("dashboard_data_final.csv")
-    df_top_words = pd.read_csv("df_top_words_clean.csv")
-    df_dashboard['year'] = df_dashboard['year'].astype(str)
-    # Préparation de la colonne temporelle YYYY-MM
-    df_dashboard['month'] = df_dashboard['month'].apply(lambda x: f'{x:02d}')
-    df_dashboard['YearMonth'] = df_dashboard['year'] + '-' + df_dashboard['month']
-except FileNotFoundError:
+# Rien n'est lu au démarrage : chaque donnée est chargée à sa première utilisation,
+# et les onglets préconstruits (python snapshot.py --layouts) n'en demandent aucune.
+# Les tables sont projetées en mémoire depuis snapshot/ (python snapshot.py), partagées
+# entre les workers gunicorn ; lecture du CSV si le snapshot n'est pas à jour.
+if not all(os.path.exists(path) for path in ["dashboard_data_final.csv", "df_top_words_clean.csv"]):
     print("Erreur : Les fichiers de données sont introuvables. Assurez-vous d'avoir exécuté la partie Data Mining.")
     exit()
 
+# Comptes (année, mois, thème) agrégés une fois : les graphiques temporels le découpent
+cube = ThemeCube(path="dashboard_data_final.csv")
+# Coordonnées ACP (float32) du nuage 3D, échantillonnées selon le niveau de zoom
+points = PointCloud(path="dashboard_data_final.csv")
+
+@functools.lru_cache(maxsize=None)
+def load_top_words():
+    return read_table("df_top_words_clean.csv")
+
 # --- CHARGEMENT DONNÉES UTILISATEUR (GÉO) ---
-try:
-    df_geo_map = pd.read_csv('aggregated_locations_geocoded.csv')
-    if 'Count' in df_geo_map.columns:
-        df_geo_map['normalized'] = df_geo_map['Count'] / df_geo_map['Count'].max()
-except:
-    df_geo_map = pd.DataFrame()
-
-try:
-    df_geo_year = pd.read_csv('locations_by_year.csv')
-except:
-    df_geo_year = pd.DataFrame()
-
-# Préparation des options pour le menu déroulant
-ALL_YEARS = [{'label': 'Global (Toutes Années)', 'value': 'ALL'}] + \
-            [{'label': str(y), 'value': str(y)} for y in sorted(df_dashboard['year'].unique(), reverse=True)]
+@functools.lru_cache(maxsize=None)
+def load_geo_data():
+    try:
+        df_geo_map = read_table('aggregated_locations_geocoded.csv')
+        if 'Count' in df_geo_map.columns:
+            df_geo_map['normalized'] = df_geo_map['Count'] / df_geo_map['Count'].max()
+    except:
+        df_geo_map = pd.DataFrame()
+
+    try:
+        df_geo_year = read_table('locations_by_year.csv')
+    except:
+        df_geo_year = pd.DataFrame()
+    return df_geo_map, df_geo_year
+
+# --- INDEX DE RECHERCHE PLEIN TEXTE (BM25, python search.py) ---
+@functools.lru_cache(maxsize=None)
+def load_searcher():
+    try:
+        return Searcher()
+    except FileNotFoundError:
+        return None
+
+# --- INDEX DE CO-OCCURRENCE DES MOTS-CLÉS (python cooccurrence.py) ---
+@functools.lru_cache(maxsize=None)
+def load_cooccurrence():
+    # Import différé : scipy n'est chargé qu'au premier mot-clé exploré
+    from cooccurrence import CooccurrenceIndex
+    try:
+        return CooccurrenceIndex()
+    except FileNotFoundError:
+        return None
+
+# --- RÉSEAU DE CO-OCCURRENCE DES ENTITÉS (python entity_network.py) ---
+@functools.lru_cache(maxsize=None)
+def load_entity_network():
+    # Import différé : scipy n'est chargé qu'à la première ouverture du réseau
+    from entity_network import EntityNetwork
+    try:
+        return EntityNetwork()
+    except FileNotFoundError:
+        return None
+
+# Cache LRU des figures construites (clé : fonction, paramètres, version des données)
+figure_cache = FigureCache()
+
+# Mode "années côté client" : les figures de chaque année sont envoyées une fois
+# dans un dcc.Store et le changement d'année se fait dans le navigateur
+# (CLIENTSIDE_YEARS=0 pour revenir aux callbacks serveur)
+CLIENTSIDE_YEARS = os.environ.get('CLIENTSIDE_YEARS', '1') != '0'
 
 # --- 2. FONCTIONS DE GÉNÉRATION DES GRAPHIQUES STATIQUES (SANS 'self') ---
 
-def generate_3d_scatter(df):
-    """Génère une version améliorée du Nuage de Points 3D (ACP)."""
-    fig = px.scatter_3d(
-        df,x='CP1', y='CP2', z='CP3', 
-        color='Theme', 
-        hover_name='Theme',
-        # On peut ajouter le titre de l'article ou les mots clés au survol :
-        hover_data={'CP1':True, 'CP2':True, 'CP3':True, 'Theme':True},
-        title='<b>Analyse Spatiale des Thématiques (ACP 3D)</b>',
-        opacity=0.7,      # Ajoute de la transparence pour voir à travers les amas
-        size_max=10       # Contrôle la taille maximale des points
-    )
+def generate_3d_scatter(points, box=None):
+    """Génère une version améliorée du Nuage de Points 3D (ACP).
+
+    Sans `box` : vue d'ensemble, échantillon stratifié par thème. Avec `box`
+    ((bas, haut) par axe) : tous les points de cette région, axes cadrés dessus.
+    """
+    idx = points.overview() if box is None else points.region(box)
+    codes = points.theme_codes[idx]
+    colors = px.colors.qualitative.Plotly
+    fig = go.Figure()
+    for code, theme in enumerate(points.themes):
+        # Tableaux float32 : envoyés au navigateur en binaire (base64), pas en listes JSON
+        xyz = points.xyz[idx[codes == code]]
+        if not len(xyz):
+            continue
+        fig.add_trace(go.Scatter3d(
+            x=xyz[:, 0], y=xyz[:, 1], z=xyz[:, 2],
+            mode='markers', name=theme, legendgroup=theme,
+            marker=dict(color=colors[code % len(colors)]),
+            hovertemplate='<b>%{fullData.name}</b><br>CP1=%{x}<br>CP2=%{y}<br>CP3=%{z}<extra></extra>',
+            opacity=0.7,      # Ajoute de la transparence pour voir à travers les amas
+        ))
+    shown = f"{len(idx):,} articles affichés sur {len(points):,}".replace(',', ' ')
+    if box is not None:
+        shown += " (région zoomée, pleine résolution)"
+    elif len(idx) < len(points):
+        shown += " (échantillon par thème, cliquer un point pour zoomer)"
+    fig.update_layout(title=f'<b>Analyse Spatiale des Thématiques (ACP 3D)</b><br><sup>{shown}</sup>')
 
     # Personnalisation avancée du design
     fig.update_traces(
@@ -144,11 +214,18 @@ def generate_3d_scatter(df):
             x=1.1
         )
     )
+    if box is not None:
+        fig.update_layout(scene=dict(
+            xaxis_range=[float(box[0][0]), float(box[1][0])],
+            yaxis_range=[float(box[0][1]), float(box[1][1])],
+            zaxis_range=[float(box[0][2]), float(box[1][2])],
+        ))
     return fig
 
-def generate_treemap(df):
+def generate_treemap(cube):
     """Génère le Treemap de distribution globale."""
-    df_count_theme = df['Theme'].value_counts().rename_axis('Theme').reset_index(name='Count')
+    df_count_theme = pd.DataFrame({'Theme': cube.themes, 'Count': cube.per_theme('ALL')})
+    df_count_theme = df_count_theme[df_count_theme['Count'] > 0].sort_values(by='Count', ascending=False, kind='stable')
     fig = px.treemap(
         df_count_theme, 
         path=['Theme'], 
@@ -159,10 +236,10 @@ def generate_treemap(df):
     )
     return fig
 
-def generate_article_per_year(df):
+def generate_article_per_year(cube):
     """Génère le Bar Chart du nombre d'articles par Année (Global)."""
     fig = px.bar(
-        df.groupby("year").size().reset_index(name='Count'), 
+        pd.DataFrame({'year': cube.years, 'Count': cube.per_year()}),
         x='year', 
         y='Count', 
         title="<b>Nombre d'articles par Année</b>"
@@ -172,10 +249,10 @@ def generate_article_per_year(df):
         font=dict(size=12))
     return fig
 
-def generate_article_per_month(df, annee):
+def generate_article_per_month(cube, annee):
     """Génère le Bar Chart + Ligne de Tendance pour une année donnée."""
-    df_annee = df[df['year'] == annee]
-    article_per_month = df_annee.groupby("month").size().reset_index(name='Count')
+    counts = cube.per_month(annee)
+    article_per_month = pd.DataFrame({'month': MONTHS, 'Count': counts})[counts > 0].reset_index(drop=True)
     article_per_month['Trend'] = article_per_month['Count'].rolling(window=3, center=True).mean()
     
     fig = go.Figure()
@@ -204,13 +281,10 @@ def generate_article_per_month(df, annee):
     )
     return fig
 
-def generate_heatmap_themes(df, annee):
+def generate_heatmap_themes(cube, annee):
     """Génère une Heatmap filtrée par année : Thèmes en ligne, Mois en colonne."""
-    # On filtre les données pour l'année sélectionnée
-    df_filtered = df[df['year'] == annee]
-    
-    # On groupe par mois et par thème
-    df_heat = df_filtered.groupby(['month', 'Theme']).size().reset_index(name='Count')
+    # Comptes (mois, thème) de l'année sélectionnée, lus dans le cube
+    df_heat = cube.month_theme_frame(annee)
     
     fig = px.density_heatmap(
         df_heat, 
@@ -232,19 +306,19 @@ def generate_heatmap_themes(df, annee):
     )
     return fig
 
-def generate_comparison_chart(df):
+def generate_comparison_chart(cube):
     """Génère le Bar Chart Groupé de comparaison Thèmes 2024 vs 2025."""
-    df_comparison = df.groupby(['Theme', 'year']).size().reset_index(name='Count')
-    df_pivot = df_comparison.pivot(index='Theme', columns='year', values='Count').fillna(0).reset_index()
-    df_comparison_full = pd.melt(df_pivot, id_vars=['Theme'], value_vars=df_pivot.columns.drop('Theme'), var_name='year', value_name='Count')
+    df_pivot = pd.DataFrame(cube.theme_year(), columns=cube.years)
+    df_pivot.insert(0, 'Theme', cube.themes)
+    df_comparison_full = pd.melt(df_pivot, id_vars=['Theme'], value_vars=cube.years, var_name='year', value_name='Count')
     
     fig = px.bar(df_comparison_full, x='Theme', y='Count', color='year', barmode='group', title="<b>Volume d'Articles par Thème</b>")
     fig.update_layout(xaxis_title="<b>Thème</b>", yaxis_title="<b>Nombre d'articles</b>", xaxis={'categoryorder':'total descending', 'tickangle': -45},title_font_size=18, font=dict(size=12)) # Police des axes/légendes)
     return fig
 
-def generate_trend_chart(df):
+def generate_trend_chart(cube):
     """Génère le Area Chart de Tendance des Thèmes."""
-    df_themes_trend = df.groupby(['YearMonth', 'Theme']).size().reset_index(name='Count')
+    df_themes_trend = cube.year_month_theme_frame()
     df_themes_trend_clean = df_themes_trend[df_themes_trend['Theme'] != 'Bruit Média/Podcast']
     
     fig = px.area(
@@ -260,16 +334,15 @@ def generate_trend_chart(df):
 
 # Dans la Section 2. FONCTIONS DE GÉNÉRATION DES GRAPHIQUES STATIQUES (SANS 'self')
 
-def generate_theme_volume_bar(df, annee):
+def generate_theme_volume_bar(cube, annee):
     """Génère le Bar Chart des volumes thématiques pour une année donnée."""
     if annee == 'ALL': # Gère le cas où vous voudriez utiliser 'ALL' ailleurs
-        df_filtered = df.copy()
         title_text = "Volume d'Articles par Thème (Global)"
     else:
-        df_filtered = df[df['year'] == annee]
         title_text = f"<b>Volume d'Articles par Thème en {annee}</b>"
 
-    df_count = df_filtered.groupby('Theme').size().reset_index(name='Count')
+    df_count = pd.DataFrame({'Theme': cube.themes, 'Count': cube.per_theme(annee)})
+    df_count = df_count[df_count['Count'] > 0]
     # Optionnel: Exclure le "Bruit Média" pour la clarté
     df_count = df_count[df_count['Theme'] != 'Bruit Média/Podcast'] 
     
@@ -306,7 +379,9 @@ def generate_top_words_bar(df_words):
         facet_col_wrap=2,   # 2 colonnes de facettes
         orientation='h',
         facet_col_spacing=0.1, 
-        title="<b>Top 3 des mots-clés les plus significatifs par thème (TF-IDF)</b>",
+        custom_data=['Theme'],  # thème du mot cliqué, pour l'exploration des co-occurrences
+        title="<b>Top 3 des mots-clés les plus significatifs par thème (TF-IDF)</b><br>"
+              "<sup>Cliquez sur un mot pour voir les termes qui lui sont associés</sup>",
         labels={
             'Importance_Poids_TFIDF': 'Poids TF-IDF',
             'Mot_Cle': 'Mot-clé'
@@ -325,8 +400,74 @@ def generate_top_words_bar(df_words):
 
     return fig
 
+def generate_cooccurrence_bar(term, hits, measure):
+    """
+    Bar chart horizontal des termes les plus associés à `term`
+    (score d'association choisi, nombre de co-occurrences au survol).
+    """
+    labels = {'llr': 'Log-vraisemblance (G²)', 'pmi': 'PMI', 'npmi': 'PMI normalisée', 'count': 'Co-occurrences'}
+    hits = hits[::-1]  # le plus associé en haut
+    fig = go.Figure(go.Bar(
+        x=[hit[measure] for hit in hits],
+        y=[hit['term'] for hit in hits],
+        orientation='h',
+        marker_color='#3498DB',
+        customdata=[[hit['count'], hit['df']] for hit in hits],
+        hovertemplate="<b>%{y}</b><br>" + labels[measure] + " : %{x:.2f}"
+                      "<br>Co-occurrences : %{customdata[0]}<br>Unités contenant le terme : %{customdata[1]}"
+                      "<extra></extra>",
+    ))
+    apply_global_style(fig, f"Termes associés à « {term} »")
+    fig.update_layout(xaxis_title=labels[measure], hovermode='closest', height=max(400, 28 * len(hits) + 120))
+    return fig
+
 
+def generate_entity_network(graph, title_text):
+    """
+    Graphe des entités (lieux, organisations, personnes) : positions calculées
+    par entity_network.spring_layout, épaisseur des liens selon le nombre
+    d'articles communs, taille des nœuds selon le nombre d'articles.
+    """
+    colors = {'loc': '#3498DB', 'org': '#E67E22', 'per': '#27AE60'}
+    labels = {'loc': 'Lieux', 'org': 'Organisations', 'per': 'Personnes'}
+    nodes, edges = graph['nodes'], graph['edges']
+    fig = go.Figure()
 
+    # Liens regroupés en 3 classes de poids : une trace (lignes séparées par None) par classe
+    weights = sorted(edge['weight'] for edge in edges)
+    bounds = [weights[len(weights) // 2], weights[(len(weights) * 9) // 10]] if weights else []
+    for level, width in enumerate([0.5, 1.5, 3]):
+        xs, ys = [], []
+        for edge in edges:
+            if sum(edge['weight'] > bound for bound in bounds) == level:
+                source, target = nodes[edge['source']], nodes[edge['target']]
+                xs += [source['x'], target['x'], None]
+                ys += [source['y'], target['y'], None]
+        fig.add_trace(go.Scatter(x=xs, y=ys, mode='lines', hoverinfo='skip', showlegend=False,
+                                 line=dict(width=width, color='rgba(127, 140, 141, 0.45)')))
+
+    # Nœuds : une trace par type d'entité, nom affiché pour les 25 plus cités
+    max_df = max([node['df'] for node in nodes] + [1])
+    shown = {node['id'] for node in sorted(nodes, key=lambda node: -node['df'])[:25]}
+    for kind, label in labels.items():
+        group = [node for node in nodes if node['kind'] == kind]
+        if not group:
+            continue
+        fig.add_trace(go.Scatter(
+            x=[node['x'] for node in group], y=[node['y'] for node in group],
+            mode='markers+text', name=label,
+            text=[node['name'] if node['id'] in shown or node['focus'] else '' for node in group],
+            textposition='top center', textfont=dict(size=10, color='#2C3E50'),
+            customdata=[[node['name'], node['df']] for node in group],
+            hovertemplate="<b>%{customdata[0]}</b><br>" + label[:-1] + "<br>%{customdata[1]} articles<extra></extra>",
+            marker=dict(size=[8 + 30 * (node['df'] / max_df) ** 0.5 for node in group], color=colors[kind],
+                        line=dict(width=[3 if node['focus'] else 0.5 for node in group], color='#2C3E50')),
+        ))
+
+    apply_global_style(fig, title_text)
+    fig.update_layout(hovermode='closest', height=700,
+                      xaxis=dict(visible=False), yaxis=dict(visible=False, scaleanchor='x'))
+    return fig
 
 
 # --- FONCTIONS VISUALISATION UTILISATEUR (GÉO) ---
@@ -380,145 +521,233 @@ def generate_geo_trends(df_year, df_map):
 
 app = dash.Dash(
     __name__,
-    external_stylesheets=['https://fonts.googleapis.com/css2?family=Poppins:wght@400;600&display=swap']
+    external_stylesheets=['https://fonts.googleapis.com/css2?family=Poppins:wght@400;600&display=swap'],
+    # Les onglets sont construits à la demande : leurs composants n'existent pas au démarrage
+    suppress_callback_exceptions=True
 )
 
 
-# --- Contenu de l'Onglet 2 : Analyse Annuelle Détaillée ---
-# Déterminons l'année par défaut pour l'initialisation (l'année la plus récente)
-DEFAULT_YEAR = sorted(df_dashboard['year'].unique(), reverse=True)[0] # Ex: '2025'
-
 # --- 3. DÉFINITION DE L'APPLICATION ET DU LAYOUT (AVEC ONGLET) ---
 
 # Ajout du CSS externe pour retirer les marges du body et permettre le plein écran sans scroll
 #app = dash.Dash(__name__, external_stylesheets=['https://codepen.io/chriddyp/pen/bWLwgP.css'])
 
 # --- Contenu de l'Onglet 2 : Comparaison Globale ---
-tab_comparison_content = html.Div(style={'padding': '0 15px'}, children=[ 
+def build_tab_comparison():
+    return html.Div(style={'padding': '0 15px'}, children=[ 
 
-    html.Div([
-        dcc.Graph(figure=generate_article_per_year(df_dashboard), style={'width': '30%', 'height': '600px'}),
-        dcc.Graph(figure=generate_comparison_chart(df_dashboard), style={'width': '60%', 'height': '600px'}),
-        
-    ], style={'display': 'flex', 'justifyContent': 'space-around', 'marginBottom': '20px', 'flexWrap': 'wrap','marginTop': '10px'}),
-    ])
+        html.Div([
+            dcc.Graph(figure=generate_article_per_year(cube), style={'width': '30%', 'height': '600px'}),
+            dcc.Graph(figure=generate_comparison_chart(cube), style={'width': '60%', 'height': '600px'}),
+
+        ], style={'display': 'flex', 'justifyContent': 'space-around', 'marginBottom': '20px', 'flexWrap': 'wrap','marginTop': '10px'}),
+        ])
 
 # --- Contenu de l'Onglet 1 : Analyse Annuelle Détaillée ---
-tab_detail_content = html.Div(style={'padding': '0 15px'}, children=[
-    
-    # SÉLECTION D'ANNÉE UNIQUE
-    html.Div([
-        html.P("Sélectionnez l'Année à Analyser:", style={'marginBottom': '10px', 'fontWeight': 'bold'}),
-        dcc.Dropdown(
-            id='year-dropdown-detail',
-            options=[{'label': str(y), 'value': str(y)} for y in sorted(df_dashboard['year'].unique(), reverse=True)],
-            value=DEFAULT_YEAR, 
-            clearable=False,
-            style={'width': '200px', 'marginBottom': '20px'}
-        ),
-    ], style={'display': 'flex', 'alignItems': 'center', 'gap': '20px', 'marginLeft': '20px','marginTop': '10px'}),
-
-    # Conteneur des graphiques dynamiques
-    html.Div([
-        # 1. Articles par Mois (Dynamique) 
-        dcc.Graph(
-            id='articles-per-month-dynamic', 
-            figure=generate_article_per_month(df_dashboard, DEFAULT_YEAR), 
-            style={'width': '30%', 'height': '600px'}
-        ),
-        # 2. Volume Thématique (Dynamique) 
-        dcc.Graph(
-            id='theme-volume-bar-dynamic', 
-            figure=generate_theme_volume_bar(df_dashboard, DEFAULT_YEAR), 
-            style={'width': '60%', 'height': '600px'}
-        ),
-    ], style={'display': 'flex', 'justifyContent': 'space-around', 'marginBottom': '30px', 'flexWrap': 'wrap'}),
-    
-    html.Div([
-        dcc.Graph(
-            id='heatmap-themes-dynamic', 
-            figure=generate_heatmap_themes(df_dashboard, DEFAULT_YEAR)
-        )
-    ]), 
+def build_tab_detail():
+    # Déterminons l'année par défaut pour l'initialisation (l'année la plus récente)
+    default_year = cube.years[-1] # Ex: '2025'
+    return html.Div(style={'padding': '0 15px'}, children=[
 
-    html.Div([
-        dcc.Graph(
-            id='trend-chart',
-            figure=generate_trend_chart(df_dashboard)
-        )
-    ]),
+        # SÉLECTION D'ANNÉE UNIQUE
+        html.Div([
+            html.P("Sélectionnez l'Année à Analyser:", style={'marginBottom': '10px', 'fontWeight': 'bold'}),
+            dcc.Dropdown(
+                id='year-dropdown-detail',
+                options=[{'label': y, 'value': y} for y in reversed(cube.years)],
+                value=default_year, 
+                clearable=False,
+                style={'width': '200px', 'marginBottom': '20px'}
+            ),
+            # Figures de toutes les années (mode CLIENTSIDE_YEARS)
+            dcc.Store(id='year-figures'),
+        ], style={'display': 'flex', 'alignItems': 'center', 'gap': '20px', 'marginLeft': '20px','marginTop': '10px'}),
+
+        # Conteneur des graphiques dynamiques
+        html.Div([
+            # 1. Articles par Mois (Dynamique) 
+            dcc.Graph(
+                id='articles-per-month-dynamic', 
+                figure=figure_cache.get_or_build(generate_article_per_month, cube, default_year), 
+                style={'width': '30%', 'height': '600px'}
+            ),
+            # 2. Volume Thématique (Dynamique) 
+            dcc.Graph(
+                id='theme-volume-bar-dynamic', 
+                figure=figure_cache.get_or_build(generate_theme_volume_bar, cube, default_year), 
+                style={'width': '60%', 'height': '600px'}
+            ),
+        ], style={'display': 'flex', 'justifyContent': 'space-around', 'marginBottom': '30px', 'flexWrap': 'wrap'}),
 
+        html.Div([
+            dcc.Graph(
+                id='heatmap-themes-dynamic', 
+                figure=figure_cache.get_or_build(generate_heatmap_themes, cube, default_year)
+            )
+        ]), 
 
-])
+        html.Div([
+            dcc.Graph(
+                id='trend-chart',
+                figure=generate_trend_chart(cube)
+            )
+        ]),
+
+
+    ])
     
 
 # --- Contenu de l'Onglet 3 : Aperçu Global (Structure) ---
 # Ajout de 'padding' au conteneur principal de l'onglet
 # --- Contenu de l'Onglet 3 : Aperçu Global (Structure Sémantique et Spatiale) ---
-tab_global_structure_content = html.Div(style={'padding': '0 15px'}, children=[
+def build_tab_global_structure():
+    df_geo_map, df_geo_year = load_geo_data()
+    points.refresh()
+    return html.Div(style={'padding': '0 15px'}, children=[
+
+        # 4. SECTION GÉOPOLITIQUE (UTILISATEUR) - Moved to Top
+        html.H2("🌍 Carte Interactive des Pays & Lieux", style={'textAlign': 'center', 'color': '#2C3E50', 'marginTop': '30px'}),
 
-    # 4. SECTION GÉOPOLITIQUE (UTILISATEUR) - Moved to Top
-    html.H2("🌍 Carte Interactive des Pays & Lieux", style={'textAlign': 'center', 'color': '#2C3E50', 'marginTop': '30px'}),
-    
-    html.Div([
-        # Carte
         html.Div([
-            dcc.Graph(figure=generate_geo_map(df_geo_map), style={'width': '100%', 'height': '600px', 'boxShadow': '0 4px 6px rgba(0,0,0,0.1)', 'borderRadius': '10px', 'padding': '10px', 'backgroundColor': 'white'}),
-        ], style={'width': '100%', 'marginBottom': '20px'}),
-        
-        # Stats charts side-by-side
+            # Carte
+            html.Div([
+                dcc.Graph(figure=generate_geo_map(df_geo_map), style={'width': '100%', 'height': '600px', 'boxShadow': '0 4px 6px rgba(0,0,0,0.1)', 'borderRadius': '10px', 'padding': '10px', 'backgroundColor': 'white'}),
+            ], style={'width': '100%', 'marginBottom': '20px'}),
+
+            # Stats charts side-by-side
+            html.Div([
+                html.Div([dcc.Graph(figure=generate_geo_top15(df_geo_map))], style={'width': '48%', 'display': 'inline-block', 'boxShadow': '0 4px 6px rgba(0,0,0,0.1)', 'borderRadius': '10px', 'padding': '10px', 'backgroundColor': 'white'}),
+                html.Div([dcc.Graph(figure=generate_geo_trends(df_geo_year, df_geo_map))], style={'width': '48%', 'display': 'inline-block', 'float': 'right', 'boxShadow': '0 4px 6px rgba(0,0,0,0.1)', 'borderRadius': '10px', 'padding': '10px', 'backgroundColor': 'white'}),
+            ], style={'width': '100%', 'marginBottom': '30px'}),
+
+        ]),
+        html.Hr(),
+
+        # 1. Le graphique des mots-clés (Top Words) prend toute la largeur en haut
         html.Div([
-            html.Div([dcc.Graph(figure=generate_geo_top15(df_geo_map))], style={'width': '48%', 'display': 'inline-block', 'boxShadow': '0 4px 6px rgba(0,0,0,0.1)', 'borderRadius': '10px', 'padding': '10px', 'backgroundColor': 'white'}),
-            html.Div([dcc.Graph(figure=generate_geo_trends(df_geo_year, df_geo_map))], style={'width': '48%', 'display': 'inline-block', 'float': 'right', 'boxShadow': '0 4px 6px rgba(0,0,0,0.1)', 'borderRadius': '10px', 'padding': '10px', 'backgroundColor': 'white'}),
-        ], style={'width': '100%', 'marginBottom': '30px'}),
-        
-    ]),
-    html.Hr(),
+            dcc.Graph(id='top-words-bar', figure=generate_top_words_bar(load_top_words()), style={'width': '100%', 'height': '700px'}),
+        ], style={'marginBottom': '30px','marginTop': '10px'}),
 
-    # 1. Le graphique des mots-clés (Top Words) prend toute la largeur en haut
-    html.Div([
-        dcc.Graph(figure=generate_top_words_bar(df_top_words), style={'width': '100%', 'height': '700px'}),
-    ], style={'marginBottom': '30px','marginTop': '10px'}),
+        # 1 bis. Exploration d'un mot-clé : termes co-occurrents (paragraphe ou article), filtrés par année et thème
+        html.Div([
+            html.H3("🔗 Termes associés à un mot-clé", style={'color': '#2C3E50'}),
+            html.Div([
+                dcc.Input(id='cooc-term', type='text', debounce=True, placeholder="Mot-clé (lemme), ex. ukraine",
+                          style={'width': '250px', 'padding': '8px'}),
+                dcc.RadioItems(id='cooc-window', value='paragraph', inline=True,
+                               options=[{'label': ' Même paragraphe ', 'value': 'paragraph'},
+                                        {'label': ' Même article ', 'value': 'article'}]),
+                dcc.RadioItems(id='cooc-measure', value='llr', inline=True,
+                               options=[{'label': ' Log-vraisemblance ', 'value': 'llr'},
+                                        {'label': ' PMI ', 'value': 'pmi'},
+                                        {'label': ' Co-occurrences ', 'value': 'count'}]),
+                dcc.Dropdown(id='cooc-year', value='ALL', clearable=False, style={'width': '220px'},
+                             options=[{'label': 'Global (Toutes Années)', 'value': 'ALL'}] +
+                                     [{'label': y, 'value': y} for y in reversed(cube.years)]),
+                dcc.Dropdown(id='cooc-theme', value='ALL', clearable=False, style={'width': '320px'},
+                             options=[{'label': 'Tous les thèmes', 'value': 'ALL'}] +
+                                     [{'label': t, 'value': t} for t in cube.themes]),
+            ], style={'display': 'flex', 'alignItems': 'center', 'gap': '20px', 'flexWrap': 'wrap'}),
+            html.Div(id='cooc-results', style={'marginTop': '15px'}),
+        ], style=dict(card_style, marginBottom='30px')),
+
+        # 2. Le Nuage 3D et la Heatmap côte à côte
+        html.Div([
+            dcc.Graph(id='scatter-3d', figure=figure_cache.get_or_build(generate_3d_scatter, points), style={'width': '100%', 'height': '600px'}),
+            html.Button("Vue d'ensemble", id='scatter-3d-overview', n_clicks=0),
 
-    # 2. Le Nuage 3D et la Heatmap côte à côte
-    html.Div([
-        dcc.Graph(figure=generate_3d_scatter(df_dashboard), style={'width': '100%', 'height': '600px'}),
-        
-    ], style={'display': 'flex', 'justifyContent': 'space-between', 'marginBottom': '30px', 'flexWrap': 'wrap'}),
-
-    # 3. Treemap global
-    html.Div([
-        dcc.Graph(id='treemap-global',figure=generate_treemap(df_dashboard), style={'width': '100%', 'height': '600px'}),
-        html.Div(id='theme-name-display', style={'textAlign': 'center', 'fontWeight': 'bold', 'marginTop': '10px'}),
-
-    html.Div(
-    id='theme-image-container',
-    style={
-        'display': 'flex',
-        'justifyContent': 'center',
-        'alignItems': 'center',
-        'marginTop': '30px',
-        'width': '100%'
-    },
-    children=[
-        html.Img(
-            id='theme-image',
-            src='',
-            style={
-                'maxWidth': '600px',
-                'width': '100%',
-                'height': 'auto',
-                'boxShadow': '0 4px 12px rgba(0,0,0,0.15)',
-                'borderRadius': '10px'
-            }
-        )
-    ]
-)
-        
-    ], style={'display': 'flex', 'justifyContent': 'space-between', 'marginBottom': '30px', 'flexWrap': 'wrap'}),
+        ], style={'display': 'flex', 'justifyContent': 'space-between', 'marginBottom': '30px', 'flexWrap': 'wrap'}),
 
-    
-])
+        # 3. Treemap global
+        html.Div([
+            dcc.Graph(id='treemap-global',figure=generate_treemap(cube), style={'width': '100%', 'height': '600px'}),
+            html.Div(id='theme-name-display', style={'textAlign': 'center', 'fontWeight': 'bold', 'marginTop': '10px'}),
+
+        html.Div(
+        id='theme-image-container',
+        style={
+            'display': 'flex',
+            'justifyContent': 'center',
+            'alignItems': 'center',
+            'marginTop': '30px',
+            'width': '100%'
+        },
+        children=[
+            html.Img(
+                id='theme-image',
+                src='',
+                style={
+                    'maxWidth': '600px',
+                    'width': '100%',
+                    'height': 'auto',
+                    'boxShadow': '0 4px 12px rgba(0,0,0,0.15)',
+                    'borderRadius': '10px'
+                }
+            )
+        ]
+    )
+
+        ], style={'display': 'flex', 'justifyContent': 'space-between', 'marginBottom': '30px', 'flexWrap': 'wrap'}),
+
+
+    ])
+
+# --- Contenu de l'Onglet 4 : Recherche d'Articles ---
+def build_tab_search():
+    # Préparation des options pour les menus déroulants
+    all_years = [{'label': 'Global (Toutes Années)', 'value': 'ALL'}] + \
+                [{'label': y, 'value': y} for y in reversed(cube.years)]
+    all_themes = [{'label': 'Tous les thèmes', 'value': 'ALL'}] + \
+                 [{'label': t, 'value': t} for t in cube.themes]
+    return html.Div(style={'padding': '0 15px'}, children=[
+
+        html.Div([
+            dcc.Input(
+                id='search-query',
+                type='search',
+                debounce=True,
+                placeholder="Rechercher dans les titres et contenus...",
+                style={'width': '400px', 'padding': '8px'}
+            ),
+            dcc.Dropdown(id='search-year', options=all_years, value='ALL', clearable=False, style={'width': '220px'}),
+            dcc.Dropdown(id='search-theme', options=all_themes, value='ALL', clearable=False, style={'width': '320px'}),
+        ], style={'display': 'flex', 'alignItems': 'center', 'gap': '20px', 'marginLeft': '20px', 'marginTop': '10px'}),
+
+        html.Div(id='search-results', style={'marginTop': '20px'}),
+    ])
+
+# --- Contenu de l'Onglet 5 : Réseau des Entités (lieux, organisations, personnes) ---
+def build_tab_network():
+    all_years = [{'label': 'Global (Toutes Années)', 'value': 'ALL'}] + \
+                [{'label': y, 'value': y} for y in reversed(cube.years)]
+    all_months = [{'label': 'Tous les mois', 'value': 'ALL'}] + [{'label': m, 'value': m} for m in MONTHS]
+    return html.Div(style={'padding': '0 15px'}, children=[
+
+        html.Div([
+            dcc.Input(
+                id='network-focus',
+                type='search',
+                debounce=True,
+                placeholder="Entité à explorer (ex. Mali) ou clic sur un nœud",
+                style={'width': '300px', 'padding': '8px'}
+            ),
+            dcc.Dropdown(id='network-year', options=all_years, value='ALL', clearable=False, style={'width': '220px'}),
+            dcc.Dropdown(id='network-month', options=all_months, value='ALL', clearable=False, style={'width': '160px'}),
+            dcc.Checklist(id='network-kinds', value=['loc', 'org', 'per'], inline=True,
+                          options=[{'label': ' Lieux ', 'value': 'loc'},
+                                   {'label': ' Organisations ', 'value': 'org'},
+                                   {'label': ' Personnes ', 'value': 'per'}]),
+        ], style={'display': 'flex', 'alignItems': 'center', 'gap': '20px', 'marginLeft': '20px', 'marginTop': '10px',
+                  'flexWrap': 'wrap'}),
+
+        html.Div([
+            html.Span("Nombre de liens affichés :", style={'color': '#2C3E50'}),
+            html.Div(dcc.Slider(id='network-edges', min=50, max=500, step=50, value=150), style={'width': '400px'}),
+        ], style={'display': 'flex', 'alignItems': 'center', 'gap': '20px', 'marginLeft': '20px', 'marginTop': '10px'}),
+
+        dcc.Graph(id='network-graph', style={'width': '100%', 'height': '700px'}),
+        html.Div(id='network-neighbours', style={'marginTop': '10px'}),
+    ])
 
 # LE LAYOUT FINAL AVEC LES ONGLETS (Plein écran : width: '100vw', margin: '0')
 app.layout = html.Div(style={'fontFamily': 'Arial, sans-serif', 'width': '100vw', 'margin': '0'}, children=[
@@ -530,52 +759,155 @@ app.layout = html.Div(style={'fontFamily': 'Arial, sans-serif', 'width': '100vw'
         
 
         # 1. Analyse Détaillée (Focus annuel)
-        dcc.Tab(label='Analyse Annuelle Détaillée', value='tab-detail', children=[tab_detail_content]),
+        dcc.Tab(label='Analyse Annuelle Détaillée', value='tab-detail'),
 
         # 2. Comparaison (Focus principal)
-        dcc.Tab(label='Comparaison 2024 vs 2025', value='tab-comparison', children=[tab_comparison_content]),
+        dcc.Tab(label='Comparaison 2024 vs 2025', value='tab-comparison'),
 
         # 3. Aperçu Global (Structure)
-        dcc.Tab(label='Aperçu Global du corpus(Structure)', value='tab-global-structure', children=[tab_global_structure_content]),
+        dcc.Tab(label='Aperçu Global du corpus(Structure)', value='tab-global-structure'),
+
+        # 4. Recherche plein texte
+        dcc.Tab(label='Recherche d\'Articles', value='tab-search'),
+
+        # 5. Réseau de co-occurrence des entités
+        dcc.Tab(label='Réseau des Entités', value='tab-network'),
 
         
         
     
     ]),
+
+    # Contenu de l'onglet sélectionné, construit à la demande (voir render_tab)
+    html.Div(id='tab-content'),
 ])
 
+# Compteurs du cache de figures, pour le dimensionner (FIGURE_CACHE_MB)
+@app.server.route('/_figure-cache/stats')
+def figure_cache_stats():
+    return flask.jsonify(figure_cache.stats())
+
 # --- 4. CALLBACKS (Logique Interactive) ---
 # NOTE: prevent_initial_call=True est ajouté car les figures sont initialisées dans le layout
 # NOTE: allow_duplicate=True est obligatoire car les figures sont initialisées dans le layout
 
 
-# Callback 1 : Mise à jour du Volume par Thème (Bar Chart)
-@app.callback(
-    Output('theme-volume-bar-dynamic', 'figure', allow_duplicate=True),
-    [Input('year-dropdown-detail', 'value')],
-    prevent_initial_call=True 
-)
-def update_theme_volume_bar(selected_year):
-    # Appelle la fonction générée précédemment (generate_theme_volume_bar)
-    return generate_theme_volume_bar(df_dashboard, selected_year)
+# Contenu des onglets : construit au premier affichage puis réutilisé
+TAB_BUILDERS = {
+    'tab-detail': build_tab_detail,
+    'tab-comparison': build_tab_comparison,
+    'tab-global-structure': build_tab_global_structure,
+    'tab-search': build_tab_search,
+    'tab-network': build_tab_network,
+}
+_tab_layouts = {}  # {jeton des données: {onglet: contenu}}, une seule version à la fois
 
-# Callback 2 : Mise à jour des Articles par Mois (Bar Chart + Tendance)
 @app.callback(
-    Output('articles-per-month-dynamic', 'figure', allow_duplicate=True),
-    [Input('year-dropdown-detail', 'value')],
-    prevent_initial_call=True 
+    Output('tab-content', 'children'),
+    Input('tabs-graph', 'value')
 )
-def update_article_per_month(selected_year):
-    # Utilise la fonction existante (generate_article_per_month)
-    return generate_article_per_month(df_dashboard, selected_year)
+def render_tab(tab):
+    # Onglet préconstruit par le pipeline et toujours à jour : servi sans aucun calcul
+    prebuilt = prebuilt_layout(tab)
+    if prebuilt is not None:
+        return prebuilt
+    cube.refresh()
+    tabs = _tab_layouts.get(cube.token)
+    if tabs is None:
+        # Données rafraîchies : seuls les onglets de la version courante sont gardés
+        _tab_layouts.clear()
+        tabs = _tab_layouts.setdefault(cube.token, {})
+    if tab not in tabs:
+        tabs[tab] = TAB_BUILDERS[tab]()
+    return tabs[tab]
+
+# Fichiers dont dépendent les onglets préconstruits (changés : construction à la demande)
+LAYOUT_SOURCES = TABLES + ['app_friend.py', 'aggregates.py', 'scatter_lod.py']
+
+def prebuild_layouts():
+    """Construit tous les onglets dans snapshot/layouts.json (étape dashboard_layouts du pipeline)."""
+    return write_layouts({tab: build() for tab, build in TAB_BUILDERS.items()}, LAYOUT_SOURCES)
+
+if CLIENTSIDE_YEARS:
+    # Callback 1 : Figures de toutes les années, une fois par chargement de page (cache de figures)
+    @app.callback(
+        Output('year-figures', 'data'),
+        Input('year-dropdown-detail', 'options')
+    )
+    def load_year_figures(options):
+        cube.refresh()
+        return {
+            option['value']: {
+                'month': figure_cache.get_or_build(generate_article_per_month, cube, option['value']),
+                'theme': figure_cache.get_or_build(generate_theme_volume_bar, cube, option['value']),
+                'heatmap': figure_cache.get_or_build(generate_heatmap_themes, cube, option['value']),
+            }
+            for option in options
+        }
+
+    # Callback 2 : Changement d'année dans le navigateur, sans aller-retour serveur
+    app.clientside_callback(
+        """
+        function(year, figures) {
+            if (!figures || !figures[year]) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            var f = figures[year];
+            return [f.month, f.theme, f.heatmap];
+        }
+        """,
+        [Output('articles-per-month-dynamic', 'figure'),
+         Output('theme-volume-bar-dynamic', 'figure'),
+         Output('heatmap-themes-dynamic', 'figure')],
+        [Input('year-dropdown-detail', 'value'),
+         Input('year-figures', 'data')],
+        prevent_initial_call=True
+    )
+else:
+    # Callback 1 : Mise à jour du Volume par Thème (Bar Chart)
+    @app.callback(
+        Output('theme-volume-bar-dynamic', 'figure', allow_duplicate=True),
+        [Input('year-dropdown-detail', 'value')],
+        prevent_initial_call=True 
+    )
+    def update_theme_volume_bar(selected_year):
+        # Appelle la fonction générée précédemment (generate_theme_volume_bar)
+        cube.refresh()
+        return figure_cache.get_or_build(generate_theme_volume_bar, cube, selected_year)
+
+    # Callback 2 : Mise à jour des Articles par Mois (Bar Chart + Tendance)
+    @app.callback(
+        Output('articles-per-month-dynamic', 'figure', allow_duplicate=True),
+        [Input('year-dropdown-detail', 'value')],
+        prevent_initial_call=True 
+    )
+    def update_article_per_month(selected_year):
+        # Utilise la fonction existante (generate_article_per_month)
+        cube.refresh()
+        return figure_cache.get_or_build(generate_article_per_month, cube, selected_year)
+
+    @app.callback(
+        Output('heatmap-themes-dynamic', 'figure'),
+        Input('year-dropdown-detail', 'value')
+    )
+    def update_heatmap(selected_year):
+        # Appelle la fonction qui génère la heatmap pour l'année sélectionnée
+        cube.refresh()
+        return figure_cache.get_or_build(generate_heatmap_themes, cube, selected_year)
 
+# Nuage 3D : un clic charge tous les points autour du point cliqué, le bouton revient à l'échantillon
 @app.callback(
-    Output('heatmap-themes-dynamic', 'figure'),
-    Input('year-dropdown-detail', 'value')
+    Output('scatter-3d', 'figure'),
+    [Input('scatter-3d', 'clickData'),
+     Input('scatter-3d-overview', 'n_clicks')],
+    prevent_initial_call=True
 )
-def update_heatmap(selected_year):
-    # Appelle la fonction qui génère la heatmap pour l'année sélectionnée
-    return generate_heatmap_themes(df_dashboard, selected_year)
+def zoom_3d_scatter(clickData, n_clicks):
+    points.refresh()
+    if dash.ctx.triggered_id == 'scatter-3d-overview' or not clickData:
+        return figure_cache.get_or_build(generate_3d_scatter, points)
+    point = clickData['points'][0]
+    return generate_3d_scatter(points, points.box_around([point['x'], point['y'], point['z']]))
 
 # Callback 3 : Mise à jour de la Heatmap (Intensité médiatique)
 @app.callback(
@@ -599,6 +931,125 @@ def display_theme_image(clickData):
 
     return image_path, f"Vous avez sélectionné : {theme_clicked}"
 
+# Callback 4 : Clic sur un mot-clé du Top Words -> exploration de ses co-occurrences dans son thème
+@app.callback(
+    [Output('cooc-term', 'value'),
+     Output('cooc-theme', 'value')],
+    Input('top-words-bar', 'clickData'),
+    prevent_initial_call=True
+)
+def select_keyword(clickData):
+    point = clickData['points'][0]
+    return point['y'], point['customdata'][0]
+
+# Callback 4 bis : Termes les plus associés au mot-clé (index de co-occurrence)
+@app.callback(
+    Output('cooc-results', 'children'),
+    [Input('cooc-term', 'value'),
+     Input('cooc-window', 'value'),
+     Input('cooc-measure', 'value'),
+     Input('cooc-year', 'value'),
+     Input('cooc-theme', 'value')]
+)
+def update_cooccurrences(term, window, measure, selected_year, selected_theme):
+    if not term:
+        return html.P("Cliquez sur un mot-clé ou saisissez un lemme pour voir les termes qui lui sont associés.")
+    index = load_cooccurrence()
+    if index is None:
+        return html.P("Index de co-occurrence introuvable. Lancez d'abord : python cooccurrence.py")
+
+    term = term.strip().lower()
+    hits = index.associated(term, k=15, window=window, measure=measure, years=selected_year, themes=selected_theme)
+    if not hits:
+        return html.P(f"Aucun terme associé à « {term} » pour cette sélection.")
+    return dcc.Graph(figure=generate_cooccurrence_bar(term, hits, measure))
+
+# Callback 5 : Recherche plein texte (BM25) filtrée par année et thème
+@app.callback(
+    Output('search-results', 'children'),
+    [Input('search-query', 'value'),
+     Input('search-year', 'value'),
+     Input('search-theme', 'value')]
+)
+def update_search_results(query, selected_year, selected_theme):
+    searcher = load_searcher()
+    if searcher is None:
+        return html.P("Index de recherche introuvable. Lancez d'abord : python search.py")
+    if not query:
+        return html.P("Saisissez des mots-clés pour lancer la recherche.")
+
+    hits = searcher.search(query, k=20, year=selected_year, theme=selected_theme)
+    if not hits:
+        return html.P(f"Aucun article trouvé pour : {query}")
+
+    return [
+        html.Div([
+            html.A(hit['title'], href=hit['url'], target='_blank', style={'fontWeight': 'bold', 'color': '#2C3E50'}),
+            html.P(f"{hit['date']} · {hit['Theme'] or 'Thème non classé'} · score BM25 {hit['score']:.2f}",
+                   style={'margin': '5px 0 0 0', 'color': '#7F8C8D'}),
+        ], style=card_style)
+        for hit in hits
+    ]
+
+# Callback 6 : Clic sur un nœud du réseau -> il devient l'entité explorée
+@app.callback(
+    Output('network-focus', 'value'),
+    Input('network-graph', 'clickData'),
+    prevent_initial_call=True
+)
+def focus_network_node(clickData):
+    point = clickData['points'][0]
+    if 'customdata' not in point:
+        raise dash.exceptions.PreventUpdate
+    return point['customdata'][0]
+
+# Callback 6 bis : Réseau de la période (liens les plus forts) ou voisinage de l'entité explorée
+@app.callback(
+    [Output('network-graph', 'figure'),
+     Output('network-neighbours', 'children')],
+    [Input('network-focus', 'value'),
+     Input('network-year', 'value'),
+     Input('network-month', 'value'),
+     Input('network-kinds', 'value'),
+     Input('network-edges', 'value')]
+)
+def update_network(focus, selected_year, selected_month, kinds, n_edges):
+    network = load_entity_network()
+    if network is None:
+        return go.Figure(), html.P("Réseau des entités introuvable. Lancez d'abord : python entity_network.py")
+
+    # Période : un mois d'une année, une année, ou tout le corpus
+    period = 'ALL'
+    if selected_year != 'ALL':
+        period = selected_year if selected_month == 'ALL' else f"{selected_year}-{selected_month}"
+    period_label = "tout le corpus" if period == 'ALL' else period
+    kinds = kinds or ['loc', 'org', 'per']
+
+    entity = network.find(focus, period, period) if focus else None
+    if focus and entity is None:
+        graph = network.graph(period, period, kinds, n_edges)
+        message = html.P(f"Entité inconnue : {focus}")
+    elif entity is None:
+        graph = network.graph(period, period, kinds, n_edges)
+        message = html.P("Cliquez sur un nœud ou saisissez une entité pour explorer ses co-occurrences.")
+    else:
+        graph = network.graph(period, period, kinds, n_edges, focus=entity)
+        kind, name = network.entities[entity]
+        labels = {'loc': 'Lieux', 'org': 'Organisations', 'per': 'Personnes'}
+        message = [html.H4(f"Co-occurrences de « {name} » ({period_label})", style={'color': '#2C3E50'})] + [
+            html.P([html.B(f"{labels[k]} : "),
+                    ', '.join(f"{hit['name']} ({hit['weight']})" for hit in network.neighbours_of(entity, [k], period, period, 10))
+                    or 'aucune'])
+            for k in kinds
+        ]
+
+    title = f"Réseau des entités : {period_label}" if entity is None else \
+        f"Voisinage de « {network.entities[entity][1]} » : {period_label}"
+    return generate_entity_network(graph, title), html.Div(message, style=card_style)
+
+# Point d'entrée WSGI : gunicorn app_friend:server
+server = app.server
+
 # --- 5. LANCEMENT DU SERVEUR ---
 if __name__ == '__main__':
     # Utilisez app.run(debug=True)
@@ -3,6 +3,8 @@ import pandas as pd
 import altair as alt
 import pydeck as pdk
 
+from entity_index import EntityIndex
+
 # --- Configuration de la Page Streamlit ---
 st.set_page_config(layout="wide", page_title="Géographie des Données")
 
@@ -43,6 +45,16 @@ def load_data():
 
 df_agg, df_map, df_context = load_data()
 
+@st.cache_resource
+def load_entity_index():
+    # Inverted index entity -> articles (python entity_index.py)
+    try:
+        return EntityIndex()
+    except FileNotFoundError:
+        return None
+
+entity_index = load_entity_index()
+
 if df_agg.empty:
     st.error("Aucune donnée.")
     st.stop()
@@ -133,8 +145,14 @@ if selected_location != "(Aucun)":
     c2.metric("Nombre de Mentions", loc_stats['Count'])
     c3.metric("Part du Corpus", f"{loc_stats['Share']:.2%}")
     
-    # Show Context if available
-    if not df_context.empty:
+    # Show Context: any location of the corpus through the entity index,
+    # otherwise the precomputed headlines of location_context.csv
+    indexed_articles = entity_index.top('loc', selected_location, n=5, by='recency') if entity_index else []
+    if indexed_articles:
+        st.markdown("#### 📰 Articles mentionnant ce lieu :")
+        for article in indexed_articles:
+            st.info(f"📄 {article['title']} ({article['date']}, {article['tf']} mention(s))")
+    elif not df_context.empty:
         ctx_row = df_context[df_context['Location'] == selected_location]
         if not ctx_row.empty:
             st.markdown("#### 📰 Exemples de Titres / Contexte :")
@@ -0,0 +1,119 @@
+"""Batch geocoding of a whole location vocabulary through the geocoding cache.
+
+Names are deduplicated on their normalised form, answered from the cache /
+KNOWN_COORDINATES when possible, and only the rest is sent to the backend by a
+pool of worker threads (at most `workers`, and never more than the backend's
+own `max_workers`; its rate limit is enforced by the backend itself). Failed
+requests are retried with exponential backoff. Answers are committed to the
+cache every `checkpoint_every` results, so an interrupted run resumes where it
+stopped: already-answered names are never asked again.
+
+    python batch_geocoder.py                      the metadata['all']['loc'] vocabulary
+    python batch_geocoder.py --backend file --workers 8
+"""
+import argparse
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from geocache import GEOCODER, GeoCache, cache_key, make_backend
+
+WORKERS = 4
+RETRIES = 3
+BACKOFF_SECONDS = 2.0
+CHECKPOINT_EVERY = 100
+
+
+def geocode_with_retry(backend, name, retries=RETRIES, backoff=BACKOFF_SECONDS):
+    """backend.geocode(name), retried `retries` times on errors (backoff, 2*backoff, 4*backoff... + jitter)."""
+    for attempt in range(retries + 1):
+        try:
+            return backend.geocode(name)
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2 ** attempt * (1 + random.random() / 2))
+
+
+def geocode_all(names, cache, backend=None, workers=WORKERS, retries=RETRIES, backoff=BACKOFF_SECONDS,
+                checkpoint_every=CHECKPOINT_EVERY, verbose=True):
+    """Resolve every name; return {name: (lat, lon)} ((None, None) when it cannot be placed).
+
+    Names that errored after all retries stay uncached and are retried on the next run.
+    """
+    results = {}
+    pending = {}    # cache key -> names sharing it
+    source = backend.name if backend is not None else cache.backend_name
+    for name in names:
+        if name in results:
+            continue
+        local = cache.resolve_local(name, source)
+        if local is not None:
+            results[name] = local
+        else:
+            pending.setdefault(cache_key(name), []).append(name)
+    cache.commit()
+
+    if verbose:
+        print(f"{len(results)} names answered locally, {len(pending)} to geocode.")
+    if not pending:
+        return results
+    if cache.offline:
+        for same_key in pending.values():
+            results.update((name, (None, None)) for name in same_key)
+        return results
+
+    backend = backend or cache.backend
+    max_workers = min(workers, getattr(backend, 'max_workers', None) or workers)
+    done = errors = 0
+    started = time.perf_counter()
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {
+            executor.submit(geocode_with_retry, backend, same_key[0], retries, backoff): same_key
+            for same_key in pending.values()
+        }
+        for future in as_completed(futures):
+            same_key = futures[future]
+            try:
+                coords = future.result()
+            except Exception as e:
+                errors += 1
+                coords = None
+                if verbose:
+                    print(f"Error geocoding {same_key[0]}: {e}")
+            else:
+                # The answer ("not found" included) is cached for every variant of the name
+                cache.put(same_key[0], coords, backend.name, commit=False)
+            results.update((name, coords or (None, None)) for name in same_key)
+
+            done += 1
+            if done % checkpoint_every == 0:
+                cache.commit()
+                if verbose:
+                    rate = done / (time.perf_counter() - started)
+                    print(f"  {done}/{len(pending)} geocoded ({rate:.1f}/s, {errors} errors)")
+    finally:
+        # Keep what was answered even if interrupted (Ctrl+C, quota...)
+        executor.shutdown(wait=False, cancel_futures=True)
+        cache.commit()
+
+    if verbose:
+        print(f"Geocoded {done} names in {time.perf_counter() - started:.1f}s ({errors} errors, left uncached).")
+    return results
+
+
+if __name__ == '__main__':
+    from corpus import CORPUS_PATH, read_metadata
+
+    parser = argparse.ArgumentParser(description="Geocode the location vocabulary into the geocoding cache.")
+    parser.add_argument('corpus', nargs='?', default=CORPUS_PATH)
+    parser.add_argument('--backend', default=GEOCODER)
+    parser.add_argument('--workers', type=int, default=WORKERS)
+    parser.add_argument('--retries', type=int, default=RETRIES)
+    args = parser.parse_args()
+
+    vocabulary = [str(name).strip().replace('"', '') for name in read_metadata(args.corpus, 'all', 'loc', default={})]
+    with GeoCache() as cache:
+        geocode_all(vocabulary, cache, make_backend(args.backend), workers=args.workers, retries=args.retries)
+        print(f"Geocoding cache (hits, misses) by source: {cache.stats()}")
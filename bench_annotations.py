@@ -0,0 +1,55 @@
+"""Benchmark: ast.literal_eval vs annotations.decode_field on the bundled Sputnik file.
+
+The bundled dump already holds native lists/dicts, so the annotation fields
+are first turned back into the Python-repr strings found in other scrapes.
+
+    python bench_annotations.py [path] [repeat]
+"""
+import ast
+import os
+import sys
+import time
+
+from annotations import ANNOTATION_FIELDS, DecodeCache, decode_articles, decode_field
+from corpus import iter_articles
+
+DEFAULT_PATH = 'data/fr.sputniknews.africa-france-macron.json'
+
+
+def timed(label, func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<40} {best * 1000:9.1f} ms")
+    return best
+
+
+if __name__ == '__main__':
+    path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PATH
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    articles = []
+    for year, month, day, article in iter_articles(path):
+        for field in ANNOTATION_FIELDS:
+            if field in article and not isinstance(article[field], str):
+                article[field] = repr(article[field])
+        articles.append(article)
+    values = [a[f] for a in articles for f in ANNOTATION_FIELDS if f in a]
+    size = sum(len(v) for v in values)
+    print(f"{len(articles)} articles, {len(values)} fields, {size / 1e6:.1f} MB of repr text\n")
+
+    assert [decode_field(v) for v in values] == [ast.literal_eval(v) for v in values]
+
+    baseline = timed("ast.literal_eval", lambda: [ast.literal_eval(v) for v in values], repeat)
+    fast = timed("decode_field", lambda: [decode_field(v) for v in values], repeat)
+    processes = os.cpu_count() or 1
+    pool = timed(f"decode_articles ({processes} processes)",
+                 lambda: decode_articles(articles, processes=processes, chunksize=16), 1)
+    cache = DecodeCache()
+    decode_articles(articles, cache=cache)
+    cached = timed("decode_articles (warm URL cache)", lambda: decode_articles(articles, cache=cache), repeat)
+
+    print(f"\ndecode_field speed-up over literal_eval: x{baseline / fast:.1f}")
+    print(f"warm cache speed-up over literal_eval:   x{baseline / cached:.1f}")
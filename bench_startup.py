@@ -0,0 +1,96 @@
+"""Startup benchmark of the dashboards: import time and time to first response.
+
+Every run is a fresh Python process, so imports and data loading are cold:
+
+    python bench_startup.py                        app_friend, 5 runs
+    python bench_startup.py --runs 10 --no-snapshot   ignore snapshot/ (CSV parsing, tabs built live)
+    python bench_startup.py --app app              the Streamlit app (needs streamlit)
+
+For app_friend, the first response is everything the browser needs for its
+first paint: the page, /_dash-layout, /_dash-dependencies and the default tab
+(render_tab callback), served through Flask's test client. For app.py it is
+the first full script run of streamlit's AppTest.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def first_response_app_friend():
+    started = time.perf_counter()
+    import app_friend
+    imported = time.perf_counter()
+
+    client = app_friend.server.test_client()
+    for path in ['/', '/_dash-layout', '/_dash-dependencies']:
+        assert client.get(path).status_code == 200, path
+    tab = app_friend.app.layout['tabs-graph'].value
+    response = client.post('/_dash-update-component', json={
+        'output': 'tab-content.children',
+        'outputs': {'id': 'tab-content', 'property': 'children'},
+        'inputs': [{'id': 'tabs-graph', 'property': 'value', 'value': tab}],
+        'changedPropIds': ['tabs-graph.value'],
+    })
+    assert response.status_code == 200, response.status_code
+    return imported - started, time.perf_counter() - started
+
+
+def first_response_app():
+    started = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    imported = time.perf_counter()
+
+    app = AppTest.from_file('app.py', default_timeout=300)
+    app.run()
+    assert not app.exception, app.exception
+    return imported - started, time.perf_counter() - started
+
+
+CHILDREN = {'app_friend': first_response_app_friend, 'app': first_response_app}
+
+
+def run_child(app, env):
+    started = time.perf_counter()
+    out = subprocess.run([sys.executable, __file__, '--child', app], env=env,
+                         capture_output=True, text=True, check=True).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    result['process'] = time.perf_counter() - started
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure dashboard import time and time to first response.")
+    parser.add_argument('--app', choices=sorted(CHILDREN), default='app_friend')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--no-snapshot', action='store_true',
+                        help="point SNAPSHOT_DIR to an empty directory (no mapped tables, no prebuilt tabs)")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        import_time, first_response = CHILDREN[args.child]()
+        print(json.dumps({'import': import_time, 'first_response': first_response,
+                          'pandas_imported': 'pandas' in sys.modules}))
+        return
+
+    env = dict(os.environ)
+    with tempfile.TemporaryDirectory() as empty:
+        if args.no_snapshot:
+            env['SNAPSHOT_DIR'] = empty
+        runs = [run_child(args.app, env) for _ in range(args.runs)]
+
+    print(f"{args.app}, {args.runs} cold starts{' without snapshot' if args.no_snapshot else ''} (median / min):")
+    for key, label in [('import', 'import'), ('first_response', 'first response (import included)'),
+                       ('process', 'process wall time')]:
+        values = [run[key] for run in runs]
+        print(f"  {label:34s} {statistics.median(values):6.3f}s / {min(values):6.3f}s")
+    print(f"  pandas imported before first response: {runs[-1]['pandas_imported']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+"""Keyword co-occurrence: terms associated with a lemma, by paragraph or article window.
+
+Built from the token store (python token_store.py) and the themes of
+dashboard_data_final.csv:
+
+    python cooccurrence.py                             build cooccurrence_index/
+    python cooccurrence.py --term ukraine              query it from the shell
+    python cooccurrence.py --term ukraine --window article --measure pmi --year 2025
+
+For each window ('paragraph': two lemmas of the same paragraph of
+words_per_paragraph.csv, 'article': of the same article of
+words_per_article.csv) the index holds:
+
+    {window}_units_indptr.npy, {window}_units_terms.npy        unit x term incidence (CSR, one entry per term)
+    {window}_postings_indptr.npy, {window}_postings_units.npy  the same by term (units containing each term)
+    {window}_pairs_indptr.npy, {window}_pairs_terms.npy,
+    {window}_pairs_counts.npy                                  term x term co-occurrence counts (B.T @ B,
+                                                               diagonal and pairs seen < MIN_PAIR_COUNT times dropped)
+    {window}_unit_slice.npy                                    (year, theme) slice of each unit
+    {window}_slice_df.npy, {window}_slice_units.npy            units containing each term, units, per slice
+
+A query without filter reads one row of the pair matrix. With year/theme
+filters, or for a multi-word keyword of df_top_words_clean.csv such as
+'royaume uni' (the index holds single lemmas: the units containing all its
+lemmas are taken, an intersection of posting lists), the units are selected
+from the posting lists
+and their terms counted (one bincount), the document frequencies being
+summed over the selected slices: milliseconds either way, on memory-mapped
+arrays. Associations are computed over the selected units:
+
+    pmi    log(P(x, y) / (P(x) P(y)))
+    npmi   pmi / -log P(x, y), in [-1, 1]
+    llr    Dunning's log-likelihood ratio (G2) of the 2x2 table, negative
+           when the pair is seen less often than expected
+"""
+import argparse
+import functools
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.special import xlogy
+
+from token_store import TOKEN_STORE, TokenStore
+
+COOCCURRENCE_INDEX = os.environ.get('COOCCURRENCE_INDEX', 'cooccurrence_index')
+DASHBOARD_DATA = 'dashboard_data_final.csv'
+WINDOWS = ['paragraph', 'article']
+MEASURES = ['llr', 'pmi', 'npmi', 'count']
+MIN_PAIR_COUNT = 2      # pairs seen less often are not kept in the pair matrix
+MIN_COUNT = 3           # default minimum co-occurrence count of a returned term
+TERM_BLOCK = 1024       # terms per block of the B.T @ B product
+WINDOW_ARRAYS = ['units_indptr', 'units_terms', 'postings_indptr', 'postings_units', 'pairs_indptr',
+                 'pairs_terms', 'pairs_counts', 'unit_slice', 'slice_df', 'slice_units']
+
+
+def _article_themes(keys, path=DASHBOARD_DATA):
+    """(theme index of each article, -1 if unknown; sorted theme names), joined on the 4 key columns."""
+    try:
+        df = pd.read_csv(path, usecols=['year', 'month', 'day', 'num_article', 'Theme'])
+    except (FileNotFoundError, ValueError):
+        return np.full(len(keys), -1, dtype=np.int32), []
+    themes = sorted(df['Theme'].dropna().unique().tolist())
+    codes = pd.Series(pd.Categorical(df['Theme'], categories=themes).codes,
+                      index=pd.MultiIndex.from_frame(df[['year', 'month', 'day', 'num_article']]))
+    codes = codes[~codes.index.duplicated()]
+    joined = codes.reindex(pd.MultiIndex.from_arrays(keys.T.astype(np.int64))).fillna(-1)
+    return joined.to_numpy(dtype=np.int32), themes
+
+
+def pair_counts(B, min_count=MIN_PAIR_COUNT, block=TERM_BLOCK):
+    """CSR term x term counts of units containing both terms (B.T @ B), off-diagonal, >= min_count.
+
+    The product runs over blocks of terms, each pruned before the next, so
+    pairs seen once (most of them) never accumulate.
+    """
+    n_terms = B.shape[1]
+    Bt = B.T.tocsr()
+    blocks = []
+    for start in range(0, n_terms, block):
+        part = (Bt[start:start + block] @ B).tocoo()
+        keep = (part.data >= min_count) & (part.row + start != part.col)
+        blocks.append(sp.csr_matrix((part.data[keep], (part.row[keep], part.col[keep])), shape=part.shape))
+    if not blocks:
+        return sp.csr_matrix((0, 0), dtype=np.int32)
+    pairs = sp.vstack(blocks, format='csr')
+    pairs.sort_indices()
+    return pairs
+
+
+def build_index(store_dir=TOKEN_STORE, index_dir=COOCCURRENCE_INDEX, dashboard_data=DASHBOARD_DATA):
+    """Write the co-occurrence index of the token store; returns meta.json content."""
+    store = TokenStore(store_dir)
+    years = sorted(set(store.article_keys[:, 0].tolist()) | set(store.paragraph_keys[:, 0].tolist()))
+    meta = {'terms': store.n_terms, 'min_pair_count': MIN_PAIR_COUNT, 'years': years, 'themes': [], 'windows': {}}
+    year_codes = {year: i for i, year in enumerate(years)}
+
+    tmp_dir = index_dir.rstrip('/') + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for window in WINDOWS:
+        keys = store.article_keys if window == 'article' else store.paragraph_keys
+        article_theme, meta['themes'] = _article_themes(keys, dashboard_data)
+        n_slices = len(years) * (len(meta['themes']) + 1)
+        # Slice of an article: year index * (themes + 1) + theme index + 1 (0: no theme)
+        article_year = np.array([year_codes[year] for year in keys[:, 0].tolist()], dtype=np.int64)
+        article_slice = article_year * (len(meta['themes']) + 1) + article_theme + 1
+        units_per_article = np.diff(store.paragraph_article_indptr) if window == 'paragraph' else 1
+        unit_slice = np.repeat(article_slice, units_per_article).astype(np.int32)
+
+        B = store.count_matrix(window, binary=True)
+        membership = sp.csr_matrix((np.ones(len(unit_slice), dtype=np.int32),
+                                    (unit_slice, np.arange(len(unit_slice)))), shape=(n_slices, len(unit_slice)))
+        postings = B.tocsc()
+        postings.sort_indices()
+        pairs = pair_counts(B)
+        values = {
+            'units_indptr': B.indptr.astype(np.int64), 'units_terms': B.indices.astype(np.int32),
+            'postings_indptr': postings.indptr.astype(np.int64), 'postings_units': postings.indices.astype(np.int32),
+            'pairs_indptr': pairs.indptr.astype(np.int64), 'pairs_terms': pairs.indices.astype(np.int32),
+            'pairs_counts': pairs.data.astype(np.int32),
+            'unit_slice': unit_slice,
+            'slice_df': np.asarray((membership @ B).todense(), dtype=np.int32),
+            'slice_units': np.bincount(unit_slice, minlength=n_slices).astype(np.int64),
+        }
+        for name, array in values.items():
+            np.save(os.path.join(tmp_dir, f'{window}_{name}.npy'), array)
+        meta['windows'][window] = {'units': B.shape[0], 'pairs': int(pairs.nnz)}
+
+    with open(os.path.join(tmp_dir, 'vocab.json'), 'w', encoding='utf-8') as f:
+        json.dump(store.terms.tolist(), f, ensure_ascii=False)
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=1)
+    shutil.rmtree(index_dir, ignore_errors=True)
+    os.rename(tmp_dir, index_dir)
+    return meta
+
+
+def associations(counts, df_x, df_y, n_units):
+    """{measure: array} for co-occurrence `counts` of x with terms of document frequencies `df_y`."""
+    a = counts.astype(np.float64)
+    fx, fy, n = float(df_x), df_y.astype(np.float64), float(n_units)
+    pmi = np.log(a * n / (fx * fy))
+    joint = a / n
+    npmi = np.divide(pmi, -np.log(joint), out=np.ones_like(pmi), where=joint < 1)
+
+    # 2x2 table: both, x only, y only, neither
+    observed = [a, fx - a, fy - a, n - fx - fy + a]
+    expected = [fx * fy / n, fx * (n - fy) / n, (n - fx) * fy / n, (n - fx) * (n - fy) / n]
+    g2 = 2 * sum(xlogy(o, o) - xlogy(o, e) for o, e in zip(observed, expected))
+    llr = np.where(a >= expected[0], g2, -g2)
+    return {'count': counts, 'pmi': pmi, 'npmi': npmi, 'llr': llr}
+
+
+def _selection(values):
+    """None (no filter) or the list of selected values; 'ALL' and '' mean no filter, as in search.py."""
+    if values is None or isinstance(values, (str, int)) and values in ('', 'ALL'):
+        return None
+    return [values] if isinstance(values, (str, int)) else list(values)
+
+
+class CooccurrenceIndex:
+    """Read side of the index: memory-mapped arrays, top-k associated terms with year/theme filters."""
+
+    def __init__(self, index_dir=COOCCURRENCE_INDEX):
+        with open(os.path.join(index_dir, 'meta.json'), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        with open(os.path.join(index_dir, 'vocab.json'), encoding='utf-8') as f:
+            self.terms = json.load(f)
+        self.ids = {term: i for i, term in enumerate(self.terms)}
+        self.years = self.meta['years']
+        self.themes = self.meta['themes']
+        self.windows = {}
+        for window in self.meta['windows']:
+            self.windows[window] = {
+                # Still file-backed, but slicing a plain ndarray view is much cheaper than slicing a memmap
+                name: np.load(os.path.join(index_dir, f'{window}_{name}.npy'), mmap_mode='r').view(np.ndarray)
+                for name in WINDOW_ARRAYS
+            }
+
+    def _slice_mask(self, years=None, themes=None):
+        """Boolean mask of the (year, theme) slices selected, or None for all of them."""
+        years, themes = _selection(years), _selection(themes)
+        if years is None and themes is None:
+            return None
+        year_mask = np.ones(len(self.years), dtype=bool) if years is None else \
+            np.isin(self.years, [int(year) for year in years])
+        theme_mask = np.ones(len(self.themes) + 1, dtype=bool) if themes is None else \
+            np.isin(['', *self.themes], themes)
+        return (year_mask[:, None] & theme_mask[None, :]).ravel()
+
+    def _cooccurrences(self, arrays, xs, slice_mask):
+        """(counts with every term, units containing all the lemmas `xs`, units per term, units) in the slices."""
+        if slice_mask is None:
+            x, = xs
+            start, stop = arrays['pairs_indptr'][x], arrays['pairs_indptr'][x + 1]
+            counts = np.zeros(len(self.terms), dtype=np.int64)
+            counts[arrays['pairs_terms'][start:stop]] = arrays['pairs_counts'][start:stop]
+            df = arrays['slice_df'].sum(axis=0)
+            return counts, int(df[x]), df, int(arrays['slice_units'].sum())
+
+        postings = [arrays['postings_units'][arrays['postings_indptr'][x]:arrays['postings_indptr'][x + 1]]
+                    for x in xs]
+        units = functools.reduce(lambda a, b: np.intersect1d(a, b, assume_unique=True), postings)
+        units = units[slice_mask[arrays['unit_slice'][units]]]
+        # Terms of the selected units: one gather over the concatenated CSR rows
+        starts, stops = arrays['units_indptr'][units], arrays['units_indptr'][units + 1]
+        lengths = stops - starts
+        offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        terms = arrays['units_terms'][offsets + np.arange(len(offsets))]
+        counts = np.bincount(terms, minlength=len(self.terms))
+        counts[list(xs)] = 0
+        df = arrays['slice_df'][slice_mask].sum(axis=0)
+        return counts, len(units), df, int(arrays['slice_units'][slice_mask].sum())
+
+    def associated(self, term, k=10, window='paragraph', measure='llr', years=None, themes=None,
+                   min_count=MIN_COUNT):
+        """Top `k` terms associated with `term` as dicts (term, count, df, pmi, npmi, llr), best first.
+
+        A multi-word `term` ('royaume uni') stands for the units containing
+        all its lemmas, which are left out of the results.
+        `years` / `themes`: a value, a list of values, or None / 'ALL' for all;
+        only terms seen at least `min_count` times with `term` are ranked.
+        """
+        if measure not in MEASURES:
+            raise ValueError(f"measure must be one of {MEASURES}, not {measure!r}")
+        xs = [self.ids.get(lemma) for lemma in term.split()]
+        if not xs or None in xs:
+            return []
+        xs = sorted(set(xs))
+        arrays = self.windows[window]
+        slice_mask = self._slice_mask(years, themes)
+        if slice_mask is None and (min_count < self.meta['min_pair_count'] or len(xs) > 1):
+            # Rarer pairs than the pair matrix keeps, or several lemmas: count them from the posting lists
+            slice_mask = np.ones(len(arrays['slice_units']), dtype=bool)
+        counts, df_x, df, n_units = self._cooccurrences(arrays, xs, slice_mask)
+
+        candidates = np.flatnonzero(counts >= max(min_count, 1))
+        if not len(candidates) or not df_x:
+            return []
+        scores = associations(counts[candidates], df_x, df[candidates], n_units)
+        order = np.argsort(-scores[measure], kind='stable')[:k]
+        return [
+            {'term': self.terms[candidates[i]], 'count': int(counts[candidates[i]]), 'df': int(df[candidates[i]]),
+             'pmi': float(scores['pmi'][i]), 'npmi': float(scores['npmi'][i]), 'llr': float(scores['llr'][i])}
+            for i in order
+        ]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build or query the keyword co-occurrence index.")
+    parser.add_argument('--store', default=TOKEN_STORE)
+    parser.add_argument('--index-dir', default=COOCCURRENCE_INDEX)
+    parser.add_argument('--term', help="query instead of building")
+    parser.add_argument('--window', choices=WINDOWS, default='paragraph')
+    parser.add_argument('--measure', choices=MEASURES, default='llr')
+    parser.add_argument('--year')
+    parser.add_argument('--theme')
+    parser.add_argument('--min-count', type=int, default=MIN_COUNT)
+    parser.add_argument('-k', type=int, default=10)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.term is None:
+        meta = build_index(args.store, args.index_dir)
+        for window, info in meta['windows'].items():
+            print(f"{window}: {info['units']} units, {info['pairs']} term pairs (>= {MIN_PAIR_COUNT} units)")
+        print(f"{meta['terms']} terms, {len(meta['years'])} years, {len(meta['themes'])} themes -> {args.index_dir} "
+              f"({time.perf_counter() - started:.2f}s)")
+    else:
+        index = CooccurrenceIndex(args.index_dir)
+        loaded = time.perf_counter()
+        hits = index.associated(args.term, args.k, args.window, args.measure, args.year, args.theme, args.min_count)
+        print(f"{args.term} ({args.window}, {args.measure}): {(time.perf_counter() - loaded) * 1000:.1f} ms")
+        for hit in hits:
+            print(f"  {hit['term']:<30} {hit['count']:7d}  pmi {hit['pmi']:6.2f}  npmi {hit['npmi']:5.2f}  "
+                  f"llr {hit['llr']:9.1f}")
@@ -0,0 +1,260 @@
+"""Incremental reader for the scraped corpus dumps (donne.json, data/*.json).
+
+A dump looks like:
+    {"metadata": {"all": {...}, "year": {...}, "month": {...}, "day": {...}},
+     "data": {year: {month: {day: [article, article, ...]}}}}
+
+Instead of json.load-ing the whole tree, JsonStream walks the file chunk by
+chunk and only materialises the values the caller asks for (one article, or
+one metadata block). Everything it does not need is skipped with a bracket
+scanner that never builds Python objects, so peak memory stays flat whatever
+the size of the dump.
+"""
+import json
+import os
+import re
+
+CORPUS_PATH = os.environ.get('CORPUS_PATH', 'donne.json')
+CHUNK_SIZE = 1 << 16
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_STRUCTURAL = re.compile(r'["\[\]{}]')
+# Rest of a JSON string after its opening quote (unrolled loop, handles \" escapes)
+_STRING_TAIL = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+
+
+class JsonStream:
+    """Pull parser over a text file holding a single JSON document."""
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self):
+        """Append more text to the buffer, dropping what was already consumed.
+
+        The read grows with the pending text so that a value larger than a
+        chunk is re-decoded a logarithmic number of times, not once per chunk.
+        """
+        if self._eof:
+            return False
+        pending = len(self._buf) - self._pos
+        chunk = self._f.read(max(self._chunk_size, pending))
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self):
+        """Return the next non-whitespace character ('' at end of file)."""
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} but found {found!r}")
+        self._pos += 1
+
+    def _decode(self):
+        """Decode the value at the current position, return (value, raw_text)."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number sitting at the end of the buffer may continue in the next chunk
+            if end == len(self._buf) and self._buf[self._pos] not in '"[{' and self._fill():
+                continue
+            raw = self._buf[self._pos:end]
+            self._pos = end
+            return value, raw
+
+    def read_value(self):
+        """Decode and return the value at the current position."""
+        return self._decode()[0]
+
+    def skip_value(self, out=None):
+        """Move past the value at the current position without decoding it.
+
+        If `out` is given, the raw text of the value is copied to it.
+        """
+        if self.peek() not in '[{':
+            raw = self._decode()[1]
+            if out is not None:
+                out.write(raw)
+            return
+
+        depth = 0
+        start = self._pos
+        while True:
+            match = _STRUCTURAL.search(self._buf, self._pos)
+            if match is None:
+                self._pos = len(self._buf)
+                self._flush(out, start)
+                if not self._fill():
+                    raise ValueError("Unexpected end of file inside a JSON value")
+                start = self._pos
+                continue
+
+            char = match.group()
+            if char == '"':
+                tail = _STRING_TAIL.match(self._buf, match.end())
+                if tail is None:
+                    # String cut by the end of the buffer: read on and rescan it
+                    self._pos = match.start()
+                    self._flush(out, start)
+                    if not self._fill():
+                        raise ValueError("Unexpected end of file inside a JSON string")
+                    start = self._pos
+                    continue
+                self._pos = tail.end()
+                continue
+
+            self._pos = match.end()
+            depth += 1 if char in '[{' else -1
+            if depth == 0:
+                self._flush(out, start)
+                return
+
+    def _flush(self, out, start):
+        if out is not None:
+            out.write(self._buf[start:self._pos])
+
+    def iter_object(self):
+        """Yield the keys of the object at the current position.
+
+        After each key the stream sits on its value, which the caller must
+        consume (read_value, skip_value or a nested iteration) before asking
+        for the next key.
+        """
+        self.expect('{')
+        if self.peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            key = self.read_value()
+            self.expect(':')
+            yield key
+            char = self.peek()
+            self._pos += 1
+            if char == '}':
+                return
+            if char != ',':
+                raise ValueError(f"Expected ',' or '}}' but found {char!r}")
+
+    def iter_array(self):
+        """Decode and yield the elements of the array at the current position."""
+        self.expect('[')
+        if self.peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self.read_value()
+            char = self.peek()
+            self._pos += 1
+            if char == ']':
+                return
+            if char != ',':
+                raise ValueError(f"Expected ',' or ']' but found {char!r}")
+
+    def iter_children(self):
+        """Like iter_object, but silently skips the value if it is not an object."""
+        if self.peek() != '{':
+            self.skip_value()
+            return iter(())
+        return self.iter_object()
+
+    def descend(self, *keys):
+        """Walk down nested objects following `keys`; return False if one is missing."""
+        for key in keys:
+            if self.peek() != '{':
+                return False
+            for found in self.iter_object():
+                if found == key:
+                    break
+                self.skip_value()
+            else:
+                return False
+        return True
+
+
+def open_corpus(path=CORPUS_PATH):
+    return open(path, 'r', encoding='utf-8')
+
+
+def iter_articles(path=CORPUS_PATH, years=None, days=None):
+    """Yield (year, month, day, article) for every article of the dump, one at a time.
+
+    `years` optionally restricts the walk to a set of year keys (as strings),
+    `days` to a set of (year, month, day) keys; the other years, months and
+    days are skipped without being decoded. `path` may also be a partitioned
+    store built by corpus_store.py.
+    """
+    if os.path.isdir(path):
+        import corpus_store
+        yield from corpus_store.iter_articles(path, years=years, days=days)
+        return
+    months = None
+    if days is not None:
+        months = {(year, month) for year, month, _ in days}
+        day_years = {year for year, _ in months}
+        years = day_years if years is None else set(years) & day_years
+    with open_corpus(path) as f:
+        stream = JsonStream(f)
+        if not stream.descend('data'):
+            return
+        for year in stream.iter_children():
+            if years is not None and year not in years:
+                stream.skip_value()
+                continue
+            for month in stream.iter_children():
+                if months is not None and (year, month) not in months:
+                    stream.skip_value()
+                    continue
+                for day in stream.iter_children():
+                    if stream.peek() != '[' or days is not None and (year, month, day) not in days:
+                        stream.skip_value()
+                        continue
+                    for article in stream.iter_array():
+                        yield year, month, day, article
+
+
+def read_metadata(path=CORPUS_PATH, *keys, default=None):
+    """Return the `metadata` block, or the sub-block at metadata[key1][key2]...
+
+    Only the requested block is decoded, e.g. read_metadata(path, 'all', 'loc')
+    never touches the per-day counters nor the articles.
+    """
+    if os.path.isdir(path):
+        import corpus_store
+        return corpus_store.read_metadata(path, *keys, default=default)
+    with open_corpus(path) as f:
+        stream = JsonStream(f)
+        if not stream.descend('metadata', *keys):
+            return default
+        return stream.read_value()
+
+
+def top_level_keys(path=CORPUS_PATH):
+    """Return the keys of the root object without decoding their values."""
+    with open_corpus(path) as f:
+        stream = JsonStream(f)
+        keys = []
+        for key in stream.iter_children():
+            keys.append(key)
+            stream.skip_value()
+        return keys
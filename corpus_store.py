@@ -0,0 +1,225 @@
+"""Columnar, year/month-partitioned copy of the corpus (Parquet via pyarrow).
+
+Layout:
+    corpus_store/_metadata.json                 the dump's `metadata` block
+    corpus_store/year=2025/month=10/part-00000.parquet
+    ...
+
+Build it once from the raw dump:
+    python corpus_store.py donne.json corpus_store
+
+then read only what you need:
+    read_store(columns=['title', 'loc'], years=['2025'])
+
+corpus.iter_articles / corpus.read_metadata accept the store directory in
+place of the JSON path, so every script can switch with CORPUS_PATH=corpus_store.
+The articles then come partition by partition in lexicographic order of the
+directory names, not in the chronological order of the dump.
+"""
+import datetime
+import json
+import os
+import shutil
+import sys
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from annotations import ANNOTATION_FIELDS, decode_field
+from corpus import CORPUS_PATH, iter_articles as iter_json_articles, read_metadata as read_json_metadata
+
+STORE_DIR = os.environ.get('CORPUS_STORE', 'corpus_store')
+METADATA_FILE = '_metadata.json'
+ROWS_PER_FILE = 50_000
+
+NESTED_TEXT = pa.list_(pa.list_(pa.list_(pa.string())))
+COUNTS = pa.map_(pa.string(), pa.int32())
+
+SCHEMA = pa.schema([
+    ('day', pa.int16()),
+    ('num_article', pa.int32()),
+    ('timestamp', pa.timestamp('s', tz='UTC')),
+    ('date', pa.date32()),
+    ('url', pa.string()),
+    ('title', pa.string()),
+    ('description', pa.string()),
+    ('content', pa.string()),
+    ('content-segmented', NESTED_TEXT),
+    ('kws-l', NESTED_TEXT),
+    ('loc-l', NESTED_TEXT),
+    ('org-l', NESTED_TEXT),
+    ('per-l', NESTED_TEXT),
+    ('kws', COUNTS),
+    ('loc', COUNTS),
+    ('org', COUNTS),
+    ('per', COUNTS),
+])
+PARTITIONING = ds.partitioning(pa.schema([('year', pa.string()), ('month', pa.string())]), flavor='hive')
+
+COUNT_FIELDS = ['kws', 'loc', 'org', 'per']
+
+
+def article_to_row(day, num_article, article):
+    """Flatten one raw article into a row matching SCHEMA."""
+    row = {
+        'day': int(day),
+        'num_article': num_article,
+        'timestamp': article.get('timestamp'),
+        'date': datetime.date.fromisoformat(article['date']) if article.get('date') else None,
+        'url': article.get('url'),
+        'title': article.get('title'),
+        'description': article.get('description'),
+        'content': article.get('content'),
+    }
+    for field in ANNOTATION_FIELDS:
+        # Some scrapes store the annotations as Python-repr strings
+        value = decode_field(article.get(field))
+        if field in COUNT_FIELDS and value is not None:
+            value = list(value.items())
+        row[field] = value
+    return row
+
+
+def row_to_article(row):
+    """Inverse of article_to_row: rebuild the raw article dict from a store row.
+
+    A column has no "absent" marker, so null columns are left out (the dumps
+    hold no null values), as is num_article, which only the store has.
+    Annotation fields come back decoded even when the dump held them as
+    Python-repr strings.
+    """
+    article = {}
+    for key, value in row.items():
+        if value is None or key == 'num_article':
+            continue
+        if key in COUNT_FIELDS:
+            value = dict(value)
+        elif key == 'timestamp':
+            value = int(value.timestamp())
+        elif key == 'date':
+            value = value.isoformat()
+        article[key] = value
+    return article
+
+
+def partition_dir(store_dir, year, month):
+    return os.path.join(store_dir, f'year={year}', f'month={month}')
+
+
+def write_partition(store_dir, year, month, rows):
+    """Write `rows` as a new part file of the (year, month) partition; return its path."""
+    directory = partition_dir(store_dir, year, month)
+    os.makedirs(directory, exist_ok=True)
+    index = sum(1 for name in os.listdir(directory) if name.endswith('.parquet'))
+    path = os.path.join(directory, f'part-{index:05d}.parquet')
+    pq.write_table(pa.Table.from_pylist(rows, schema=SCHEMA), path)
+    return path
+
+
+def build_store(json_path=CORPUS_PATH, store_dir=STORE_DIR):
+    """Convert the raw dump into a partitioned store (replaces any previous store)."""
+    tmp_dir = store_dir.rstrip('/') + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    # The dump is grouped by year/month, so one partition buffer at a time is enough
+    current, rows = None, []
+    last_day, num_article = None, 0
+    count = 0
+    for year, month, day, article in iter_json_articles(json_path):
+        if (year, month) != current:
+            if rows:
+                write_partition(tmp_dir, *current, rows)
+            current, rows = (year, month), []
+        if day != last_day:
+            last_day, num_article = day, 0
+        num_article += 1
+        rows.append(article_to_row(day, num_article, article))
+        count += 1
+        if len(rows) >= ROWS_PER_FILE:
+            write_partition(tmp_dir, *current, rows)
+            rows = []
+    if rows:
+        write_partition(tmp_dir, *current, rows)
+
+    with open(os.path.join(tmp_dir, METADATA_FILE), 'w', encoding='utf-8') as f:
+        json.dump(read_json_metadata(json_path, default={}), f, ensure_ascii=False)
+
+    shutil.rmtree(store_dir, ignore_errors=True)
+    os.rename(tmp_dir, store_dir)
+    return count
+
+
+def open_dataset(store_dir=STORE_DIR):
+    return ds.dataset(store_dir, format='parquet', partitioning=PARTITIONING)
+
+
+def _filter(years=None, months=None):
+    expression = None
+    for name, values in (('year', years), ('month', months)):
+        if values is None:
+            continue
+        clause = ds.field(name).isin([str(v) for v in values])
+        expression = clause if expression is None else expression & clause
+    return expression
+
+
+def scan_store(store_dir=STORE_DIR, columns=None, years=None, months=None):
+    """Return a pyarrow Table restricted to `columns` and to the selected partitions.
+
+    Partitions outside `years` / `months` are pruned from the directory listing,
+    their files are never opened.
+    """
+    return open_dataset(store_dir).to_table(columns=columns, filter=_filter(years, months))
+
+
+def read_store(store_dir=STORE_DIR, columns=None, years=None, months=None):
+    """Same as scan_store, as a pandas DataFrame."""
+    return scan_store(store_dir, columns, years, months).to_pandas()
+
+
+def _day_filter(days):
+    """Expression selecting the (year, month, day) keys of `days`: their partitions, then their day rows."""
+    expression = None
+    for year, month, day in days:
+        clause = (ds.field('year') == str(year)) & (ds.field('month') == str(month)) & (ds.field('day') == int(day))
+        expression = clause if expression is None else expression | clause
+    return expression if expression is not None else ds.field('day') < 0
+
+
+def iter_articles(store_dir=STORE_DIR, years=None, columns=None, days=None):
+    """Yield (year, month, day, article) like corpus.iter_articles, batch by batch.
+
+    `days` ((year, month, day) keys) only opens the files of their partitions.
+    Partitions come in the lexicographic order of their directory names
+    (month=10 before month=9), not in chronological order; within a
+    partition, rows keep the dump order.
+    """
+    if columns is not None:
+        columns = list(dict.fromkeys(['year', 'month', 'day'] + list(columns)))
+    expression = _filter(years)
+    if days is not None:
+        expression = _day_filter(days) if expression is None else expression & _day_filter(days)
+    for batch in open_dataset(store_dir).to_batches(columns=columns, filter=expression):
+        for row in batch.to_pylist():
+            year, month, day = row.pop('year'), row.pop('month'), row.pop('day')
+            yield year, month, str(day), row_to_article(row)
+
+
+def read_metadata(store_dir=STORE_DIR, *keys, default=None):
+    """Same as corpus.read_metadata, for a store directory."""
+    with open(os.path.join(store_dir, METADATA_FILE), encoding='utf-8') as f:
+        block = json.load(f)
+    for key in keys:
+        if not isinstance(block, dict) or key not in block:
+            return default
+        block = block[key]
+    return block
+
+
+if __name__ == '__main__':
+    source = sys.argv[1] if len(sys.argv) > 1 else CORPUS_PATH
+    target = sys.argv[2] if len(sys.argv) > 2 else STORE_DIR
+    print(f"Converting {source} to {target}...")
+    print(f"Wrote {build_store(source, target)} articles.")
@@ -0,0 +1,393 @@
+"""Theme discovery: TF-IDF + mini-batch k-means + truncated SVD over the article lemmas.
+
+Produces the two tables the dashboards read:
+
+    dashboard_data_final.csv   year, month, day, num_article, words, text_for_tfidf,
+                               Cluster_ID, Theme, CP1, CP2, CP3 (one row per article)
+    df_top_words_clean.csv     Theme_ID, Theme, Mot_Cle, Importance_Poids_TFIDF, Rang
+
+The noise cluster (NOISE_THEME: podcast players, site boilerplate) is left
+out of both tables, so no dashboard view shows it; its article keys are kept
+in the saved model so that theme_model.py does not ingest them again.
+
+from words_per_article.csv (the lemma list of each article):
+
+    python data_mining.py [words_per_article.csv] [--clusters 9] [--chunk-size 10000] [--refit]
+                          [--allow-new-themes]
+
+words_per_article.csv is read in chunks, three times: document frequencies
+(unigrams and bigrams of consecutive lemmas), then one sparse float32 TF-IDF
+block per chunk, then the output rows. The TF-IDF matrix is never densified:
+a randomized TruncatedSVD reduces it to LSA_COMPONENTS dimensions (the first
+three are CP1..CP3), MiniBatchKMeans clusters the L2-normalised reduced
+vectors, and the per-theme term weights are one sparse product. (k-means run
+directly on the sparse TF-IDF rows collapses into one giant cluster for some
+seeds; several restarts are run and the lowest final inertia is kept.)
+
+Cluster numbers are arbitrary, so a rerun builds on the previous labelling
+(the Cluster_ID/Theme columns of dashboard_data_final.csv and the noise keys
+of the saved model): the articles it labelled keep their cluster and only
+the others are clustered, around the centroids of the labelled ones
+(constrained k-means). A rerun on unchanged input reproduces the labelling.
+--refit lets every article move: k-means starts from those centroids and
+each cluster takes the name of the old theme most of its articles belonged
+to. A cluster left over is named after the curated theme (THEMES) whose
+anchor terms weigh enough in it (MIN_THEME_SCORE, MIN_THEME_SHARE), else
+after its own top terms. The tables are only written when the names are
+exactly the curated themes (the dashboards and THEME_IMAGE_MAP rely on
+them): otherwise the script exits with status 1, and --allow-new-themes
+writes them anyway. Every step prints its duration.
+
+The fit is saved to theme_model/ (see theme_model.py), which assigns the
+articles that arrive later without a refit.
+"""
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.preprocessing import normalize
+
+from annotations import decode_field
+
+WORDS_FILE = 'words_per_article.csv'
+DASHBOARD_DATA = 'dashboard_data_final.csv'
+TOP_WORDS_FILE = 'df_top_words_clean.csv'
+KEY_COLUMNS = ['year', 'month', 'day', 'num_article']
+CHUNK_SIZE = 10000
+N_CLUSTERS = 9
+MIN_DF = 2          # documents
+MAX_DF = 0.5        # share of the documents
+LSA_COMPONENTS = 100
+RESTARTS = 5
+MAX_ITER = 100      # constrained k-means iterations
+TOP_TERMS = 3
+RANDOM_STATE = 42
+MIN_THEME_SCORE = 0.05   # summed mean TF-IDF weight of the anchor terms in the cluster
+MIN_THEME_SHARE = 0.5    # of the theme's best score over all clusters
+
+NOISE_THEME = 'Bruit Média/Podcast'
+
+# Curated theme names and the terms that identify them
+THEMES = {
+    'Diplomatie Bloc Occidental': ['royaume uni', 'royaume', 'uni', 'allemagne', 'culture', 'patrimoine', 'australie'],
+    'Politique Française Générale': ['pari', 'président', 'militant', 'association', 'génocide', 'participant'],
+    'Conflit Militaire (Ukraine)': ['ukraine', 'russie', 'conflit', 'zelensky', 'européen', 'déclarer sputnik'],
+    'Affaires Militaires et Défense': ['militaire', 'principal événement', 'événement monde', 'soldat', 'armée'],
+    'Grandes Relations Diplomatiques': ['washington', 'chef diplomatie', 'diplomatie', 'agent', 'informer'],
+    'Actualité Virale et ONU': ['viral', 'new york', 'onu', 'vidéo', 'erdogan', 'emmanuel'],
+    'Souveraineté Africaine et IA': ['niger', 'burkina', 'franc cfa', 'ia', 'générer ia', 'afrique'],
+    'Manifestations et Mouvements Sociaux': ['correspondant sputnik', 'manifestation', 'grève', 'mobilisation'],
+    # Podcast players and site boilerplate, left out of the tables
+    NOISE_THEME: ['podcast', 'lecteur intégré', 'intégré', 'écouter', 'plateforme', 'émission'],
+}
+
+
+class StepTimer:
+    """Named wall-clock durations, printed as each step ends and summed up at the end."""
+
+    def __init__(self):
+        self.steps = []
+
+    @contextmanager
+    def step(self, name):
+        started = time.perf_counter()
+        yield
+        self.steps.append((name, time.perf_counter() - started))
+        print(f"  {name:<12} {self.steps[-1][1]:8.2f}s")
+
+    def report(self):
+        total = sum(seconds for _, seconds in self.steps)
+        for name, seconds in self.steps:
+            print(f"  {name:<12} {seconds:8.2f}s  {seconds / total:6.1%}")
+        print(f"  {'total':<12} {total:8.2f}s")
+
+
+def iter_chunks(path, chunk_size=CHUNK_SIZE):
+    """words_per_article.csv in DataFrame chunks, with a `text_for_tfidf` column (lemmas joined by spaces)."""
+    for chunk in pd.read_csv(path, chunksize=chunk_size):
+        chunk['text_for_tfidf'] = [' '.join(decode_field(words)) for words in chunk['words']]
+        yield chunk
+
+
+def article_keys(path, chunk_size=CHUNK_SIZE):
+    """DataFrame of the KEY_COLUMNS of the articles of `path`, in file order."""
+    return pd.concat([chunk for chunk in pd.read_csv(path, usecols=KEY_COLUMNS, chunksize=chunk_size)]
+                     or [pd.DataFrame(columns=KEY_COLUMNS)], ignore_index=True)
+
+
+def _vectorizer(vocabulary=None):
+    # Lemmas are already normalised: tokens are whitespace-separated, bigrams of consecutive lemmas
+    return CountVectorizer(token_pattern=r'\S+', lowercase=False, ngram_range=(1, 2), vocabulary=vocabulary,
+                           dtype=np.int32)
+
+
+def document_frequencies(path, chunk_size=CHUNK_SIZE):
+    """(number of documents, Counter term -> number of documents containing it)."""
+    df, n_docs = Counter(), 0
+    for chunk in iter_chunks(path, chunk_size):
+        vectorizer = _vectorizer()
+        counts = vectorizer.fit_transform(chunk['text_for_tfidf'])
+        chunk_df = np.bincount(counts.indices, minlength=counts.shape[1])
+        df.update(dict(zip(vectorizer.get_feature_names_out().tolist(), chunk_df.tolist())))
+        n_docs += len(chunk)
+    return n_docs, df
+
+
+def build_vocabulary(n_docs, df, min_df=MIN_DF, max_df=MAX_DF):
+    """Sorted terms kept (min_df <= df <= max_df * n_docs) and their smoothed idf (as sklearn)."""
+    terms = sorted(term for term, count in df.items() if min_df <= count <= max_df * n_docs)
+    counts = np.array([df[term] for term in terms], dtype=np.float64)
+    idf = np.log((1 + n_docs) / (1 + counts)) + 1
+    return terms, idf.astype(np.float32)
+
+
+def tfidf_rows(vectorizer, texts, weights):
+    """(L2-normalised TF-IDF CSR rows, share of each text's unigrams and bigrams outside the vocabulary)."""
+    counts = vectorizer.transform(texts)
+    n_lemmas = np.array([text.count(' ') + 1 if text else 0 for text in texts])
+    n_grams = np.maximum(2 * n_lemmas - 1, 0)
+    known = np.asarray(counts.sum(axis=1)).ravel()
+    oov = np.where(n_grams > 0, 1 - known / np.maximum(n_grams, 1), 0).astype(np.float32)
+    return normalize(counts.astype(np.float32) @ weights).astype(np.float32).tocsr(), oov
+
+
+def tfidf_matrix(path, terms, idf, chunk_size=CHUNK_SIZE):
+    """(L2-normalised TF-IDF CSR matrix, float32, one row per article; out-of-vocabulary share of each article)."""
+    vectorizer = _vectorizer({term: i for i, term in enumerate(terms)})
+    weights = sp.diags(idf)
+    blocks, oov = [], []
+    for chunk in iter_chunks(path, chunk_size):
+        block, block_oov = tfidf_rows(vectorizer, chunk['text_for_tfidf'], weights)
+        blocks.append(block)
+        oov.append(block_oov)
+    if not blocks:
+        return sp.csr_matrix((0, len(terms)), dtype=np.float32), np.zeros(0, dtype=np.float32)
+    return sp.vstack(blocks, format='csr'), np.concatenate(oov)
+
+
+def reduce(X, n_components=LSA_COMPONENTS, random_state=RANDOM_STATE):
+    """(fitted TruncatedSVD, (n, k) LSA coordinates by decreasing singular value).
+
+    The coordinates are the projection X @ components_.T, exactly what
+    theme_model.ThemeModel computes for a new article.
+    """
+    n_components = max(1, min(n_components, X.shape[1] - 1))
+    svd = TruncatedSVD(n_components=n_components, random_state=random_state).fit(X)
+    return svd, np.asarray(X @ svd.components_.astype(np.float32).T, dtype=np.float32)
+
+
+def seed_centroids(Z, old, n_clusters):
+    """(n_clusters, k) mean normalised rows of `Z` per old cluster id (-1: unlabelled), or None.
+
+    One cluster without labelled article (e.g. the noise articles left out of
+    the dashboard table) is seeded with the unlabelled articles; otherwise
+    the old labelling does not fit `n_clusters` and None is returned.
+    """
+    old_ids = set(np.unique(old[old >= 0]).tolist())
+    missing = [c for c in range(n_clusters) if c not in old_ids]
+    spare = old < 0
+    if not old_ids <= set(range(n_clusters)) or len(missing) > int(spare.any()):
+        return None
+    L = normalize(Z)
+    return np.asarray([L[spare if c in missing else old == c].mean(axis=0) for c in range(n_clusters)])
+
+
+def cluster(Z, n_clusters=N_CLUSTERS, restarts=RESTARTS, random_state=RANDOM_STATE, seeds=None):
+    """(cluster id of every row of the LSA coordinates `Z`, centroids in the normalised space).
+
+    Best of `restarts` MiniBatchKMeans runs on the L2-normalised rows, or a
+    single run started from `seeds` (see seed_centroids).
+    """
+    Z = normalize(Z)
+    if seeds is not None:
+        model = MiniBatchKMeans(n_clusters=n_clusters, init=seeds, random_state=random_state, batch_size=2048,
+                                n_init=1).fit(Z)
+        return model.labels_, model.cluster_centers_.astype(np.float32)
+    models = [MiniBatchKMeans(n_clusters=n_clusters, random_state=random_state + i, batch_size=2048, n_init=1).fit(Z)
+              for i in range(restarts)]
+    best = min(models, key=lambda model: model.inertia_)
+    return best.labels_, best.cluster_centers_.astype(np.float32)
+
+
+def cluster_around(Z, old, n_clusters=N_CLUSTERS, max_iter=MAX_ITER):
+    """(cluster ids, centroids) keeping the old cluster of every labelled row (`old` >= 0), or None.
+
+    k-means where only the unlabelled rows move: each goes to the nearest
+    centroid, centroids are the means of all their rows. Started from
+    seed_centroids, None when the old labelling does not fit `n_clusters`.
+    """
+    centroids = seed_centroids(Z, old, n_clusters)
+    if centroids is None:
+        return None
+    L = normalize(Z)
+    free = old < 0
+    labels = old.copy()
+    for _ in range(max_iter):
+        # Nearest centroid: argmin |l - c|^2 = argmax 2 l.c - |c|^2
+        nearest = (2 * L[free] @ centroids.T - (centroids ** 2).sum(axis=1)).argmax(axis=1)
+        if (labels[free] == nearest).all():
+            break
+        labels[free] = nearest
+        for c in range(n_clusters):
+            members = labels == c
+            if members.any():
+                centroids[c] = L[members].mean(axis=0)
+    return labels, centroids.astype(np.float32)
+
+
+def cluster_term_weights(X, labels, n_clusters):
+    """(n_clusters, n_terms) mean TF-IDF weight of each term in each cluster."""
+    membership = sp.csr_matrix((np.ones(len(labels), dtype=np.float32), (labels, np.arange(len(labels)))),
+                               shape=(n_clusters, len(labels)))
+    sizes = np.maximum(np.asarray(membership.sum(axis=1)).ravel(), 1)
+    return np.asarray((membership @ X).todense()) / sizes[:, None]
+
+
+def name_clusters(weights, terms, themes=THEMES, top_terms=TOP_TERMS, named=None,
+                  min_score=MIN_THEME_SCORE, min_share=MIN_THEME_SHARE):
+    """{cluster id: theme name}: greedy best (cluster, theme) pairs on the anchor-term weights.
+
+    A pair counts only if its score is at least `min_score` and `min_share`
+    of the theme's best score, so a theme whose anchors barely appear in a
+    cluster does not name it. `named` ({cluster id: name}, e.g. inherited
+    from the previous labelling) is kept as is.
+    """
+    index = {term: i for i, term in enumerate(terms)}
+    names = list(themes)
+    scores = np.zeros((len(weights), len(names)))
+    for j, name in enumerate(names):
+        columns = [index[term] for term in themes[name] if term in index]
+        if columns:
+            scores[:, j] = weights[:, columns].sum(axis=1)
+
+    scores[(scores < min_score) | (scores < min_share * scores.max(axis=0, initial=0))] = 0
+    named = dict(named or {})
+    for flat in np.argsort(scores, axis=None)[::-1]:
+        c, j = np.unravel_index(flat, scores.shape)
+        if scores[c, j] <= 0:
+            break
+        if c not in named and names[j] not in named.values():
+            named[c] = names[j]
+    for c in range(len(weights)):
+        if c not in named:
+            top = np.argsort(weights[c])[::-1][:top_terms]
+            named[c] = f"Thème {c} : " + ', '.join(terms[i] for i in top)
+    return {int(c): name for c, name in named.items()}
+
+
+def check_names(names, themes=THEMES):
+    """Problems with the cluster names: curated themes no cluster took, clusters not named after one."""
+    problems = [f"no cluster for the theme {theme!r}" for theme in themes if theme not in names.values()]
+    problems += [f"cluster {c} is not a curated theme: {name!r}" for c, name in sorted(names.items())
+                 if name not in themes]
+    return problems
+
+
+def top_words(weights, terms, names, top_terms=TOP_TERMS):
+    """df_top_words_clean.csv rows: the `top_terms` heaviest terms of each cluster but the noise one."""
+    rows = []
+    for c, name in sorted(names.items()):
+        if name == NOISE_THEME:
+            continue
+        for rank, i in enumerate(np.argsort(weights[c])[::-1][:top_terms], start=1):
+            rows.append({'Theme_ID': c, 'Theme': name, 'Mot_Cle': terms[i],
+                         'Importance_Poids_TFIDF': float(weights[c, i]), 'Rang': rank})
+    return pd.DataFrame(rows, columns=['Theme_ID', 'Theme', 'Mot_Cle', 'Importance_Poids_TFIDF', 'Rang'])
+
+
+def write_dashboard_data(path, labels, names, coordinates, out_path=DASHBOARD_DATA, chunk_size=CHUNK_SIZE):
+    """Stream the articles again and write them with their cluster, theme and coordinates (noise left out)."""
+    tmp = out_path + '.tmp'
+    start = 0
+    for chunk in iter_chunks(path, chunk_size):
+        stop = start + len(chunk)
+        chunk['Cluster_ID'] = labels[start:stop]
+        chunk['Theme'] = [names[c] for c in labels[start:stop]]
+        for axis in range(3):
+            chunk[f'CP{axis + 1}'] = coordinates[start:stop, axis]
+        chunk = chunk[chunk['Theme'] != NOISE_THEME]
+        chunk[KEY_COLUMNS + ['words', 'text_for_tfidf', 'Cluster_ID', 'Theme', 'CP1', 'CP2', 'CP3']].to_csv(
+            tmp, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+        start = stop
+    os.replace(tmp, out_path)
+
+
+def run(path=WORDS_FILE, n_clusters=N_CLUSTERS, chunk_size=CHUNK_SIZE, model_dir=None, allow_new_themes=False,
+        refit=False):
+    """Fit, name and write the tables and the model; returns False (nothing written) if check_names fails."""
+    from theme_model import MODEL_DIR, ThemeModel, inherit_names, previous_labelling
+
+    model_dir = model_dir or MODEL_DIR
+    timer = StepTimer()
+    with timer.step('frequencies'):
+        n_docs, df = document_frequencies(path, chunk_size)
+    with timer.step('vocabulary'):
+        terms, idf = build_vocabulary(n_docs, df)
+        del df
+    print(f"{n_docs} articles, {len(terms)} terms (unigrams and bigrams, df >= {MIN_DF}, <= {MAX_DF:.0%})")
+    with timer.step('tfidf'):
+        X, oov = tfidf_matrix(path, terms, idf, chunk_size)
+    print(f"TF-IDF: {X.shape[0]} x {X.shape[1]}, {X.nnz} non-zeros ({X.nnz / max(X.shape[0], 1):.0f} per article)")
+    with timer.step('svd'):
+        svd, Z = reduce(X)
+        coordinates = Z[:, :3]
+    with timer.step('previous'):
+        previous = previous_labelling(path, model_dir, chunk_size=chunk_size)
+    with timer.step('clustering'):
+        fitted = cluster_around(Z, previous[0], n_clusters) if previous and not refit else None
+        if fitted is None:
+            seeds = seed_centroids(Z, previous[0], n_clusters) if previous else None
+            fitted = cluster(Z, n_clusters, seeds=seeds)
+        labels, centroids = fitted
+    with timer.step('top_terms'):
+        # Same names as before for the clusters that kept or took over an old theme
+        inherited = inherit_names(*previous, labels, n_clusters) if previous else {}
+        weights = cluster_term_weights(X, labels, n_clusters)
+        names = name_clusters(weights, terms, named=inherited)
+    for c, name in sorted(names.items()):
+        print(f"  cluster {c}: {int((labels == c).sum()):6d} articles  {name}")
+    problems = check_names(names)
+    if problems:
+        print('\n'.join(f"  {problem}" for problem in problems))
+        if not allow_new_themes:
+            print(f"Not written: {TOP_WORDS_FILE}, {DASHBOARD_DATA} and {model_dir}/ are left as they are, the "
+                  f"clusters are not the curated THEMES.\nTo write them anyway (new theme names, no wordcloud "
+                  f"for them): python data_mining.py --allow-new-themes", file=sys.stderr)
+            return False
+    with timer.step('top_words'):
+        top_words(weights, terms, names).to_csv(TOP_WORDS_FILE, index=False)
+    with timer.step('model'):
+        noise = np.isin(labels, [c for c, name in names.items() if name == NOISE_THEME])
+        excluded = article_keys(path, chunk_size)[noise].itertuples(index=False, name=None)
+        model = ThemeModel(terms, idf, svd.components_, centroids, names, excluded=excluded)
+        model.calibrate(Z, labels, oov)
+        model.save(model_dir)
+    with timer.step('write'):
+        write_dashboard_data(path, labels, names, coordinates, chunk_size=chunk_size)
+
+    print("Timings:")
+    timer.report()
+    return True
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build dashboard_data_final.csv and df_top_words_clean.csv.")
+    parser.add_argument('words', nargs='?', default=WORDS_FILE)
+    parser.add_argument('--clusters', type=int, default=N_CLUSTERS)
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--refit', action='store_true',
+                        help="let the articles of the previous labelling change cluster")
+    parser.add_argument('--allow-new-themes', action='store_true',
+                        help="write the tables even if the clusters are not exactly the curated themes")
+    args = parser.parse_args()
+    sys.exit(0 if run(args.words, args.clusters, args.chunk_size, allow_new_themes=args.allow_new_themes,
+                      refit=args.refit) else 1)
@@ -0,0 +1,183 @@
+"""On-disk inverted index: location / organisation / person / keyword -> articles.
+
+Built from the per-article `loc`, `org`, `per` and `kws` count dicts:
+
+    entity_index/docs.json      article table (id -> year, month, day, date, url, title...)
+    entity_index/lexicon.json   {kind: {term: [offset, nbytes, df, total_tf]}}
+    entity_index/postings.bin   posting lists, varint-encoded (doc id gap, tf) pairs
+
+Article ids follow the corpus order, so every posting list is sorted and
+stored as id gaps. Lookups read one slice of the memory-mapped postings file.
+
+    python entity_index.py [corpus] [index_dir]      build
+    EntityIndex().top('loc', 'Mali', n=5, by='recency')
+"""
+import json
+import mmap
+import os
+import sys
+
+from annotations import decode_field
+from corpus import CORPUS_PATH, iter_articles
+
+INDEX_DIR = os.environ.get('ENTITY_INDEX', 'entity_index')
+KINDS = ['loc', 'org', 'per', 'kws']
+DOC_FIELDS = ['year', 'month', 'day', 'num_article', 'date', 'timestamp', 'url', 'title']
+
+
+def encode_varint(value, out):
+    """Append `value` (>= 0) to the bytearray `out`, 7 bits per byte."""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varints(buf):
+    """Decode a whole buffer of varints into a list of ints."""
+    values = []
+    value = shift = 0
+    for byte in buf:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = shift = 0
+    return values
+
+
+def decode_postings(buf):
+    """Varint (gap, tf) pairs -> list of (doc_id, tf)."""
+    values = decode_varints(buf)
+    postings = []
+    doc_id = 0
+    for i in range(0, len(values), 2):
+        doc_id += values[i]
+        postings.append((doc_id, values[i + 1]))
+    return postings
+
+
+def build_index(corpus_path=CORPUS_PATH, index_dir=INDEX_DIR):
+    """Stream the corpus once and write the index files; return the number of articles."""
+    docs = {field: [] for field in DOC_FIELDS}
+    postings = {kind: {} for kind in KINDS}   # term -> [bytearray, last_id, df, total_tf]
+
+    last_day, num_article = None, 0
+    doc_id = -1
+    for year, month, day, article in iter_articles(corpus_path):
+        doc_id += 1
+        if (year, month, day) != last_day:
+            last_day, num_article = (year, month, day), 0
+        num_article += 1
+        row = {'year': year, 'month': month, 'day': day, 'num_article': article.get('num_article', num_article)}
+        for field in DOC_FIELDS:
+            docs[field].append(row.get(field, article.get(field)))
+
+        for kind in KINDS:
+            for term, tf in (decode_field(article.get(kind)) or {}).items():
+                entry = postings[kind].get(term)
+                if entry is None:
+                    entry = postings[kind][term] = [bytearray(), 0, 0, 0]
+                encode_varint(doc_id - entry[1], entry[0])
+                encode_varint(tf, entry[0])
+                entry[1] = doc_id
+                entry[2] += 1
+                entry[3] += tf
+
+    os.makedirs(index_dir, exist_ok=True)
+    lexicon = {kind: {} for kind in KINDS}
+    offset = 0
+    with open(os.path.join(index_dir, 'postings.bin'), 'wb') as f:
+        for kind in KINDS:
+            for term, (buf, _, df, total_tf) in postings[kind].items():
+                f.write(buf)
+                lexicon[kind][term] = [offset, len(buf), df, total_tf]
+                offset += len(buf)
+    with open(os.path.join(index_dir, 'lexicon.json'), 'w', encoding='utf-8') as f:
+        json.dump(lexicon, f, ensure_ascii=False)
+    with open(os.path.join(index_dir, 'docs.json'), 'w', encoding='utf-8') as f:
+        json.dump(docs, f, ensure_ascii=False)
+    return doc_id + 1
+
+
+class EntityIndex:
+    """Read side of the index. Terms are given as (kind, term), e.g. ('loc', 'Mali')."""
+
+    def __init__(self, index_dir=INDEX_DIR):
+        with open(os.path.join(index_dir, 'lexicon.json'), encoding='utf-8') as f:
+            self.lexicon = json.load(f)
+        with open(os.path.join(index_dir, 'docs.json'), encoding='utf-8') as f:
+            self.docs = json.load(f)
+        self._file = open(os.path.join(index_dir, 'postings.bin'), 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        self._postings = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+
+    def __len__(self):
+        return len(self.docs['url'])
+
+    def terms(self, kind):
+        return self.lexicon.get(kind, {})
+
+    def stats(self, kind, term):
+        """(document frequency, total term frequency) of a term, (0, 0) if unknown."""
+        entry = self.lexicon.get(kind, {}).get(term)
+        return (entry[2], entry[3]) if entry else (0, 0)
+
+    def lookup(self, kind, term):
+        """Sorted list of (doc_id, tf) for the articles mentioning `term`."""
+        entry = self.lexicon.get(kind, {}).get(term)
+        if entry is None:
+            return []
+        offset, nbytes = entry[0], entry[1]
+        return decode_postings(self._postings[offset:offset + nbytes])
+
+    def doc_ids(self, kind, term):
+        return [doc_id for doc_id, _ in self.lookup(kind, term)]
+
+    def and_(self, *terms):
+        """Ids of the articles mentioning all of `terms`, rarest list first."""
+        if not terms:
+            return []
+        ordered = sorted(terms, key=lambda t: self.stats(*t)[0])
+        result = set(self.doc_ids(*ordered[0]))
+        for term in ordered[1:]:
+            if not result:
+                break
+            result.intersection_update(self.doc_ids(*term))
+        return sorted(result)
+
+    def or_(self, *terms):
+        """Ids of the articles mentioning any of `terms`."""
+        result = set()
+        for term in terms:
+            result.update(self.doc_ids(*term))
+        return sorted(result)
+
+    def document(self, doc_id):
+        return {field: self.docs[field][doc_id] for field in DOC_FIELDS}
+
+    def top(self, kind, term, n=10, by='frequency'):
+        """The `n` articles mentioning `term` the most ('frequency') or the latest ('recency').
+
+        Each result is the article's doc table row plus its `tf`.
+        """
+        postings = self.lookup(kind, term)
+        if by == 'recency':
+            timestamps = self.docs['timestamp']
+            postings.sort(key=lambda p: (timestamps[p[0]] or 0, p[1]), reverse=True)
+        else:
+            postings.sort(key=lambda p: (p[1], self.docs['timestamp'][p[0]] or 0), reverse=True)
+        return [dict(self.document(doc_id), tf=tf) for doc_id, tf in postings[:n]]
+
+    def close(self):
+        if isinstance(self._postings, mmap.mmap):
+            self._postings.close()
+        self._file.close()
+
+
+if __name__ == '__main__':
+    source = sys.argv[1] if len(sys.argv) > 1 else CORPUS_PATH
+    target = sys.argv[2] if len(sys.argv) > 2 else INDEX_DIR
+    print(f"Indexing {source} into {target}...")
+    print(f"Indexed {build_index(source, target)} articles.")
@@ -0,0 +1,355 @@
+"""Co-occurrence network of the locations, organisations and people of the articles.
+
+Two entities are linked when an article mentions both (`loc`, `org`, `per`
+count dicts); the weight of the link is the number of such articles.
+
+    python entity_network.py [corpus] [network_dir]        build
+    python entity_network.py --entity Mali --kind org --start 2024 --end 2024
+    EntityNetwork().neighbours('loc', 'Mali', kinds=['org'], start='2024', end='2024')
+
+Layout (numpy arrays, memory-mapped when querying):
+    entity_network/entities.json        [kind, name] of each entity id
+    entity_network/meta.json            periods ('YYYY-MM'), slices, counts
+    entity_network/article_period.npy   period index of each article (corpus order)
+    entity_network/incidence_*.npy      article x entity incidence (CSR: indptr, entities, tf)
+    entity_network/postings_*.npy       the same by entity (indptr, articles)
+    entity_network/period_df_*.npy      articles mentioning each entity, per period (CSR)
+    entity_network/pairs_*.npy          weighted edges (src < dst), one segment per slice
+
+A slice is a month, a year or the whole corpus; its edges are stored sorted
+by decreasing weight, so the top edges of a slice are a prefix of its
+segment. Other period ranges sum the monthly segments. Neighbourhood queries
+never touch the edge lists: the articles of the entity in the range are
+taken from its posting list and their entities counted (one bincount), so
+they stay interactive with tens of thousands of entities.
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from array import array
+
+import numpy as np
+import scipy.sparse as sp
+
+from annotations import decode_field
+from corpus import CORPUS_PATH, iter_articles
+
+NETWORK_DIR = os.environ.get('ENTITY_NETWORK', 'entity_network')
+KINDS = ['loc', 'org', 'per']
+KIND_LABELS = {'loc': 'Lieu', 'org': 'Organisation', 'per': 'Personne'}
+ALL = 'ALL'
+EDGE_LIMIT = 150
+
+
+def _csr_arrays(matrix, prefix):
+    return {f'{prefix}_indptr': matrix.indptr.astype(np.int64), f'{prefix}_ids': matrix.indices.astype(np.int32),
+            f'{prefix}_values': matrix.data.astype(np.int32)}
+
+
+def _upper_edges(weights):
+    """(src, dst, weight) of the upper triangle of a symmetric count matrix, heaviest first."""
+    upper = sp.triu(weights, k=1).tocoo()
+    order = np.lexsort((upper.col, upper.row, -upper.data))
+    return upper.row[order].astype(np.int32), upper.col[order].astype(np.int32), upper.data[order].astype(np.int32)
+
+
+def build_network(corpus_path=CORPUS_PATH, network_dir=NETWORK_DIR):
+    """Stream the corpus once and write the network files; return meta.json content."""
+    entity_ids = {}
+    indptr, entities, tfs = [0], array('i'), array('i')
+    article_periods = []
+    for year, month, day, article in iter_articles(corpus_path):
+        for kind in KINDS:
+            for name, tf in (decode_field(article.get(kind)) or {}).items():
+                entities.append(entity_ids.setdefault((kind, name), len(entity_ids)))
+                tfs.append(int(tf))
+        indptr.append(len(entities))
+        article_periods.append(f'{year}-{int(month):02d}')
+
+    n_entities = len(entity_ids)
+    periods = sorted(set(article_periods))
+    period_codes = {period: i for i, period in enumerate(periods)}
+    article_period = np.array([period_codes[period] for period in article_periods], dtype=np.int32)
+    incidence = sp.csr_matrix((np.frombuffer(tfs, dtype=np.int32), np.frombuffer(entities, dtype=np.int32),
+                               np.asarray(indptr, dtype=np.int64)), shape=(len(article_periods), n_entities))
+    incidence.sum_duplicates()
+    binary = incidence.copy()
+    binary.data[:] = 1
+    postings = binary.tocsc()
+    postings.sort_indices()
+    membership = sp.csr_matrix((np.ones(len(article_period), dtype=np.int32),
+                                (article_period, np.arange(len(article_period)))),
+                               shape=(len(periods), len(article_period)))
+
+    # Edge segments: each month, each year (sum of its months), the whole corpus
+    slices, segments = [], []
+    month_weights = {}
+    for code, period in enumerate(periods):
+        rows = binary[np.flatnonzero(article_period == code)]
+        month_weights[period] = (rows.T @ rows).tocsr()
+        slices.append(period)
+        segments.append(_upper_edges(month_weights[period]))
+    years = sorted({period[:4] for period in periods})
+    for year in years:
+        slices.append(year)
+        segments.append(_upper_edges(sum(w for p, w in month_weights.items() if p.startswith(year))))
+    slices.append(ALL)
+    segments.append(_upper_edges(sum(month_weights.values()) if month_weights else
+                                 sp.csr_matrix((n_entities, n_entities), dtype=np.int32)))
+
+    arrays = {
+        'article_period': article_period,
+        'entity_kind': np.array([KINDS.index(kind) for kind, _ in entity_ids], dtype=np.int8),
+        'pairs_indptr': np.r_[0, np.cumsum([len(segment[0]) for segment in segments])].astype(np.int64),
+        'pairs_src': np.concatenate([segment[0] for segment in segments]),
+        'pairs_dst': np.concatenate([segment[1] for segment in segments]),
+        'pairs_weight': np.concatenate([segment[2] for segment in segments]),
+    }
+    arrays.update(_csr_arrays(incidence, 'incidence'))
+    arrays.update(_csr_arrays(postings, 'postings'))
+    arrays.update(_csr_arrays((membership @ binary).tocsr(), 'period_df'))
+    meta = {'articles': len(article_period), 'entities': n_entities, 'periods': periods, 'years': years,
+            'slices': slices, 'edges': {name: len(segment[0]) for name, segment in zip(slices, segments)
+                                        if name in years or name == ALL}}
+
+    tmp_dir = network_dir.rstrip('/') + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for name, values in arrays.items():
+        np.save(os.path.join(tmp_dir, f'{name}.npy'), values)
+    with open(os.path.join(tmp_dir, 'entities.json'), 'w', encoding='utf-8') as f:
+        json.dump([list(key) for key in entity_ids], f, ensure_ascii=False)
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=1)
+    shutil.rmtree(network_dir, ignore_errors=True)
+    os.rename(tmp_dir, network_dir)
+    return meta
+
+
+def spring_layout(n_nodes, src, dst, weight, iterations=60, seed=0):
+    """(n_nodes, 2) positions in [-1, 1] (Fruchterman-Reingold, vectorised, deterministic)."""
+    if n_nodes == 0:
+        return np.zeros((0, 2))
+    pos = np.random.default_rng(seed).uniform(-1, 1, (n_nodes, 2))
+    k = 1 / np.sqrt(n_nodes)
+    strength = np.log1p(weight) / max(np.log1p(weight).max(), 1e-9) if len(weight) else weight
+    step = 0.1
+    for _ in range(iterations):
+        delta = pos[:, None, :] - pos[None, :, :]
+        distance = np.maximum(np.linalg.norm(delta, axis=2), 0.01)
+        displacement = (delta * (k * k / distance ** 2)[:, :, None]).sum(axis=1)
+        edge = pos[src] - pos[dst]
+        length = np.maximum(np.linalg.norm(edge, axis=1), 0.01)
+        pull = edge * (length * strength / k)[:, None]
+        np.add.at(displacement, src, -pull)
+        np.add.at(displacement, dst, pull)
+        norm = np.maximum(np.linalg.norm(displacement, axis=1), 1e-9)
+        pos += displacement / norm[:, None] * np.minimum(norm, step)[:, None]
+        step *= 0.95
+    pos -= pos.mean(axis=0)
+    return pos / max(np.abs(pos).max(), 1e-9)
+
+
+class EntityNetwork:
+    """Read side of the network. Entities are given as (kind, name), e.g. ('loc', 'Mali')."""
+
+    def __init__(self, network_dir=NETWORK_DIR):
+        with open(os.path.join(network_dir, 'meta.json'), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        with open(os.path.join(network_dir, 'entities.json'), encoding='utf-8') as f:
+            self.entities = [tuple(entity) for entity in json.load(f)]
+        self.ids = {entity: i for i, entity in enumerate(self.entities)}
+        self._folded = {}
+        for i, (kind, name) in enumerate(self.entities):
+            self._folded.setdefault(name.casefold(), []).append(i)
+        self.periods = self.meta['periods']
+        self.years = self.meta['years']
+        self.slices = {name: i for i, name in enumerate(self.meta['slices'])}
+        for name in ['article_period', 'entity_kind', 'pairs_indptr', 'pairs_src', 'pairs_dst', 'pairs_weight',
+                     'incidence_indptr', 'incidence_ids', 'postings_indptr', 'postings_ids',
+                     'period_df_indptr', 'period_df_ids', 'period_df_values']:
+            # Still file-backed, but slicing a plain ndarray view is much cheaper than slicing a memmap
+            setattr(self, name, np.load(os.path.join(network_dir, f'{name}.npy'), mmap_mode='r').view(np.ndarray))
+
+    def __len__(self):
+        return len(self.entities)
+
+    # -- entities and periods --
+
+    def entity_id(self, kind, name):
+        """Id of (kind, name); case-insensitive fallback; None if unknown."""
+        if (kind, name) in self.ids:
+            return self.ids[(kind, name)]
+        matches = [i for i in self._folded.get(name.casefold(), []) if self.entities[i][0] == kind]
+        return matches[0] if matches else None
+
+    def find(self, name, start=None, end=None):
+        """Id of the most mentioned entity called `name` (any kind, case-insensitive), or None."""
+        matches = self._folded.get(name.strip().casefold(), [])
+        if not matches:
+            return None
+        df = self.frequencies(start, end)
+        return max(matches, key=lambda i: df[i])
+
+    def _range(self, start=None, end=None):
+        """(first, last) period indexes of [start, end] ('YYYY' or 'YYYY-MM', None/ALL: open)."""
+        start = None if start in (None, '', ALL) else str(start)
+        end = None if end in (None, '', ALL) else str(end)
+        first = 0 if start is None else int(np.searchsorted(self.periods, start if len(start) > 4 else start + '-01'))
+        last = len(self.periods) - 1 if end is None else \
+            int(np.searchsorted(self.periods, end if len(end) > 4 else end + '-12', side='right')) - 1
+        return first, last
+
+    def _slice_name(self, first, last):
+        """Name of the stored slice covering exactly periods first..last, or None."""
+        if first > last:
+            return None
+        if first == 0 and last == len(self.periods) - 1:
+            return ALL
+        if first == last:
+            return self.periods[first]
+        year = self.periods[first][:4]
+        months = [i for i, period in enumerate(self.periods) if period.startswith(year)]
+        return year if (months[0], months[-1]) == (first, last) else None
+
+    def frequencies(self, start=None, end=None):
+        """Articles mentioning each entity in [start, end]."""
+        first, last = self._range(start, end)
+        a, b = self.period_df_indptr[first], self.period_df_indptr[max(last + 1, first)]
+        return np.bincount(self.period_df_ids[a:b], weights=self.period_df_values[a:b],
+                           minlength=len(self.entities)).astype(np.int64)
+
+    def _kind_mask(self, kinds):
+        if kinds is None:
+            return None
+        return np.isin(self.entity_kind, [KINDS.index(kind) for kind in kinds])
+
+    # -- queries --
+
+    def neighbours(self, kind, name, kinds=None, start=None, end=None, k=20):
+        """Top `k` entities co-occurring with (kind, name) in [start, end], optionally only of `kinds`.
+
+        Each result: {kind, name, weight (articles in common), df (articles of the neighbour), share
+        (weight / articles of the entity)}.
+        """
+        entity = self.entity_id(kind, name)
+        return [] if entity is None else self.neighbours_of(entity, kinds, start, end, k)
+
+    def neighbours_of(self, entity, kinds=None, start=None, end=None, k=20):
+        first, last = self._range(start, end)
+        articles = self.postings_ids[self.postings_indptr[entity]:self.postings_indptr[entity + 1]]
+        period = self.article_period[articles]
+        articles = articles[(period >= first) & (period <= last)]
+        if not len(articles):
+            return []
+        # Entities of these articles: one gather over the concatenated CSR rows
+        starts = self.incidence_indptr[articles]
+        lengths = self.incidence_indptr[articles + 1] - starts
+        offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        weights = np.bincount(self.incidence_ids[offsets + np.arange(len(offsets))], minlength=len(self.entities))
+        weights[entity] = 0
+        mask = self._kind_mask(kinds)
+        if mask is not None:
+            weights[~mask] = 0
+        candidates = np.flatnonzero(weights)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-weights[candidates], k - 1)[:k]]
+        candidates = candidates[np.lexsort((candidates, -weights[candidates]))]
+        df = self.frequencies(start, end)
+        return [{'kind': self.entities[i][0], 'name': self.entities[i][1], 'weight': int(weights[i]),
+                 'df': int(df[i]), 'share': float(weights[i] / len(articles))} for i in candidates]
+
+    def edges(self, start=None, end=None, kinds=None, top=EDGE_LIMIT, nodes=None, min_weight=1):
+        """(src, dst, weight) of the `top` heaviest edges in [start, end] (both ends of `kinds` / in `nodes`)."""
+        first, last = self._range(start, end)
+        mask = self._kind_mask(kinds)
+        if nodes is not None:
+            node_mask = np.zeros(len(self.entities), dtype=bool)
+            node_mask[list(nodes)] = True
+            mask = node_mask if mask is None else mask & node_mask
+
+        name = self._slice_name(first, last)
+        if name is not None:
+            i = self.slices[name]
+            a, b = self.pairs_indptr[i], self.pairs_indptr[i + 1]
+            src, dst, weight = self.pairs_src[a:b], self.pairs_dst[a:b], self.pairs_weight[a:b]
+        elif first <= last:
+            # Months of the range (filtered first), summed: one sort over their edges
+            a, b = self.pairs_indptr[first], self.pairs_indptr[last + 1]
+            src, dst, weight = self.pairs_src[a:b], self.pairs_dst[a:b], self.pairs_weight[a:b]
+            if mask is not None:
+                kept = mask[src] & mask[dst]
+                src, dst, weight = src[kept], dst[kept], weight[kept]
+            n = np.int64(len(self.entities))
+            keys, inverse = np.unique(src * n + dst, return_inverse=True)
+            weight = np.bincount(inverse, weights=weight, minlength=len(keys)).astype(np.int32)
+            src, dst = (keys // n).astype(np.int32), (keys % n).astype(np.int32)
+            order = np.lexsort((dst, src, -weight))
+            src, dst, weight = src[order], dst[order], weight[order]
+        else:
+            return (np.zeros(0, dtype=np.int32),) * 3
+
+        keep = weight >= min_weight
+        if mask is not None:
+            keep &= mask[src] & mask[dst]
+        # Heaviest first: the top edges are the first kept ones
+        selected = np.flatnonzero(keep)[:top]
+        return src[selected], dst[selected], weight[selected]
+
+    def graph(self, start=None, end=None, kinds=None, top=EDGE_LIMIT, focus=None, k=30):
+        """Nodes and edges to draw, with a layout.
+
+        Without `focus`: the `top` heaviest edges of the range. With a focus
+        entity id: the entity, its `k` strongest neighbours and the edges among them.
+        Returns {'nodes': [{id, kind, name, df, x, y, focus}], 'edges': [{source, target, weight}]}
+        (source/target: positions in nodes).
+        """
+        if focus is not None:
+            around = self.neighbours_of(focus, kinds, start, end, k)
+            members = [focus] + [self.entity_id(n['kind'], n['name']) for n in around]
+            src, dst, weight = self.edges(start, end, None, top, nodes=members)
+        else:
+            src, dst, weight = self.edges(start, end, kinds, top)
+            members = []
+        node_ids = np.unique(np.r_[np.asarray(members, dtype=np.int64), src, dst]).astype(np.int64)
+        position = {entity: i for i, entity in enumerate(node_ids.tolist())}
+        source = np.array([position[e] for e in src.tolist()], dtype=np.int64)
+        target = np.array([position[e] for e in dst.tolist()], dtype=np.int64)
+        xy = spring_layout(len(node_ids), source, target, weight.astype(np.float64))
+        df = self.frequencies(start, end)
+        nodes = [{'id': int(e), 'kind': self.entities[e][0], 'name': self.entities[e][1], 'df': int(df[e]),
+                  'x': float(x), 'y': float(y), 'focus': e == focus}
+                 for e, (x, y) in zip(node_ids.tolist(), xy)]
+        edges = [{'source': int(s), 'target': int(t), 'weight': int(w)}
+                 for s, t, w in zip(source.tolist(), target.tolist(), weight.tolist())]
+        return {'nodes': nodes, 'edges': edges}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build or query the entity co-occurrence network.")
+    parser.add_argument('corpus', nargs='?', default=CORPUS_PATH)
+    parser.add_argument('network_dir', nargs='?', default=NETWORK_DIR)
+    parser.add_argument('--entity', help="neighbours of this entity instead of building")
+    parser.add_argument('--entity-kind', choices=KINDS, default='loc')
+    parser.add_argument('--kind', choices=KINDS, action='append', help="neighbour kinds (default: all)")
+    parser.add_argument('--start')
+    parser.add_argument('--end')
+    parser.add_argument('-k', type=int, default=10)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.entity is None:
+        print(f"Building the entity network of {args.corpus} into {args.network_dir}...")
+        meta = build_network(args.corpus, args.network_dir)
+        print(f"{meta['articles']} articles, {meta['entities']} entities, {len(meta['periods'])} months, "
+              f"{meta['edges'][ALL]} edges ({time.perf_counter() - started:.2f}s)")
+    else:
+        network = EntityNetwork(args.network_dir)
+        loaded = time.perf_counter()
+        hits = network.neighbours(args.entity_kind, args.entity, args.kind, args.start, args.end, args.k)
+        print(f"{args.entity} ({args.entity_kind}): {(time.perf_counter() - loaded) * 1000:.1f} ms")
+        for hit in hits:
+            print(f"  {KIND_LABELS[hit['kind']]:<13} {hit['name']:<40} {hit['weight']:6d} articles  "
+                  f"({hit['share']:.0%} of its articles)")
@@ -1,40 +1,30 @@
-import json
 import pandas as pd
-from geopy.geocoders import Nominatim
-from geopy.extra.rate_limiter import RateLimiter
-import time
 
-# Load existing geocoded data to reuse coordinates
+from corpus import CORPUS_PATH, read_metadata
+from batch_geocoder import geocode_all
+from geocache import GeoCache
+
+cache = GeoCache()
+
+# Reuse the coordinates of the geocoded export (cached answers take precedence)
 try:
     existing_df = pd.read_csv('aggregated_locations_geocoded.csv')
-    # Create valid dictionary: name -> (lat, lon)
     # Ensure no NaNs
     existing_df = existing_df.dropna(subset=['Latitude', 'Longitude'])
-    coord_dict = dict(zip(existing_df['Location'], zip(existing_df['Latitude'], existing_df['Longitude'])))
-    print(f"Loaded {len(coord_dict)} existing coordinates.")
+    cache.seed(dict(zip(existing_df['Location'], zip(existing_df['Latitude'], existing_df['Longitude']))),
+               source='aggregated_locations_geocoded.csv')
+    print(f"Loaded {len(existing_df)} existing coordinates.")
 except FileNotFoundError:
-    coord_dict = {}
     print("No existing coordinates file found.")
 
-# Manually add some known ones if missing (from previous script)
-defaults = {
-    'Russie': (61.523112, 105.1), 'Ukraine': (48.379889, 31.168139), 'France': (46.232193, 2.209667),
-    'Moscou': (55.7558, 37.6173), 'Kiev': (50.4501, 30.5234), 'Chine': (35.8617, 104.1954),
-    'Afrique': (9.1021, 18.2812), 'États-Unis': (39.8283, -98.5795)
-}
-for k, v in defaults.items():
-    if k not in coord_dict:
-        coord_dict[k] = v
-
 print("Loading data...")
-with open('donne.json', 'r', encoding='utf-8') as f:
-    data = json.load(f)
+# Only the metadata['year'] counters are decoded, articles are never parsed
+years = read_metadata(CORPUS_PATH, 'year')
 
 rows = []
 
 # Extract from metadata -> year
-if 'metadata' in data and 'year' in data['metadata']:
-    years = data['metadata']['year']
+if years:
     for year, year_data in years.items():
         if 'loc' in year_data:
             locs = year_data['loc']
@@ -52,41 +42,11 @@ print(f"Extracted {len(df)} rows of yearly location data.")
 unique_locs = df['Location'].unique()
 print(f"Unique locations to ensure coordinates for: {len(unique_locs)}")
 
-geolocator = Nominatim(user_agent="geo_app_analysis_time")
-geocode = RateLimiter(geolocator.geocode, min_delay_seconds=1.0)
-
-updated_coords = 0
-
-for loc in unique_locs:
-    clean_name = loc.strip().replace('"', '')
-    if clean_name not in coord_dict:
-        print(f"Geocoding {clean_name}...")
-        try:
-            location = geocode(clean_name)
-            if location:
-                coord_dict[clean_name] = (location.latitude, location.longitude)
-                updated_coords += 1
-            else:
-                coord_dict[clean_name] = (None, None) # Mark as not found
-        except Exception as e:
-            print(f"Error geocoding {clean_name}: {e}")
-            coord_dict[clean_name] = (None, None)
-
-# Map back to DF
-def get_lat(loc):
-    clean = loc.strip().replace('"', '')
-    if clean in coord_dict:
-        return coord_dict[clean][0]
-    return None
-
-def get_lon(loc):
-    clean = loc.strip().replace('"', '')
-    if clean in coord_dict:
-        return coord_dict[clean][1]
-    return None
+clean_names = {loc: loc.strip().replace('"', '') for loc in unique_locs}
+coords = geocode_all(clean_names.values(), cache)
 
-df['Latitude'] = df['Location'].apply(get_lat)
-df['Longitude'] = df['Location'].apply(get_lon)
+df['Latitude'] = df['Location'].map(lambda loc: coords[clean_names[loc]][0])
+df['Longitude'] = df['Location'].map(lambda loc: coords[clean_names[loc]][1])
 
 # Drop those without coords
 df_final = df.dropna(subset=['Latitude', 'Longitude'])
@@ -94,5 +54,5 @@ df_final = df.dropna(subset=['Latitude', 'Longitude'])
 df_final.to_csv('locations_by_year.csv', index=False)
 print(f"Saved {len(df_final)} rows to locations_by_year.csv")
 
-# Also update the Master Geocoded list if we found new ones
-# (Optional, but good practice)
+# New answers are already in the geocoding cache for the next run
+cache.close()
@@ -0,0 +1,120 @@
+"""LRU cache of built Plotly figures for the Dash callbacks.
+
+    figure = figure_cache.get_or_build(generate_heatmap_themes, cube, '2025')
+
+The key is (figure function, parameters, data version): an argument with a
+`token` (ThemeCube: hash of its counts) or `version` attribute is keyed by it,
+so a data refresh misses naturally and stale entries age out of the LRU.
+Figures are stored as their serialised JSON dict, returned as is on a hit
+(callers must not mutate them). Memory is capped in bytes of serialised JSON;
+with `path`, entries are also written to disk and survive a restart.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import plotly.io as pio
+
+FIGURE_CACHE_MB = float(os.environ.get('FIGURE_CACHE_MB', 64))
+FIGURE_CACHE_DIR = os.environ.get('FIGURE_CACHE_DIR')
+
+
+def _param_key(arg):
+    token = getattr(arg, 'token', None) or getattr(arg, 'version', None)
+    if token is not None:
+        return f'{type(arg).__name__}@{token}'
+    return repr(arg)
+
+
+class FigureCache:
+    """Thread-safe (Flask serves callbacks from several threads) LRU of figure dicts."""
+
+    def __init__(self, max_bytes=int(FIGURE_CACHE_MB * 2**20), path=FIGURE_CACHE_DIR):
+        self.max_bytes = max_bytes
+        self.path = path
+        if path:
+            os.makedirs(path, exist_ok=True)
+        self._entries = OrderedDict()    # key -> (figure dict, size in bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.disk_hits = self.evictions = 0
+
+    @staticmethod
+    def make_key(func, args):
+        return '|'.join([f'{func.__module__}.{func.__qualname__}', *map(_param_key, args)])
+
+    def _disk_file(self, key):
+        return os.path.join(self.path, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+        if self.path and os.path.exists(self._disk_file(key)):
+            with open(self._disk_file(key), encoding='utf-8') as f:
+                text = f.read()
+            figure = json.loads(text)
+            self._store(key, figure, len(text))
+            with self._lock:
+                self.disk_hits += 1
+            return figure
+        return None
+
+    def _store(self, key, figure, size):
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (figure, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+
+    def put(self, key, figure):
+        """Serialise and store a go.Figure (or figure dict); return the stored dict."""
+        text = pio.to_json(figure, validate=False)
+        stored = json.loads(text)
+        self._store(key, stored, len(text))
+        if self.path:
+            tmp = self._disk_file(key) + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(tmp, self._disk_file(key))
+        return stored
+
+    def get_or_build(self, func, *args):
+        """func(*args) from the cache, built (and cached) on a miss."""
+        key = self.make_key(func, args)
+        figure = self.get(key)
+        if figure is not None:
+            return figure
+        with self._lock:
+            self.misses += 1
+        return self.put(key, func(*args))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.hits + self.disk_hits) / lookups, 4) if lookups else None,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+            }
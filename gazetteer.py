@@ -0,0 +1,287 @@
+"""Offline gazetteer: GeoNames dump -> compact memory-mapped index with exact and fuzzy lookup.
+
+Built from a GeoNames table (allCountries.txt, cities500.txt... tab-separated:
+geonameid, name, asciiname, alternatenames, latitude, longitude, feature class,
+feature code, country code, ..., population, ...) and optionally the
+alternate names file, of which only the French names are kept by default:
+
+    python gazetteer.py allCountries.txt [--alternate-names alternateNamesV2.txt]
+    python gazetteer.py --query "Côte d’Ivoire"
+
+Every name is indexed under its normalised form (geocache.cache_key: accents,
+apostrophes, hyphens and case unified). Index layout (gazetteer_index/, all
+numpy arrays opened with mmap_mode='r'):
+
+    places     geonameid, lat, lon, population, feature_class, country + names.bin/name_offsets
+    keys       key_hash (sorted uint64), keys.bin/key_offsets, key_indptr/key_place
+               (places of each key, best first: countries / admin areas / cities, then population)
+    trigrams   trigram_hash (sorted), trigram_indptr/trigram_keys (CSR), key_ntrigrams
+
+Exact lookup is a binary search on the key hashes. Fuzzy lookup scores keys
+sharing character trigrams with the query (Dice coefficient); when the lists
+are long, only the keys found in the query's rarest trigram lists are scored,
+so frequent trigrams are binary-searched, never scanned.
+"""
+import argparse
+import hashlib
+import math
+import os
+import zlib
+
+import numpy as np
+
+from geocache import cache_key
+
+GAZETTEER_INDEX = os.environ.get('GAZETTEER_INDEX', 'gazetteer_index')
+LANGUAGES = ('fr',)
+FUZZY_THRESHOLD = 0.75
+FUZZY_MIN_LENGTH = 4
+# Below this many postings in total, a query's trigram lists are merged directly
+DIRECT_COUNT_LIMIT = 50_000
+# Places of the same name: countries / admin areas, then populated places, then the rest
+FEATURE_RANK = {'A': 0, 'P': 1}
+
+
+def key_hash(key):
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def trigrams(key):
+    padded = f' {key} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def trigram_hash(gram):
+    return zlib.crc32(gram.encode('utf-8'))
+
+
+def _write_strings(blob_path, offsets_path, strings):
+    """Concatenated utf-8 blob + offsets, so one string is one slice of a memory map."""
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    with open(blob_path, 'wb') as f:
+        f.write(b''.join(encoded))
+    np.save(offsets_path, offsets)
+
+
+def read_geonames(path, alternate_names_path=None, languages=LANGUAGES, alternates=True):
+    """Places of a GeoNames table as column lists, plus {place row: set of names}."""
+    columns = {field: [] for field in ('geonameid', 'name', 'lat', 'lon', 'feature_class', 'country', 'population')}
+    names = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            fields = line.rstrip('\n').split('\t')
+            if len(fields) < 15:
+                continue
+            columns['geonameid'].append(int(fields[0]))
+            columns['name'].append(fields[1])
+            columns['lat'].append(float(fields[4]))
+            columns['lon'].append(float(fields[5]))
+            columns['feature_class'].append(fields[6] or '?')
+            columns['country'].append(fields[8])
+            columns['population'].append(int(fields[14] or 0))
+            place_names = {fields[1], fields[2]}
+            if alternates and fields[3]:
+                place_names.update(fields[3].split(','))
+            names.append(place_names)
+
+    if alternate_names_path:
+        row_of = {geonameid: row for row, geonameid in enumerate(columns['geonameid'])}
+        with open(alternate_names_path, encoding='utf-8') as f:
+            for line in f:
+                fields = line.rstrip('\n').split('\t')
+                if len(fields) > 3 and fields[2] in languages:
+                    row = row_of.get(int(fields[1]))
+                    if row is not None:
+                        names[row].add(fields[3])
+    return columns, names
+
+
+def build_index(geonames_path, index_dir=GAZETTEER_INDEX, alternate_names_path=None, languages=LANGUAGES,
+                alternates=True):
+    """Read a GeoNames dump and write the index; return (places, distinct names)."""
+    columns, names = read_geonames(geonames_path, alternate_names_path, languages, alternates)
+    population = np.asarray(columns['population'], dtype=np.int64)
+    feature_rank = np.asarray([FEATURE_RANK.get(c, 2) for c in columns['feature_class']], dtype=np.int8)
+
+    places_of = {}
+    for row, place_names in enumerate(names):
+        for name in place_names:
+            key = cache_key(name)
+            if key:
+                places_of.setdefault(key, set()).add(row)
+
+    keys = sorted(places_of, key=key_hash)
+    key_indptr = np.zeros(len(keys) + 1, dtype=np.int64)
+    key_place = []
+    postings = {}   # trigram hash -> key ids (ascending: keys are visited in id order)
+    key_ntrigrams = np.zeros(len(keys), dtype=np.uint16)
+    for key_id, key in enumerate(keys):
+        rows = sorted(places_of[key], key=lambda r: (feature_rank[r], -population[r]))
+        key_place.extend(rows)
+        key_indptr[key_id + 1] = len(key_place)
+        grams = trigrams(key)
+        key_ntrigrams[key_id] = min(len(grams), np.iinfo(np.uint16).max)
+        for gram in grams:
+            postings.setdefault(trigram_hash(gram), []).append(key_id)
+
+    gram_hashes = sorted(postings)
+    trigram_indptr = np.zeros(len(gram_hashes) + 1, dtype=np.int64)
+    np.cumsum([len(postings[h]) for h in gram_hashes], out=trigram_indptr[1:])
+    trigram_keys = np.fromiter((k for h in gram_hashes for k in postings[h]), dtype=np.int32,
+                               count=int(trigram_indptr[-1]))
+
+    os.makedirs(index_dir, exist_ok=True)
+    arrays = {
+        'geonameid': np.asarray(columns['geonameid'], dtype=np.int64),
+        'lat': np.asarray(columns['lat'], dtype=np.float32),
+        'lon': np.asarray(columns['lon'], dtype=np.float32),
+        'population': population,
+        'feature_class': np.asarray(columns['feature_class'], dtype='S1'),
+        'country': np.asarray(columns['country'], dtype='S2'),
+        'key_hash': np.asarray([key_hash(k) for k in keys], dtype=np.uint64),
+        'key_indptr': key_indptr,
+        'key_place': np.asarray(key_place, dtype=np.int32),
+        'key_ntrigrams': key_ntrigrams,
+        'trigram_hash': np.asarray(gram_hashes, dtype=np.uint32),
+        'trigram_indptr': trigram_indptr,
+        'trigram_keys': trigram_keys,
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(index_dir, f'{name}.npy'), array)
+    _write_strings(os.path.join(index_dir, 'names.bin'), os.path.join(index_dir, 'name_offsets.npy'), columns['name'])
+    _write_strings(os.path.join(index_dir, 'keys.bin'), os.path.join(index_dir, 'key_offsets.npy'), keys)
+    return len(columns['name']), len(keys)
+
+
+class Gazetteer:
+    """Read side of the index; every array is memory-mapped, lookups are thread-safe."""
+
+    def __init__(self, index_dir=GAZETTEER_INDEX):
+        def load(name):
+            # Still file-backed, but slicing a plain ndarray view is much cheaper than slicing a memmap
+            return np.load(os.path.join(index_dir, f'{name}.npy'), mmap_mode='r').view(np.ndarray)
+
+        for name in ('geonameid', 'lat', 'lon', 'population', 'feature_class', 'country', 'key_hash',
+                     'key_indptr', 'key_place', 'key_ntrigrams', 'trigram_hash', 'trigram_indptr',
+                     'trigram_keys', 'name_offsets', 'key_offsets'):
+            setattr(self, name, load(name))
+        self.names = np.memmap(os.path.join(index_dir, 'names.bin'), dtype=np.uint8, mode='r') \
+            if self.name_offsets[-1] else np.zeros(0, dtype=np.uint8)
+        self.keys = np.memmap(os.path.join(index_dir, 'keys.bin'), dtype=np.uint8, mode='r') \
+            if self.key_offsets[-1] else np.zeros(0, dtype=np.uint8)
+
+    def __len__(self):
+        return len(self.geonameid)
+
+    @staticmethod
+    def _string(blob, offsets, i):
+        return bytes(blob[offsets[i]:offsets[i + 1]]).decode('utf-8')
+
+    def key(self, key_id):
+        return self._string(self.keys, self.key_offsets, key_id)
+
+    def place(self, row, score=1.0):
+        return {
+            'geonameid': int(self.geonameid[row]),
+            'name': self._string(self.names, self.name_offsets, row),
+            'latitude': float(self.lat[row]),
+            'longitude': float(self.lon[row]),
+            'country': self.country[row].decode(),
+            'feature_class': self.feature_class[row].decode(),
+            'population': int(self.population[row]),
+            'score': score,
+        }
+
+    def _places(self, key_id):
+        return self.key_place[self.key_indptr[key_id]:self.key_indptr[key_id + 1]]
+
+    def exact_key(self, key):
+        """Key id of a normalised name, None if absent."""
+        h = np.uint64(key_hash(key))
+        i = int(np.searchsorted(self.key_hash, h))
+        while i < len(self.key_hash) and self.key_hash[i] == h:
+            if self.key(i) == key:
+                return i
+            i += 1
+        return None
+
+    def fuzzy_keys(self, key, threshold=FUZZY_THRESHOLD, limit=5):
+        """[(key_id, dice)] of the keys most similar to `key`, best first (dice >= threshold)."""
+        hashes = np.unique(np.asarray([trigram_hash(g) for g in trigrams(key)], dtype=np.uint32))
+        positions = np.searchsorted(self.trigram_hash, hashes)
+        lists = [
+            self.trigram_keys[self.trigram_indptr[p]:self.trigram_indptr[p + 1]]
+            for p, h in zip(positions, hashes)
+            if p < len(self.trigram_hash) and self.trigram_hash[p] == h
+        ]
+        n_query = len(hashes)
+        # Dice >= t needs at least t*n/(2-t) shared trigrams, hence one in the rarest lists
+        needed = math.ceil(threshold * n_query / (2 - threshold))
+        if not lists or len(lists) < needed:
+            return []
+        if sum(len(keys) for keys in lists) <= DIRECT_COUNT_LIMIT:
+            # Short lists: count shared trigrams over all of them at once
+            candidates, common = np.unique(np.concatenate(lists), return_counts=True)
+        else:
+            lists.sort(key=len)
+            candidates = np.unique(np.concatenate(lists[:len(lists) - needed + 1]))
+            common = np.zeros(len(candidates), dtype=np.int64)
+            for keys in lists:
+                idx = np.minimum(np.searchsorted(keys, candidates), len(keys) - 1)
+                common += keys[idx] == candidates
+        dice = 2 * common / (n_query + self.key_ntrigrams[candidates].astype(np.int32))
+        order = np.argsort(-dice, kind='stable')[:limit]
+        return [(int(candidates[i]), float(dice[i])) for i in order if dice[i] >= threshold]
+
+    def lookup(self, name, fuzzy=True, threshold=FUZZY_THRESHOLD):
+        """Best place for `name` (dict, see place()), None if nothing matches."""
+        key = cache_key(name)
+        if not key:
+            return None
+        key_id = self.exact_key(key)
+        if key_id is not None:
+            return self.place(int(self._places(key_id)[0]))
+        if not fuzzy or len(key) < FUZZY_MIN_LENGTH:
+            return None
+        matches = self.fuzzy_keys(key, threshold)
+        if not matches:
+            return None
+        # Among equally similar names, the most important place wins
+        best_score = matches[0][1]
+        rows = [int(self._places(k)[0]) for k, score in matches if score == best_score]
+        row = min(rows, key=lambda r: (FEATURE_RANK.get(self.feature_class[r].decode(), 2), -self.population[r]))
+        return self.place(row, best_score)
+
+
+class GazetteerBackend:
+    """geocache backend answering from the local GeoNames index (GEOCODER=geonames)."""
+    name = 'geonames'
+    max_workers = None
+
+    def __init__(self, index_dir=GAZETTEER_INDEX, fuzzy=True):
+        self.gazetteer = Gazetteer(index_dir)
+        self.fuzzy = fuzzy
+
+    def geocode(self, name):
+        place = self.gazetteer.lookup(name, fuzzy=self.fuzzy)
+        return (place['latitude'], place['longitude']) if place else None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build or query the offline GeoNames gazetteer.")
+    parser.add_argument('geonames', nargs='?', help="GeoNames table to index (allCountries.txt, cities500.txt...)")
+    parser.add_argument('--alternate-names', help="GeoNames alternateNames file (French names are kept)")
+    parser.add_argument('--index-dir', default=GAZETTEER_INDEX)
+    parser.add_argument('--query', help="look a name up instead of building")
+    args = parser.parse_args()
+
+    if args.query is not None:
+        print(Gazetteer(args.index_dir).lookup(args.query))
+    elif args.geonames:
+        print(f"Indexing {args.geonames} into {args.index_dir}...")
+        n_places, n_names = build_index(args.geonames, args.index_dir, args.alternate_names)
+        print(f"Indexed {n_places} places under {n_names} names.")
+    else:
+        parser.error("give a GeoNames file to index or --query")
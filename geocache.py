@@ -0,0 +1,292 @@
+"""Persistent geocoding cache shared by the location scripts.
+
+Every answer -- coordinates or "not found" -- is stored in a SQLite table keyed
+by the normalised place name (location_matcher.normalize, casefolded), with
+the backend it came from, so a rerun only asks the network about names it has
+never seen. A "not found" only holds for the backend that gave it: a stub or
+local-gazetteer miss is asked again to Nominatim or GeoNames.
+
+    with GeoCache() as cache:
+        lat, lon = cache.lookup('Côte d’Ivoire')      # (None, None) if unknown
+
+Lookup order: cache, KNOWN_COORDINATES, then the backend. Backends are picked
+with GEOCODER:
+    nominatim  OpenStreetMap Nominatim (NOMINATIM_DOMAIN for a self-hosted one)
+    file       a local CSV gazetteer (GAZETTEER_FILE: name,latitude,longitude)
+    geonames   the offline GeoNames index of gazetteer.py (GAZETTEER_INDEX)
+    stub       KNOWN_COORDINATES only, for tests and benchmarks
+GEOCODE_OFFLINE=1 never calls a backend: unknown names are returned as
+(None, None) and not recorded as misses. batch_geocoder.py resolves whole
+vocabularies concurrently through the same cache.
+"""
+import csv
+import os
+import sqlite3
+import threading
+import time
+
+from location_matcher import normalize
+
+GEOCACHE_PATH = os.environ.get('GEOCACHE', 'geocache.sqlite')
+GEOCODER = os.environ.get('GEOCODER', 'nominatim')
+OFFLINE = os.environ.get('GEOCODE_OFFLINE', '') not in ('', '0')
+
+# Hand-checked coordinates (country / capital centroids), never sent to a backend
+KNOWN_COORDINATES = {
+    'Russie': (61.523112, 105.1), 'Ukraine': (48.379889, 31.168139), 'France': (46.232193, 2.209667),
+    'Moscou': (55.7558, 37.6173), 'Kiev': (50.4501, 30.5234), 'Chine': (35.8617, 104.1954),
+    'Algérie': (28.0339, 1.6596), 'Mali': (17.0, -4.0), 'Maroc': (31.7917, -7.0926),
+    'Turquie': (38.9637, 35.2433), 'États-Unis': (39.8283, -98.5795), 'Égypte': (26.8206, 30.8025),
+    'Afrique du Sud': (-30.5595, 22.9375), 'Saint-Pétersbourg': (59.9343, 30.3351),
+    'Washington': (38.9072, -77.0369), 'Alger': (36.7538, 3.0588), 'Paris': (48.8566, 2.3522),
+    'Brésil': (-14.2350, -51.9253), 'Inde': (20.5937, 78.9629), 'Johannesburg': (-26.2041, 28.0473),
+    'Bamako': (12.6392, -8.0029), 'Caire': (30.0333, 31.2333), 'Argentine': (-34.6037, -58.3816),
+    'Iran': (32.4279, 53.6880), 'Arabie saoudite': (23.8859, 45.0792), 'Émirats arabes unis': (23.4241, 53.8478),
+    'Nigeria': (9.0820, 8.6753), 'Sénégal': (14.4974, -14.4524), 'Tunisie': (33.8869, 9.5375),
+    'Zimbabwe': (-19.0154, 29.1549), 'Marrakech': (31.6295, -7.9811), 'Comores': (-11.8750, 43.8722),
+    'Angola': (-11.2027, 17.8739), 'Burundi': (-3.3731, 29.9189), 'Mozambique': (-18.6657, 35.5296),
+    'Rwanda': (-1.9403, 29.8739), 'Zambie': (-13.1339, 27.8493), 'Ouganda': (1.3733, 32.2903),
+    'République du Congo': (-0.2280, 15.8277), 'Azerbaïdjan': (40.1431, 47.5769), 'Burkina Faso': (12.2383, -1.8641),
+    'Éthiopie': (8.9806, 38.7578), 'Kenya': (-0.0236, 37.9062), 'Pologne': (51.9194, 19.1451),
+    'Irak': (33.3152, 43.6062), 'Congo': (-4.0383, 21.7587), 'Abidjan': (5.3180, -4.0083),
+    'Belgique': (50.8503, 4.3517), 'Italie': (41.9028, 12.4964), 'Allemagne': (51.1657, 10.4515),
+    'Japon': (36.2048, 138.2529), 'Biélorussie': (53.7098, 27.9534), 'Kazakhstan': (48.0196, 66.9237),
+    'Kirghizstan': (41.2044, 74.7661), 'Kherson': (46.6354, 32.6181), 'Donetsk': (48.0159, 37.8028),
+    'Tbilissi': (41.7151, 44.8271), 'Uruguay': (-32.5228, -55.7658), 'Venezuela': (6.4238, -66.5897),
+    'Danemark': (56.2639, 9.5018), 'Royaume-Uni': (55.3781, -3.4360), 'Koupiansk': (49.7225, 37.6083),
+    'Krasny Liman': (48.9861, 37.8222), 'Minsk': (53.9045, 27.5615), 'Pékin': (39.9042, 116.4074),
+    'Kaliningrad': (54.7065, 20.5110), 'Copenhague': (55.6761, 12.5683), 'Vilnius': (54.6872, 25.2797),
+    'Crimée': (45.3453, 34.0000), 'Afghanistan': (33.9391, 67.7099), 'Bangladesh': (23.6850, 90.3563),
+    'Indonésie': (-0.7893, 113.9213), 'Mexique': (23.6345, -102.5528), 'Nicaragua': (12.8654, -85.2072),
+    'Pakistan': (30.3753, 69.3451), 'Syrie': (34.8021, 38.9968), 'Thaïlande': (15.8700, 100.9925),
+    'Okhotsk': (59.3800, 143.3100),
+    # Continent, often centroid located
+    'Afrique': (9.1021, 18.2812),
+}
+
+
+def cache_key(name):
+    """Normalised form of a place name: quotes dropped, apostrophes / accents / case unified."""
+    return normalize(str(name).replace('"', ''), casefold=True).strip()
+
+
+_KNOWN = {cache_key(name): coords for name, coords in KNOWN_COORDINATES.items()}
+
+
+class Throttle:
+    """Thread-safe minimum delay between calls (the rate limit of one backend)."""
+
+    def __init__(self, min_delay_seconds):
+        self.min_delay = min_delay_seconds
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        if self.min_delay <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.min_delay
+        if start > now:
+            time.sleep(start - now)
+
+
+class StubBackend:
+    """Offline backend answering from a fixed table (KNOWN_COORDINATES by default).
+
+    `delay` simulates the latency of a network geocoder, for benchmarks.
+    """
+    name = 'stub'
+    max_workers = None
+
+    def __init__(self, coordinates=None, delay=0.0):
+        self.coordinates = {cache_key(k): v for k, v in (coordinates or KNOWN_COORDINATES).items()}
+        self.delay = delay
+
+    def geocode(self, name):
+        if self.delay:
+            time.sleep(self.delay)
+        return self.coordinates.get(cache_key(name))
+
+
+class NominatimBackend:
+    """Nominatim through geopy, rate limited (1 request / 1.1 s: the public server's usage policy).
+
+    A self-hosted server (`domain`, NOMINATIM_DOMAIN) has no such policy: set
+    NOMINATIM_DELAY=0 and let batch_geocoder run several requests at once.
+    Errors are raised, never swallowed: GeoCache must not record them as misses.
+    """
+    name = 'nominatim'
+
+    def __init__(self, user_agent='geo_app_analysis', domain=None, min_delay_seconds=None):
+        from geopy.geocoders import Nominatim
+        domain = domain or os.environ.get('NOMINATIM_DOMAIN')
+        if min_delay_seconds is None:
+            min_delay_seconds = float(os.environ.get('NOMINATIM_DELAY', 1.1))
+        kwargs = {'domain': domain} if domain else {}
+        self._geocoder = Nominatim(user_agent=user_agent, **kwargs)
+        self._throttle = Throttle(min_delay_seconds)
+        # The public server allows one request at a time
+        self.max_workers = None if domain else 1
+
+    def geocode(self, name):
+        self._throttle.wait()
+        location = self._geocoder.geocode(name)
+        return (location.latitude, location.longitude) if location else None
+
+
+class FileGazetteerBackend:
+    """Local gazetteer: a CSV with name, latitude and longitude columns (e.g. an earlier geocoded export)."""
+    name = 'file'
+    max_workers = None
+
+    def __init__(self, path=None, name_column='Location', lat_column='Latitude', lon_column='Longitude'):
+        self.path = path or os.environ.get('GAZETTEER_FILE', 'aggregated_locations_geocoded.csv')
+        self.coordinates = {}
+        with open(self.path, encoding='utf-8-sig', newline='') as f:
+            for row in csv.DictReader(f):
+                if row.get(lat_column) and row.get(lon_column):
+                    self.coordinates.setdefault(cache_key(row[name_column]),
+                                                (float(row[lat_column]), float(row[lon_column])))
+
+    def geocode(self, name):
+        return self.coordinates.get(cache_key(name))
+
+
+def _geonames_backend(**kwargs):
+    # gazetteer imports this module (cache_key), hence the late import
+    from gazetteer import GazetteerBackend
+    return GazetteerBackend(**kwargs)
+
+
+BACKENDS = {
+    'nominatim': NominatimBackend,
+    'file': FileGazetteerBackend,
+    'geonames': _geonames_backend,
+    'stub': StubBackend,
+}
+
+
+def make_backend(name=GEOCODER, **kwargs):
+    try:
+        return BACKENDS[name](**kwargs)
+    except KeyError:
+        raise ValueError(f"Unknown geocoder {name!r} (expected one of {sorted(BACKENDS)})") from None
+
+
+class GeoCache:
+    """SQLite-backed name -> (lat, lon) cache in front of a geocoding backend.
+
+    backend -- object with `.name` and `.geocode(name) -> (lat, lon) | None`;
+               created from GEOCODER on first use when not given
+    offline -- never call the backend
+    """
+
+    def __init__(self, path=GEOCACHE_PATH, backend=None, offline=OFFLINE):
+        self.path = path
+        self.offline = offline
+        self._backend = backend
+        self.db = sqlite3.connect(path)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS places (
+                key TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                latitude REAL,
+                longitude REAL,
+                source TEXT NOT NULL,
+                updated REAL NOT NULL
+            )""")
+        self.db.commit()
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = make_backend()
+        return self._backend
+
+    @property
+    def backend_name(self):
+        """Name of the backend in use, without creating it."""
+        return self._backend.name if self._backend is not None else GEOCODER
+
+    def get(self, name, source=None):
+        """Cached answer: (lat, lon), (None, None) for a remembered miss, or None if never looked up.
+
+        With `source`, a miss recorded by another backend counts as never looked up.
+        """
+        row = self.db.execute("SELECT latitude, longitude, source FROM places WHERE key = ?",
+                              (cache_key(name),)).fetchone()
+        if row is None or row[0] is None and source is not None and row[2] != source:
+            return None
+        return (row[0], row[1])
+
+    def put(self, name, coords, source, commit=True):
+        """Record `coords` ((lat, lon) or None for "not found") for `name`."""
+        lat, lon = coords if coords else (None, None)
+        self.db.execute(
+            "INSERT OR REPLACE INTO places (key, name, latitude, longitude, source, updated) VALUES (?, ?, ?, ?, ?, ?)",
+            (cache_key(name), name, lat, lon, source, time.time()))
+        if commit:
+            self.db.commit()
+
+    def commit(self):
+        self.db.commit()
+
+    def seed(self, coordinates, source):
+        """Add a {name: (lat, lon)} mapping (e.g. an earlier CSV export) without overwriting cached answers."""
+        now = time.time()
+        self.db.executemany(
+            "INSERT OR IGNORE INTO places (key, name, latitude, longitude, source, updated) VALUES (?, ?, ?, ?, ?, ?)",
+            [(cache_key(name), name, lat, lon, source, now) for name, (lat, lon) in coordinates.items()])
+        self.db.commit()
+
+    def resolve_local(self, name, source=None):
+        """Answer from the cache or KNOWN_COORDINATES, None if only the backend can tell.
+
+        Cached misses only count when `source` (by default the backend in use) recorded them.
+        """
+        cached = self.get(name, source or self.backend_name)
+        if cached is not None:
+            return cached
+        key = cache_key(name)
+        if key in _KNOWN:
+            self.put(name, _KNOWN[key], 'known')
+            return _KNOWN[key]
+        if not key:
+            return (None, None)
+        return None
+
+    def lookup(self, name):
+        """(lat, lon) of `name`, (None, None) if it cannot be placed."""
+        local = self.resolve_local(name)
+        if local is not None:
+            return local
+        if self.offline:
+            return (None, None)
+        try:
+            coords = self.backend.geocode(name)
+        except Exception as e:
+            # Network / quota errors are not "not found": leave the name uncached
+            print(f"Error geocoding {name}: {e}")
+            return (None, None)
+        self.put(name, coords, self.backend.name)
+        return coords if coords else (None, None)
+
+    def lookup_many(self, names):
+        return {name: self.lookup(name) for name in names}
+
+    def stats(self):
+        """{source: (hits, misses)} of the cached entries."""
+        rows = self.db.execute(
+            "SELECT source, SUM(latitude IS NOT NULL), SUM(latitude IS NULL) FROM places GROUP BY source")
+        return {source: (hits, misses) for source, hits, misses in rows}
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
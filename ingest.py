@@ -0,0 +1,288 @@
+"""Append new articles to the corpus and update only the affected metadata counters.
+
+The `metadata` block holds kws/loc/org/per/num counters for 'all', each year,
+each month and each day. Adding a day of articles only touches four buckets
+(all, year, month, day), so their per-article counts are merged in instead of
+recounting the whole history.
+
+    python ingest.py new_articles.json                  append into CORPUS_PATH
+    python ingest.py new_articles.json --corpus corpus_store
+    python ingest.py --verify 2025-10-12                recount one bucket and diff it
+
+`new_articles.json` is either a list of articles (placed by their `date` field,
+or by --date) or a dump-shaped {"data": {year: {month: {day: [...]}}}} file.
+With a JSON dump the file is rewritten in one streaming pass (articles of the
+other days are copied as raw text, never decoded). With a partitioned store
+the new articles go to a new part file of their partition.
+"""
+import argparse
+import datetime
+import io
+import json
+import os
+import sys
+
+from annotations import decode_field
+from corpus import CORPUS_PATH, JsonStream, iter_articles, open_corpus, read_metadata
+
+COUNTER_FIELDS = ['kws', 'loc', 'org', 'per']
+LEVELS = ['all', 'year', 'month', 'day']
+
+
+def day_key(date):
+    """'2025-07-03' -> ('2025', '7', '3'), the key format used by the dumps."""
+    d = datetime.date.fromisoformat(date)
+    return str(d.year), str(d.month), str(d.day)
+
+
+def load_new_articles(path, date=None):
+    """Return {(year, month, day): [articles]} from a list file or a dump-shaped file."""
+    with open_corpus(path) as f:
+        first = JsonStream(f).peek()
+    groups = {}
+    if first == '[':
+        with open_corpus(path) as f:
+            for article in JsonStream(f).iter_array():
+                key = day_key(date or article['date'])
+                groups.setdefault(key, []).append(article)
+    else:
+        for year, month, day, article in iter_articles(path):
+            groups.setdefault((year, month, day), []).append(article)
+    return groups
+
+
+def new_bucket():
+    bucket = {field: {} for field in COUNTER_FIELDS}
+    bucket['num'] = 0
+    return bucket
+
+
+def merge_counts(bucket, articles):
+    """Add the per-article counters of `articles` into a metadata bucket."""
+    for field in COUNTER_FIELDS:
+        counts = bucket.setdefault(field, {})
+        for article in articles:
+            for term, n in (decode_field(article.get(field)) or {}).items():
+                counts[term] = counts.get(term, 0) + n
+    bucket['num'] = bucket.get('num', 0) + len(articles)
+    return bucket
+
+
+def get_bucket(metadata, level, year=None, month=None, day=None, create=False):
+    """metadata['all'], metadata['year'][y], metadata['month'][y][m] or metadata['day'][y][m][d]."""
+    keys = {'all': [], 'year': [year], 'month': [year, month], 'day': [year, month, day]}[level]
+    node = metadata.setdefault(level, {}) if create else metadata.get(level)
+    for key in keys:
+        if node is None:
+            return None
+        if create:
+            node = node.setdefault(key, {})
+        else:
+            node = node.get(key)
+    if create and not node:
+        node.update(new_bucket())
+    return node
+
+
+def update_metadata(metadata, groups):
+    """Merge the counts of the new articles into the all/year/month/day buckets."""
+    for (year, month, day), articles in groups.items():
+        for level in LEVELS:
+            merge_counts(get_bucket(metadata, level, year, month, day, create=True), articles)
+    return metadata
+
+
+def existing_urls(path, days):
+    """URLs already stored for each of `days`, reading only those days.
+
+    The other days of a JSON dump are skipped undecoded; in a partitioned
+    store only the month partitions of `days` are opened.
+    """
+    days = set(days)
+    urls = {key: set() for key in days}
+    for year, month, day, article in iter_articles(path, days=days):
+        urls[(year, month, day)].add(article.get('url'))
+    return urls
+
+
+def drop_known(groups, known):
+    """Remove the articles whose URL is already in the corpus for that day."""
+    fresh = {}
+    for key, articles in groups.items():
+        seen = set(known.get(key, ()))
+        kept = []
+        for article in articles:
+            url = article.get('url')
+            if url not in seen:
+                kept.append(article)
+                seen.add(url)
+        if kept:
+            fresh[key] = kept
+    return fresh
+
+
+def _dump(value):
+    # Same formatting as the scraped dumps (ASCII escapes, default separators)
+    return json.dumps(value)
+
+
+def _merge_object(stream, out, node):
+    """Copy the object at the stream position, splicing in `node` (nested dict of day lists)."""
+    out.write('{')
+    remaining = dict(node)
+    first = True
+    for key in stream.iter_object():
+        out.write(('' if first else ', ') + _dump(key) + ': ')
+        first = False
+        if key not in remaining:
+            stream.skip_value(out)
+        elif isinstance(remaining[key], list):
+            _append_to_list(stream, out, remaining.pop(key))
+        else:
+            _merge_object(stream, out, remaining.pop(key))
+    for key, value in remaining.items():
+        out.write(('' if first else ', ') + _dump(key) + ': ' + _dump(value))
+        first = False
+    out.write('}')
+
+
+def _append_to_list(stream, out, items):
+    raw = io.StringIO()
+    stream.skip_value(raw)
+    head = raw.getvalue().rstrip()[:-1].rstrip()  # the stored list without its ']'
+    out.write(head)
+    separator = ', ' if head != '[' else ''
+    for item in items:
+        out.write(separator + _dump(item))
+        separator = ', '
+    out.write(']')
+
+
+def ingest_json(path, groups):
+    """Rewrite the JSON dump with the new articles and updated counters, in one streaming pass."""
+    metadata = update_metadata(read_metadata(path, default={}), groups)
+    tree = {}
+    for (year, month, day), articles in groups.items():
+        tree.setdefault(year, {}).setdefault(month, {})[day] = articles
+
+    tmp = path + '.tmp'
+    with open_corpus(path) as f, open(tmp, 'w', encoding='utf-8') as out:
+        stream = JsonStream(f)
+        out.write('{')
+        written = set()
+        for key in stream.iter_object():
+            out.write(('' if not written else ', ') + _dump(key) + ': ')
+            written.add(key)
+            if key == 'metadata':
+                stream.skip_value()
+                out.write(_dump(metadata))
+            elif key == 'data':
+                _merge_object(stream, out, tree)
+            else:
+                stream.skip_value(out)
+        for key, value in (('metadata', metadata), ('data', tree)):
+            if key not in written:
+                out.write(('' if not written else ', ') + _dump(key) + ': ' + _dump(value))
+                written.add(key)
+        out.write('}')
+    os.replace(tmp, path)
+
+
+def ingest_store(store_dir, groups):
+    """Append the new articles as new part files and update the store's counters."""
+    import corpus_store
+
+    by_partition = {}
+    for (year, month, day), articles in sorted(groups.items()):
+        by_partition.setdefault((year, month), []).append((day, articles))
+    for (year, month), days in by_partition.items():
+        # Continue the per-day article numbering of what is already stored
+        taken = {}
+        if os.path.isdir(corpus_store.partition_dir(store_dir, year, month)):
+            stored = corpus_store.scan_store(store_dir, columns=['day'], years=[year], months=[month])
+            for d in stored.column('day').to_pylist():
+                taken[str(d)] = taken.get(str(d), 0) + 1
+        rows = []
+        for day, articles in days:
+            for i, article in enumerate(articles, start=taken.get(day, 0) + 1):
+                rows.append(corpus_store.article_to_row(day, i, article))
+        corpus_store.write_partition(store_dir, year, month, rows)
+
+    metadata = update_metadata(corpus_store.read_metadata(store_dir, default={}), groups)
+    metadata_path = os.path.join(store_dir, corpus_store.METADATA_FILE)
+    with open(metadata_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, ensure_ascii=False)
+    os.replace(metadata_path + '.tmp', metadata_path)
+
+
+def ingest(corpus_path, groups):
+    """Add `groups` ({(year, month, day): [articles]}) to the corpus; return the number added."""
+    groups = drop_known(groups, existing_urls(corpus_path, list(groups)))
+    if not groups:
+        return 0
+    if os.path.isdir(corpus_path):
+        ingest_store(corpus_path, groups)
+    else:
+        ingest_json(corpus_path, groups)
+    return sum(len(articles) for articles in groups.values())
+
+
+def parse_bucket(spec):
+    """'all', '2025', '2025-10' or '2025-10-12' -> (level, year, month, day)."""
+    if spec == 'all':
+        return 'all', None, None, None
+    parts = [str(int(p)) for p in spec.split('-')]
+    level = LEVELS[len(parts)]
+    return (level, *parts, *[None] * (3 - len(parts)))
+
+
+def verify_bucket(corpus_path, spec):
+    """Recount one bucket from the articles; return {field: {term: (stored, recounted)}} of differences."""
+    level, year, month, day = parse_bucket(spec)
+    recount = new_bucket()
+    articles = [
+        article for y, m, d, article in iter_articles(corpus_path, years=None if year is None else {year})
+        if (month is None or m == month) and (day is None or d == day)
+    ]
+    merge_counts(recount, articles)
+
+    keys = [k for k in (level, year, month, day) if k is not None]
+    stored = read_metadata(corpus_path, *keys) or new_bucket()
+
+    diffs = {}
+    for field in COUNTER_FIELDS:
+        a, b = stored.get(field, {}), recount[field]
+        field_diffs = {t: (a.get(t, 0), b.get(t, 0)) for t in set(a) | set(b) if a.get(t, 0) != b.get(t, 0)}
+        if field_diffs:
+            diffs[field] = field_diffs
+    if stored.get('num', 0) != recount['num']:
+        diffs['num'] = (stored.get('num', 0), recount['num'])
+    return diffs
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Append new articles and update the metadata counters.")
+    parser.add_argument('articles', nargs='?', help="JSON file with the new articles")
+    parser.add_argument('--corpus', default=CORPUS_PATH, help="JSON dump or partitioned store to update")
+    parser.add_argument('--date', help="YYYY-MM-DD to file the articles under (default: their `date` field)")
+    parser.add_argument('--verify', metavar='BUCKET', help="'all', YYYY, YYYY-MM or YYYY-MM-DD to recount and diff")
+    args = parser.parse_args()
+
+    if args.verify:
+        diffs = verify_bucket(args.corpus, args.verify)
+        if not diffs:
+            print(f"Bucket {args.verify}: stored counters match the articles.")
+            sys.exit(0)
+        for field, field_diffs in diffs.items():
+            if field == 'num':
+                print(f"num: stored {field_diffs[0]}, recounted {field_diffs[1]}")
+                continue
+            print(f"{field}: {len(field_diffs)} differing terms")
+            for term, (stored, recounted) in sorted(field_diffs.items())[:20]:
+                print(f"  {term!r}: stored {stored}, recounted {recounted}")
+        sys.exit(1)
+
+    if not args.articles:
+        parser.error("give a file of articles to ingest, or --verify BUCKET")
+    added = ingest(args.corpus, load_new_articles(args.articles, args.date))
+    print(f"Added {added} new article(s) to {args.corpus}.")
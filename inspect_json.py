@@ -1,26 +1,24 @@
-import json
 import itertools
 import sys
 
+from corpus import CORPUS_PATH, read_metadata, top_level_keys
+
 # Set up clean output
 def print_clean(msg):
     sys.stdout.write(msg + '\n')
     sys.stdout.flush()
 
 try:
-    with open('donne.json', 'r', encoding='utf-8') as f:
-        data = json.load(f)
-        
-    print_clean(f"Top level keys: {list(data.keys())}")
-    
-    if 'metadata' in data:
-        print_clean(f"metadata keys: {list(data['metadata'].keys())}")
-        if 'all' in data['metadata']:
-            print_clean(f"metadata['all'] keys: {list(data['metadata']['all'].keys())}")
-            if 'kws' in data['metadata']['all']:
-                kws = data['metadata']['all']['kws']
-                print_clean(f"Total keywords: {len(kws)}")
-                print_clean(f"First 5 kws: {dict(itertools.islice(kws.items(), 5))}")
+    print_clean(f"Top level keys: {top_level_keys(CORPUS_PATH)}")
+
+    # Only metadata['all'] is decoded, not the per-year/month/day counters
+    all_md = read_metadata(CORPUS_PATH, 'all')
+    if all_md is not None:
+        print_clean(f"metadata['all'] keys: {list(all_md.keys())}")
+        if 'kws' in all_md:
+            kws = all_md['kws']
+            print_clean(f"Total keywords: {len(kws)}")
+            print_clean(f"First 5 kws: {dict(itertools.islice(kws.items(), 5))}")
     
 except Exception as e:
     print_clean(f"Error: {e}")
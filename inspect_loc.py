@@ -1,27 +1,25 @@
-import json
 import itertools
 import sys
 
+from corpus import CORPUS_PATH, iter_articles, read_metadata
+
 output_file = 'loc_structure_info.txt'
 
 try:
-    with open('donne.json', 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
+    locs = read_metadata(CORPUS_PATH, 'all', 'loc')
+
     with open(output_file, 'w', encoding='utf-8') as out:
-        if 'metadata' in data and 'all' in data['metadata'] and 'loc' in data['metadata']['all']:
-            locs = data['metadata']['all']['loc']
+        if locs is not None:
             out.write(f"Total locations in metadata['all']['loc']: {len(locs)}\n")
             out.write(f"First 50 locs: {dict(itertools.islice(locs.items(), 50))}\n")
         else:
             out.write("No metadata['all']['loc'] found.\n")
 
-        # Check data['data']
-        if 'data' in data:
-             out.write(f"data['data'] keys: {list(data['data'].keys())[:20]}\n")
-             # It seems data['data'] might be a dict of ids to docs?
-             first_key = next(iter(data['data']))
-             out.write(f"Sample item from data['data'] (key={first_key}): {str(data['data'][first_key])[:500]}\n")
+        # Check data['data'] : only the first article is decoded
+        first = next(iter_articles(CORPUS_PATH), None)
+        if first is not None:
+             year, month, day, doc = first
+             out.write(f"Sample item from data['data'] (key={year}/{month}/{day}): {str(doc)[:500]}\n")
 
 except Exception as e:
     with open(output_file, 'w', encoding='utf-8') as out:
@@ -1,4 +1,4 @@
-import json
+from corpus import CORPUS_PATH, iter_articles, read_metadata
 
 def print_structure(d, indent=0, max_depth=3):
     if indent > max_depth:
@@ -18,37 +18,35 @@ def print_structure(d, indent=0, max_depth=3):
                 print("  " * (indent+1) + f"[List length: {len(v)}]")
 
 try:
-    with open('donne.json', 'r', encoding='utf-8') as f:
-        data = json.load(f)
-        
-        print("--- Metadata keys ---")
-        if 'metadata' in data:
-            print(f"Metadata top keys: {list(data['metadata'].keys())}")
-            if 'year' in data['metadata']:
-                print(f"Years in metadata: {list(data['metadata']['year'].keys())}")
-                # Check inside a year
-                y = list(data['metadata']['year'].keys())[0]
-                print(f"Keys inside metadata['year']['{y}']: {list(data['metadata']['year'][y].keys())}")
-                if 'loc' in data['metadata']['year'][y]:
-                     print(f"Found locations in year {y} metadata! Count: {len(data['metadata']['year'][y]['loc'])}")
-            
-        print("\n--- Data keys ---")
-        if 'data' in data:
-            print(list(data['data'].keys()))
-            # Check if Data has years
-            years = [k for k in data['data'].keys() if k.isdigit()]
-            if years:
-                y = years[0]
-                print(f"Inside Year {y}: {list(data['data'][y].keys())}")
-                # And inside month
-                m = list(data['data'][y].keys())[0]
-                print(f"Inside Month {m}: Type is {type(data['data'][y][m])}")
-                if isinstance(data['data'][y][m], dict):
-                     print(f"Keys: {list(data['data'][y][m].keys())}")
-                elif isinstance(data['data'][y][m], list):
-                     print(f"List length: {len(data['data'][y][m])}")
-                     if len(data['data'][y][m]) > 0:
-                         print(f"First item keys: {data['data'][y][m][0].keys()}")
+    print("--- Metadata keys ---")
+    md_years = read_metadata(CORPUS_PATH, 'year')
+    if md_years is not None:
+        print(f"Years in metadata: {list(md_years.keys())}")
+        # Check inside a year
+        y = list(md_years.keys())[0]
+        print(f"Keys inside metadata['year']['{y}']: {list(md_years[y].keys())}")
+        if 'loc' in md_years[y]:
+             print(f"Found locations in year {y} metadata! Count: {len(md_years[y]['loc'])}")
+
+    print("\n--- Data keys ---")
+    # Rebuild data[year][month] -> number of days/docs from the article stream
+    tree = {}
+    first_doc = None
+    for year, month, day, doc in iter_articles(CORPUS_PATH):
+        tree.setdefault(year, {}).setdefault(month, set()).add(day)
+        if first_doc is None:
+            first_doc = doc
+    print(list(tree.keys()))
+    # Check if Data has years
+    years = [k for k in tree.keys() if k.isdigit()]
+    if years:
+        y = years[0]
+        print(f"Inside Year {y}: {list(tree[y].keys())}")
+        # And inside month
+        m = list(tree[y].keys())[0]
+        print(f"Days inside Month {m}: {sorted(tree[y][m], key=int)}")
+        if first_doc is not None:
+            print(f"First item keys: {first_doc.keys()}")
 
 except Exception as e:
     print(f"Error: {e}")
@@ -0,0 +1,28 @@
+"""Deferred imports of the heavy libraries, for a fast dashboard start.
+
+    pd = lazy_import('pandas')      # nothing imported yet
+    pd.DataFrame(...)               # pandas is imported here, once
+
+The stand-in resolves every attribute through importlib.import_module, which
+holds the module's import lock: Flask serves callbacks from several threads
+and two of them may touch the module first at the same time (the stdlib
+LazyLoader is not thread-safe before Python 3.12).
+"""
+import importlib
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Stand-in for module `name`, imported on first attribute access."""
+
+    def __getattr__(self, attr):
+        return getattr(importlib.import_module(self.__name__), attr)
+
+    def __dir__(self):
+        return dir(importlib.import_module(self.__name__))
+
+
+def lazy_import(name):
+    """The module itself if already imported, else a LazyModule."""
+    return sys.modules.get(name) or LazyModule(name)
@@ -0,0 +1,81 @@
+"""Location-indexed view of the geocoded location tables for the Streamlit app.
+
+aggregated_locations_geocoded.csv (Location, Count, Latitude, Longitude) and
+locations_by_year.csv (Year, Location, ...) are indexed once, so a rerun of
+app.py only renders:
+
+    layer = LocationLayer(df_map, df_year)
+    layer.frame(2025)                  # the year slice, sorted by Count, shared (no copy)
+    layer.stats('Moscou', 2025)        # (count, rank) in that slice, rank 1 = most cited
+    layer.series('Moscou')             # Year, Count of one location, sorted by Year
+    layer.top_series(5)                # yearly rows of the 5 most cited locations overall
+
+Frames are sorted by Count (descending, stable, so equal counts keep the file
+order) and carry a 1-based Rank column. They are shared between reruns:
+callers must not modify them in place.
+"""
+import numpy as np
+import pandas as pd
+
+
+def _ranked(df):
+    df = df.sort_values(by='Count', ascending=False, kind='stable').reset_index(drop=True)
+    df['Rank'] = range(1, len(df) + 1)
+    return df
+
+
+def _stats_index(df):
+    return dict(zip(df['Location'], zip(df['Count'].tolist(), df['Rank'].tolist())))
+
+
+class LocationLayer:
+    """Ranked frames, (count, rank) dictionaries and per-location series, built once."""
+
+    def __init__(self, df_map, df_year=None):
+        df_year = df_year if df_year is not None else pd.DataFrame()
+        self.global_frame = _ranked(df_map) if not df_map.empty else df_map
+        self.years = sorted(df_year['Year'].unique()) if not df_year.empty else []
+        self.year_frames = {year: _ranked(group) for year, group in df_year.groupby('Year', sort=True)} \
+            if not df_year.empty else {}
+
+        self._stats = {None: _stats_index(self.global_frame) if not df_map.empty else {}}
+        self._stats.update((year, _stats_index(frame)) for year, frame in self.year_frames.items())
+
+        # Yearly rows grouped by location (sorted by Year inside): a series is one iloc slice
+        self._series = {}
+        self._by_location = df_year
+        if not df_year.empty:
+            codes, locations = pd.factorize(df_year['Location'])
+            order = np.lexsort((df_year['Year'].to_numpy(), codes))
+            self._by_location = df_year.iloc[order].reset_index(drop=True)
+            codes = codes[order]
+            starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+            stops = np.r_[starts[1:], len(codes)]
+            self._series = dict(zip(locations[codes[starts]], zip(starts.tolist(), stops.tolist())))
+        self._empty_series = df_year.iloc[0:0]
+        self._top = {}
+
+    def frame(self, year=None):
+        """Locations of `year` (None: all years cumulated), most cited first."""
+        if year is None:
+            return self.global_frame
+        return self.year_frames.get(year, self.global_frame.iloc[0:0])
+
+    def stats(self, location, year=None):
+        """(count, rank) of `location` in frame(year), or None if it is not there."""
+        return self._stats.get(year, {}).get(location)
+
+    def series(self, location):
+        """Yearly rows (Year, Count, ...) of `location`, sorted by Year; empty if unknown."""
+        if location not in self._series:
+            return self._empty_series
+        start, stop = self._series[location]
+        return self._by_location.iloc[start:stop]
+
+    def top_series(self, n=5):
+        """Yearly rows of the `n` most cited locations overall (most cited first, each sorted by Year)."""
+        if n not in self._top:
+            top = [self.series(location) for location in self.global_frame['Location'].head(n)
+                   if location in self._series]
+            self._top[n] = pd.concat(top, ignore_index=True) if top else self._empty_series
+        return self._top[n]
@@ -0,0 +1,106 @@
+"""Single-pass multi-pattern location matcher (Aho-Corasick).
+
+The automaton is built once from the whole location vocabulary and finds every
+vocabulary entry occurring in a text in one left-to-right scan, whatever the
+number of entries. Texts and names go through the same normalisation
+(typographic apostrophes -> "'", accents stripped, hyphens and runs of
+whitespace -> one space) and a match only counts on word boundaries, so
+"Mali" is not found in "Animalier" while "Côte d’Ivoire" matches "Cote d'Ivoire".
+"""
+import unicodedata
+from collections import deque
+
+from corpus import CORPUS_PATH, read_metadata
+
+MIN_LENGTH = 2
+_APOSTROPHES = {ord(c): "'" for c in '’‘`´ʼ′'}
+_SPACES = {ord(c): ' ' for c in '-‐‑–— \t\r\n'}
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == '_'
+
+
+def normalize(text, casefold=False):
+    """Normalise apostrophes, accents, hyphens and whitespace; optionally casefold."""
+    text = text.translate(_APOSTROPHES).translate(_SPACES)
+    text = ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+    text = ' '.join(text.split())
+    return text.casefold() if casefold else text
+
+
+class LocationMatcher:
+    """Aho-Corasick automaton over a vocabulary of place names.
+
+    casefold   -- match regardless of case (off by default: place names are
+                  proper nouns and the vocabulary holds common words like "Centre")
+    min_length -- normalised names shorter than this are ignored ("A", "I")
+    """
+
+    def __init__(self, names, casefold=False, min_length=MIN_LENGTH):
+        self.casefold = casefold
+        # Several raw names can share one normalised form (Côte d’Ivoire / Côte d'Ivoire)
+        self.names = {}
+        for name in names:
+            key = normalize(str(name), casefold)
+            if len(key) >= min_length:
+                self.names.setdefault(key, []).append(name)
+        self._build(list(self.names))
+
+    @classmethod
+    def from_metadata(cls, path=CORPUS_PATH, extra_names=(), **kwargs):
+        """Automaton over metadata['all']['loc'] (plus `extra_names`)."""
+        vocabulary = list(read_metadata(path, 'all', 'loc', default={}))
+        return cls(vocabulary + list(extra_names), **kwargs)
+
+    def _build(self, keys):
+        goto = [{}]
+        outputs = [()]
+        for key in keys:
+            state = 0
+            for char in key:
+                nxt = goto[state].get(char)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][char] = nxt
+                    goto.append({})
+                    outputs.append(())
+                state = nxt
+            outputs[state] = (key,)
+
+        # Breadth-first failure links; each state inherits the outputs of its fallback
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in goto[state].items():
+                queue.append(nxt)
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[nxt] = goto[fallback].get(char, 0)
+                outputs[nxt] = outputs[nxt] + outputs[fail[nxt]]
+        self._goto, self._fail, self._outputs = goto, fail, outputs
+
+    def finditer(self, text):
+        """Yield (start, end, key) for each whole-word match in the normalised `text`."""
+        text = normalize(text, self.casefold)
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        last = len(text) - 1
+        state = 0
+        for i, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not outputs[state]:
+                continue
+            if i < last and _is_word_char(text[i + 1]):
+                continue
+            for key in outputs[state]:
+                start = i - len(key) + 1
+                if start == 0 or not _is_word_char(text[start - 1]):
+                    yield start, i + 1, key
+
+    def find(self, text):
+        """Set of the original vocabulary names found in `text`."""
+        return {name for _, _, key in self.finditer(text) for name in self.names[key]}
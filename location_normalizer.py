@@ -0,0 +1,84 @@
+"""Normalisation of raw location names (the rules of generate_assets.clean_location).
+
+The rules are data, not code:
+    ELISIONS      dropped after apostrophes are unified (so "Côte d’Ivoire" and
+                  "Côte d'Ivoire" both become "Côte Ivoire")
+    ALIASES       ordered substring rewrites (spelling variants, aliases)
+    NOISE_PATTERNS fragments removed from the name (institutions, weapons, glitches)
+    STOP_NAMES    results that are not places
+
+Each table is compiled once into a single regex alternation, so a name costs
+two regex passes instead of ~15 str.replace and ~60 re.sub calls, and results
+are memoised. normalize_series() normalises a pandas column through its
+unique values only.
+"""
+import re
+from functools import lru_cache
+
+ELISIONS = ["l'", "d'"]
+
+# (variant, canonical), applied left to right: the first alternative wins at a position
+ALIASES = [
+    ("Johannesbourg", "Johannesburg"),
+    ("État africain", "Afrique"), ("États africains", "Afrique"), ("État africains", "Afrique"),
+    ("Etat russe", "Russie"),
+    ("Donetsk-Sud", "Donetsk"),
+    ("Tbilissi-Batoumi-Istanbul-Izmail-Odessa", "Tbilissi"),
+    ("Etat des Comores", "Comores"),
+    ("État sénégalais", "Sénégal"),
+    ("PAA", "Abidjan"),
+    ("republique populaire de ", ""),
+]
+
+NOISE_PATTERNS = [
+    r"\bSPIEF\b", r"\bde TebbouneAu\b", r"\?Alors\b", r"-ndlr\b", r"\bEtat des Comores\b",
+    r"\bRussie-Afrique\b", r"\bPrésident russe\b", r"\"marche\"\"\"", r"\bM\.Ouchakov\b",
+    r"\bM\.Souakri\b", r"\bpartenariat russo-algérien\b", r"\bhub d'Alger\b", r"\bpagailleLes\b",
+    r"\bAl-Arabiya\b", r"\baéroport de Vnoukovo\b", r"\bNOS\b", r"\bFMI\)\.Le pays des pharaons\b",
+    r"\bAllemagne\)\.Selon\b", r"\bDéfense russe\b", r"\bDéfense\b", r"\bPentagone\b",
+    r"\bAl-Qaïda\*\.\b", r"\bCaucase\b", r"\bKremlin\b", r"\bÉlysée\b", r"\bMaison Blanche\b",
+    r"\bMaison-Blanche\b", r"\bRoyaume\b", r"\bÉtats\b", r"\bEtat\b", r"\bEco\b",
+    r"\bAdossée\b", r"️🪆\b", r"\bVia\b", r"\bWSJ\b", r"\bFranc\b", r"\bSalves\b",
+    r"\bsanctionsLes\b", r"\bfennecs\b", r"\bBRICS\.Visite\b", r"\bUS\b", r"\bTerre\b",
+    r"\bSoleil\b", r"\bLune\b", r"\bAlliance\b", r"\bOccident\b", r"\bMoyen-Orient\b",
+    r"\bAfrique du Nord\b", r"\bAmérique\b", r"\bCentre\b", r"\bEurope\b", r"\bD-30\.Une\b",
+    r"\bD-20\b", r"\bMsta-B\b", r"\bGrad\b", r"\bAkatsiya\b", r"\bKrab\b",
+    r"\bPantsir-S\.Missiles\b", r"\bKinjal\b", r"\bbarrage de Kakhovka\b", r"\bbatailleLa Russie\b",
+    r"\bPays africains\b", r"\bAfrique du Sud\b", r"\bÉtat africain\b", r"\bÉtats du Moyen-Orient\b",
+]
+
+STOP_NAMES = {
+    'a', 'i', 'ile', 'mer', 'nord', 'sud', 'est', 'ouest', 'soud', 'congo', 'kazakhstan', 'kirghizstan',
+    'bengladesh', 'afghanistan', 'indonesie', 'mexique', 'nicaragua', 'pakistan', 'thailande', 'uruguay',
+    'venezuela', 'zimbabwe', 'bahrein', 'afrique',
+}
+
+_APOSTROPHES = str.maketrans({'’': "'"})
+_ELISION_RE = re.compile('|'.join(re.escape(e) for e in ELISIONS))
+_ALIAS_MAP = dict(ALIASES)
+_ALIAS_RE = re.compile('|'.join(re.escape(variant) for variant, _ in ALIASES))
+# Patterns are removed one after the other in the original rules, with the
+# result stripped in between: the alternation also eats the surrounding spaces
+_NOISE_RE = re.compile('(?i)(?:' + '|'.join(NOISE_PATTERNS) + ')')
+# Everything after the first of these separators is dropped
+_TAIL_RE = re.compile(r'[,)?-].*', re.S)
+
+
+@lru_cache(maxsize=None)
+def normalize_location(loc):
+    """Canonical name for a raw location, or None if it is noise / not a place."""
+    loc = _ELISION_RE.sub('', str(loc).translate(_APOSTROPHES))
+    loc = _ALIAS_RE.sub(lambda m: _ALIAS_MAP[m.group()], loc)
+    loc = _NOISE_RE.sub('', loc).strip()
+    loc = _TAIL_RE.sub('', loc).strip()
+
+    if len(loc) < 2 or loc.lower() in STOP_NAMES:
+        return None
+
+    return loc.replace('"', '').strip()
+
+
+def normalize_series(series):
+    """Vectorised normalize_location over a pandas Series (each distinct value is normalised once)."""
+    uniques = series.dropna().unique()
+    return series.map({value: normalize_location(value) for value in uniques})
@@ -0,0 +1,315 @@
+"""Incremental runner for the scripts that produce the derived data files.
+
+Each stage declares the files it reads and writes. A stage is skipped when the
+content hash of its inputs (its own script included) matches the previous run
+and all its outputs still exist. Stages whose inputs come from other stages
+wait for them; independent stages run in parallel. The output of every stage
+is printed as it comes, each line prefixed with the stage name.
+
+Stages geocoding the whole location vocabulary (geocodes=True) are refused
+with the public Nominatim server (GEOCODER=nominatim without
+NOMINATIM_DOMAIN): at 1.1 s per request they would run for hours. Use
+GEOCODER=geonames (offline, python gazetteer.py), a self-hosted server,
+GEOCODE_OFFLINE=1 (cache only), or --allow-public-nominatim.
+
+    python pipeline.py                 run what is out of date
+    python pipeline.py extract_context only this stage (and what it depends on)
+    python pipeline.py --force         rebuild everything
+    python pipeline.py --dry-run       show what would run
+"""
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+from corpus import CORPUS_PATH
+from geocache import GEOCODER, OFFLINE
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+STATE_FILE = os.path.join(ROOT, '.pipeline_state.json')
+
+
+@dataclass
+class Stage:
+    name: str
+    command: list
+    inputs: list
+    outputs: list
+    deps: list = field(default_factory=list)
+    geocodes: bool = False      # geocodes the whole location vocabulary
+
+
+def python_stage(name, script, inputs, outputs, args=(), geocodes=False):
+    """A stage running `python script args...`; the script itself is an input."""
+    return Stage(name, [sys.executable, script, *args], [script, *inputs], outputs, geocodes=geocodes)
+
+
+STAGES = [
+    python_stage('generate_assets', 'generate_assets.py',
+                 inputs=['localisations.csv', 'location_normalizer.py', 'geocache.py'],
+                 outputs=['aggregated_locations.csv', 'top20_bar_chart.png', 'top10_pie_chart.png',
+                          'location_map_new.json']),
+    python_stage('process_locations', 'process_locations.py',
+                 inputs=['corpus.py', 'geocache.py', 'batch_geocoder.py', CORPUS_PATH],
+                 outputs=['aggregated_locations_geocoded.csv'], geocodes=True),
+    python_stage('extract_time_locations', 'extract_time_locations.py',
+                 inputs=['corpus.py', 'geocache.py', 'batch_geocoder.py', CORPUS_PATH,
+                         'aggregated_locations_geocoded.csv'],
+                 outputs=['locations_by_year.csv'], geocodes=True),
+    python_stage('extract_context', 'extract_context.py',
+                 inputs=['corpus.py', 'location_matcher.py', CORPUS_PATH, 'aggregated_locations_geocoded.csv'],
+                 outputs=['location_context.csv']),
+    python_stage('entity_index', 'entity_index.py',
+                 inputs=['corpus.py', 'annotations.py', CORPUS_PATH],
+                 outputs=['entity_index/docs.json', 'entity_index/lexicon.json', 'entity_index/postings.bin']),
+    python_stage('entity_network', 'entity_network.py',
+                 inputs=['corpus.py', 'annotations.py', CORPUS_PATH],
+                 outputs=['entity_network/meta.json', 'entity_network/entities.json'] +
+                         [f'entity_network/{name}.npy' for name in
+                          ['article_period', 'entity_kind', 'pairs_indptr', 'pairs_src', 'pairs_dst', 'pairs_weight']] +
+                         [f'entity_network/{matrix}_{part}.npy' for matrix in ['incidence', 'postings', 'period_df']
+                          for part in ['indptr', 'ids', 'values']]),
+    python_stage('search_index', 'search.py',
+                 inputs=['corpus.py', 'location_matcher.py', CORPUS_PATH, 'dashboard_data_final.csv'],
+                 outputs=['search_index/vocab.json', 'search_index/docs.json', 'search_index/doc_len.npy',
+                          'search_index/postings_doc.npy', 'search_index/postings_tf.npy']),
+    # Exits 1 without writing anything when the clusters are not exactly data_mining.THEMES (e.g. a first
+    # fit without dashboard_data_final.csv): review the names, then python data_mining.py --allow-new-themes
+    python_stage('data_mining', 'data_mining.py',
+                 inputs=['annotations.py', 'theme_model.py', 'words_per_article.csv'],
+                 outputs=['dashboard_data_final.csv', 'df_top_words_clean.csv', 'theme_model/meta.json',
+                          'theme_model/terms.json', 'theme_model/idf.npy', 'theme_model/components.npy',
+                          'theme_model/centroids.npy']),
+    python_stage('token_store', 'token_store.py',
+                 inputs=['annotations.py', 'words_per_article.csv', 'words_per_paragraph.csv'],
+                 outputs=['token_store/meta.json', 'token_store/vocab.json', 'token_store/article_keys.npy',
+                          'token_store/article_tokens.npy', 'token_store/article_indptr.npy',
+                          'token_store/paragraph_keys.npy', 'token_store/paragraph_tokens.npy',
+                          'token_store/paragraph_indptr.npy', 'token_store/paragraph_article_indptr.npy']),
+    python_stage('cooccurrence', 'cooccurrence.py',
+                 inputs=['token_store.py', 'token_store/meta.json', 'token_store/vocab.json',
+                         'token_store/article_keys.npy', 'token_store/article_tokens.npy',
+                         'token_store/article_indptr.npy', 'token_store/paragraph_keys.npy',
+                         'token_store/paragraph_tokens.npy', 'token_store/paragraph_indptr.npy',
+                         'token_store/paragraph_article_indptr.npy', 'dashboard_data_final.csv'],
+                 outputs=['cooccurrence_index/meta.json', 'cooccurrence_index/vocab.json'] +
+                         [f'cooccurrence_index/{window}_{name}.npy' for window in ['paragraph', 'article']
+                          for name in ['units_indptr', 'units_terms', 'postings_indptr', 'postings_units',
+                                       'pairs_indptr', 'pairs_terms', 'pairs_counts', 'unit_slice',
+                                       'slice_df', 'slice_units']]),
+    python_stage('snapshot', 'snapshot.py',
+                 inputs=['lazy_imports.py', 'dashboard_data_final.csv', 'df_top_words_clean.csv',
+                         'aggregated_locations_geocoded.csv', 'locations_by_year.csv'],
+                 outputs=['snapshot/manifest.json', 'snapshot/dashboard_data_final.arrow',
+                          'snapshot/df_top_words_clean.arrow', 'snapshot/aggregated_locations_geocoded.arrow',
+                          'snapshot/locations_by_year.arrow']),
+    python_stage('dashboard_layouts', 'snapshot.py', args=['--layouts'],
+                 inputs=['lazy_imports.py', 'app_friend.py', 'aggregates.py', 'scatter_lod.py', 'figure_cache.py',
+                         'dashboard_data_final.csv', 'df_top_words_clean.csv',
+                         'aggregated_locations_geocoded.csv', 'locations_by_year.csv'],
+                 outputs=['snapshot/layouts.json']),
+]
+
+
+def resolve_deps(stages):
+    """Fill Stage.deps from the producer of each input."""
+    producers = {out: stage.name for stage in stages for out in stage.outputs}
+    for stage in stages:
+        stage.deps = sorted({producers[i] for i in stage.inputs if i in producers} - {stage.name})
+    return stages
+
+
+class FileHasher:
+    """sha256 of files, remembered by (size, mtime) so unchanged big files are not re-read."""
+
+    def __init__(self, known=None):
+        self.known = dict(known or {})
+
+    def file_hash(self, path):
+        st = os.stat(path)
+        signature = [st.st_size, st.st_mtime_ns]
+        cached = self.known.get(path)
+        if cached and cached[:2] == signature:
+            return cached[2]
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        self.known[path] = signature + [digest.hexdigest()]
+        return digest.hexdigest()
+
+    def hash(self, path):
+        """Hash a file, or every file of a directory (e.g. a partitioned store)."""
+        if not os.path.exists(path):
+            return None
+        if not os.path.isdir(path):
+            return self.file_hash(path)
+        digest = hashlib.sha256()
+        for base, dirs, files in sorted(os.walk(path)):
+            dirs.sort()
+            for name in sorted(files):
+                sub = os.path.join(base, name)
+                digest.update(os.path.relpath(sub, path).encode())
+                digest.update(self.file_hash(sub).encode())
+        return digest.hexdigest()
+
+
+def fingerprint(stage, hasher):
+    digest = hashlib.sha256(json.dumps(stage.command[1:]).encode())
+    for path in sorted(stage.inputs):
+        digest.update(f"{path}={hasher.hash(os.path.join(ROOT, path))}".encode())
+    return digest.hexdigest()
+
+
+def load_state():
+    try:
+        with open(STATE_FILE, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_state(state):
+    tmp = STATE_FILE + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=1)
+    os.replace(tmp, STATE_FILE)
+
+
+def is_up_to_date(stage, stage_fingerprint, state):
+    if state.get('stages', {}).get(stage.name) != stage_fingerprint:
+        return False
+    return all(os.path.exists(os.path.join(ROOT, out)) for out in stage.outputs)
+
+
+_print_lock = threading.Lock()
+
+
+def log(line):
+    with _print_lock:
+        print(line, flush=True)
+
+
+def public_nominatim():
+    """True if geocoding would go to the rate-limited public Nominatim server."""
+    return GEOCODER == 'nominatim' and not os.environ.get('NOMINATIM_DOMAIN') and not OFFLINE
+
+
+def run_stage(stage):
+    """Run the stage, printing its output (stdout and stderr) line by line; (exit code, seconds)."""
+    start = time.perf_counter()
+    # Unbuffered child: its lines arrive as they are printed, not when it exits
+    env = dict(os.environ, PYTHONUNBUFFERED='1')
+    with subprocess.Popen(stage.command, cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                          text=True, bufsize=1) as process:
+        for line in process.stdout:
+            log(f"  {stage.name} | {line.rstrip()}")
+    return process.returncode, time.perf_counter() - start
+
+
+def select(stages, names):
+    """The stages named in `names` plus everything upstream of them."""
+    by_name = {s.name: s for s in stages}
+    unknown = [n for n in names if n not in by_name]
+    if unknown:
+        raise SystemExit(f"Unknown stage(s): {', '.join(unknown)}. Known: {', '.join(by_name)}")
+    wanted, todo = set(), list(names)
+    while todo:
+        name = todo.pop()
+        if name not in wanted:
+            wanted.add(name)
+            todo.extend(by_name[name].deps)
+    return [s for s in stages if s.name in wanted]
+
+
+def run_pipeline(stages=STAGES, names=None, force=False, jobs=None, dry_run=False, allow_public_nominatim=False):
+    """Run the out-of-date stages, in parallel where possible. Return True on success."""
+    stages = resolve_deps(list(stages))
+    if names:
+        stages = select(stages, names)
+    state = load_state()
+    hasher = FileHasher(state.get('hashes'))
+    state.setdefault('stages', {})
+
+    pending = {s.name: s for s in stages}
+    done, failed = set(), set()
+    running = {}
+    ok = True
+    # Stages are subprocesses, mostly waiting on I/O (geocoding, disk): always allow some overlap
+    with ThreadPoolExecutor(max_workers=jobs or max(2, os.cpu_count() or 1)) as pool:
+        while pending or running:
+            progressed = False
+            for name, stage in list(pending.items()):
+                if any(d in failed for d in stage.deps):
+                    log(f"[skip] {name}: upstream stage failed")
+                    failed.add(name)
+                    del pending[name]
+                    progressed = True
+                    continue
+                if not all(d in done for d in stage.deps):
+                    continue
+                del pending[name]
+                progressed = True
+                stage_fingerprint = fingerprint(stage, hasher)
+                if not force and is_up_to_date(stage, stage_fingerprint, state):
+                    log(f"[up to date] {name}")
+                    done.add(name)
+                    continue
+                if stage.geocodes and public_nominatim() and not allow_public_nominatim:
+                    log(f"[failed] {name}: geocodes the whole vocabulary with the public Nominatim server "
+                        f"(1 request / 1.1 s, hours). Set GEOCODER=geonames, NOMINATIM_DOMAIN or "
+                        f"GEOCODE_OFFLINE=1, or pass --allow-public-nominatim")
+                    state['stages'].pop(name, None)
+                    failed.add(name)
+                    ok = False
+                    continue
+                if dry_run:
+                    log(f"[would run] {name}")
+                    done.add(name)
+                    continue
+                log(f"[run] {name}")
+                running[pool.submit(run_stage, stage)] = (stage, stage_fingerprint)
+
+            if not running:
+                if pending and not progressed:
+                    raise SystemExit(f"Dependency cycle between: {', '.join(pending)}")
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage, stage_fingerprint = running.pop(future)
+                returncode, elapsed = future.result()
+                if returncode == 0:
+                    log(f"[done] {stage.name} ({elapsed:.1f}s)")
+                    state['stages'][stage.name] = stage_fingerprint
+                    done.add(stage.name)
+                else:
+                    log(f"[failed] {stage.name} (exit code {returncode})")
+                    state['stages'].pop(stage.name, None)
+                    failed.add(stage.name)
+                    ok = False
+            state['hashes'] = hasher.known
+            save_state(state)
+
+    state['hashes'] = hasher.known
+    if not dry_run:
+        save_state(state)
+    return ok
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Rebuild the derived data files that are out of date.")
+    parser.add_argument('stages', nargs='*', help="stages to run (default: all)")
+    parser.add_argument('--force', action='store_true', help="ignore fingerprints and rerun")
+    parser.add_argument('--jobs', type=int, default=None, help="maximum number of stages run in parallel")
+    parser.add_argument('--dry-run', action='store_true', help="only print what would run")
+    parser.add_argument('--allow-public-nominatim', action='store_true',
+                        help="run the geocoding stages against the public Nominatim server anyway")
+    args = parser.parse_args()
+    sys.exit(0 if run_pipeline(STAGES, args.stages, args.force, args.jobs, args.dry_run,
+                               args.allow_public_nominatim) else 1)
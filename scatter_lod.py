@@ -0,0 +1,144 @@
+"""Level-of-detail point cloud for the 3D PCA article scatter.
+
+Plotting every article of dashboard_data_final.csv as its own marker gives a
+multi-MB figure the browser cannot rotate. PointCloud keeps the CP1/CP2/CP3
+coordinates once as a float32 (n, 3) array and hands out index sets instead:
+
+    points = PointCloud.from_csv('dashboard_data_final.csv')
+    points.overview()                        # stratified per-Theme sample (overview zoom)
+    points.region(points.box_around(xyz))    # every point of a region (full resolution)
+
+Samples are stratified by Theme: each theme keeps a share of `max_points`
+proportional to its size, and at least `min_per_theme` points so small themes
+stay visible. Every point gets one random rank when the cloud is built and a
+sample is "the lowest ranks of each theme", so samples are deterministic and
+nested (zooming in only adds points). Arrays stay float32 numpy arrays up to
+the figure, which plotly serialises as base64 typed arrays, not JSON lists.
+"""
+import hashlib
+import os
+import threading
+
+import numpy as np
+
+from lazy_imports import lazy_import
+from snapshot import read_table
+
+pd = lazy_import('pandas')
+
+DASHBOARD_DATA = 'dashboard_data_final.csv'
+AXES = ['CP1', 'CP2', 'CP3']
+OVERVIEW_POINTS = int(os.environ.get('SCATTER_POINTS', 5000))
+REGION_POINTS = int(os.environ.get('SCATTER_REGION_POINTS', 50000))
+MIN_PER_THEME = 50
+REGION_FRACTION = 0.25
+
+
+class PointCloud:
+    """float32 coordinates (n, 3), theme code per point, themes in order of first appearance.
+
+    `version`, `token` and reading `path` on first use follow ThemeCube.
+    """
+
+    def __init__(self, df=None, path=None, seed=0):
+        self.path = path
+        self.seed = seed
+        self.version = 0
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._state = None
+        if df is not None or path is None:
+            self._set(df if df is not None else pd.DataFrame(columns=AXES + ['Theme']))
+
+    @classmethod
+    def from_csv(cls, path=DASHBOARD_DATA):
+        points = cls(path=path)
+        points.refresh()
+        return points
+
+    def _build(self, df):
+        # Themes in order of first appearance, as plotly express colours them
+        theme_codes, themes = pd.factorize(df['Theme'].astype(str))
+        xyz = np.ascontiguousarray(df[AXES].to_numpy(dtype=np.float32))
+        # Points grouped by theme, in random order inside each theme
+        rank = np.random.default_rng(self.seed).permutation(len(xyz))
+        order = np.lexsort((rank, theme_codes))
+        return xyz, theme_codes.astype(np.int32), [str(t) for t in themes], order
+
+    def _set(self, df):
+        # One attribute swap, so readers in other threads never see a half-updated cloud
+        state = self._build(df)
+        digest = hashlib.sha1('\x1f'.join(state[2]).encode('utf-8'))
+        digest.update(state[0].tobytes())
+        digest.update(state[1].tobytes())
+        self._state = state + (digest.hexdigest()[:16],)
+        self.version += 1
+
+    @property
+    def xyz(self):
+        return self._current()[0]
+
+    @property
+    def theme_codes(self):
+        return self._current()[1]
+
+    @property
+    def themes(self):
+        return self._current()[2]
+
+    @property
+    def token(self):
+        return self._current()[4]
+
+    def __len__(self):
+        return len(self.xyz)
+
+    def _current(self):
+        # Given only a path, the data is read on first use
+        if self._state is None:
+            self.refresh()
+        return self._state
+
+    def refresh(self, df=None):
+        """Rebuild from `df`, or from `path` if the file changed since the last load; True if rebuilt."""
+        with self._lock:
+            if df is None:
+                stat = os.stat(self.path)
+                stamp = (stat.st_size, stat.st_mtime_ns)
+                if stamp == self._stamp:
+                    return False
+                df = read_table(self.path, columns=AXES + ['Theme'])
+                self._stamp = stamp
+            self._set(df)
+            return True
+
+    # --- Index sets -----------------------------------------------------------
+
+    def _stratified(self, ordered, max_points, min_per_theme):
+        """First points of each theme segment of `ordered` (grouped by theme, random order inside)."""
+        if len(ordered) <= max_points:
+            return ordered
+        codes = self.theme_codes[ordered]
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        sizes = np.diff(np.r_[starts, len(ordered)])
+        quota = np.minimum(sizes, np.maximum(np.round(max_points * sizes / len(ordered)), min_per_theme))
+        return np.concatenate([ordered[s:s + int(q)] for s, q in zip(starts, quota)])
+
+    def overview(self, max_points=OVERVIEW_POINTS, min_per_theme=MIN_PER_THEME):
+        """Indices of a stratified per-Theme sample of at most about `max_points` points."""
+        return self._stratified(self._current()[3], max_points, min_per_theme)
+
+    def box_around(self, center, fraction=REGION_FRACTION):
+        """(low, high) corners of the box centred on `center`, `fraction` of the cloud's extent wide per axis."""
+        if not len(self):
+            return np.asarray(center, dtype=np.float32), np.asarray(center, dtype=np.float32)
+        half = (self.xyz.max(axis=0) - self.xyz.min(axis=0)) * fraction / 2
+        center = np.asarray(center, dtype=np.float32)
+        return center - half, center + half
+
+    def region(self, box, max_points=REGION_POINTS, min_per_theme=MIN_PER_THEME):
+        """Indices of the points inside `box` ((low, high) corners), sampled only beyond `max_points`."""
+        low, high = box
+        inside = np.all((self.xyz >= low) & (self.xyz <= high), axis=1)
+        ordered = self._current()[3]
+        return self._stratified(ordered[inside[ordered]], max_points, min_per_theme)
@@ -0,0 +1,203 @@
+"""Ranked full-text search (BM25) over article titles and contents.
+
+    python search.py [corpus] [index_dir]           build the index
+    python search.py --query "retrait français"     query it from the shell
+
+Index layout (numpy arrays, memory-mapped when searching):
+    search_index/vocab.json      {term: [offset, df]}
+    search_index/postings_doc.npy, postings_tf.npy   posting lists, concatenated by term
+    search_index/doc_len.npy     token count per article
+    search_index/docs.json       article table (year, month, day, num_article, date, url, title)
+
+Tokenisation is French-aware: apostrophes unified and elisions (l', d', qu'...)
+dropped, accents stripped, stop words removed and plural -s/-x folded, so
+"l'Élysée" and "elysee" or "sanctions" and "sanction" hit the same term.
+"""
+import argparse
+import json
+import math
+import os
+import re
+import sys
+from collections import Counter
+
+import numpy as np
+
+from corpus import CORPUS_PATH, iter_articles
+from location_matcher import normalize
+
+SEARCH_INDEX_DIR = os.environ.get('SEARCH_INDEX', 'search_index')
+DASHBOARD_DATA = 'dashboard_data_final.csv'
+K1 = 1.2
+B = 0.75
+TITLE_WEIGHT = 2
+
+STOP_WORDS = set("""
+a afin ai aie aient ainsi alors au aucun aupres auquel aussi autre autres aux auxquels avaient avais avait avant
+avec avez avoir avons c ca car ce ceci cela celle celles celui cependant ces cet cette ceux chez ci comme comment
+d dans de des donc dont du elle elles en encore entre est et etaient etait ete etre eu eux fait faut il ils j je
+jusqu l la le les leur leurs lors lorsqu lui m ma mais me meme mes moi mon n ne ni nos notre nous on ont ou par
+parce pas peu peut plus pour pourquoi puis puisqu qu quand que quel quelle quelles quels qui quoi s sa sans se
+selon ses si sien son sont sous sur t ta te tes toi ton tous tout toute toutes tres tu un une unes uns vers via
+vos votre vous y
+""".split())
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    """French-aware tokens of `text` (casefolded, unaccented, stop words removed, light plural folding)."""
+    tokens = []
+    for token in _TOKEN.findall(normalize(text or '', casefold=True)):
+        if token in STOP_WORDS or len(token) < 2:
+            continue
+        if len(token) > 3 and token[-1] in 'sx' and not token.endswith('ss'):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def article_terms(article):
+    counts = Counter(tokenize(article.get('content')))
+    for token in tokenize(article.get('title')):
+        counts[token] += TITLE_WEIGHT
+    return counts
+
+
+def build_index(corpus_path=CORPUS_PATH, index_dir=SEARCH_INDEX_DIR):
+    """Tokenise the corpus once and write the BM25 index; return the number of articles."""
+    docs = {field: [] for field in ('year', 'month', 'day', 'num_article', 'date', 'url', 'title')}
+    postings = {}     # term -> ([doc ids], [tfs])
+    doc_len = []
+
+    last_day, num_article = None, 0
+    for doc_id, (year, month, day, article) in enumerate(iter_articles(corpus_path)):
+        if (year, month, day) != last_day:
+            last_day, num_article = (year, month, day), 0
+        num_article += 1
+        for field, value in (('year', year), ('month', month), ('day', day),
+                             ('num_article', article.get('num_article', num_article))):
+            docs[field].append(value)
+        for field in ('date', 'url', 'title'):
+            docs[field].append(article.get(field))
+
+        counts = article_terms(article)
+        doc_len.append(sum(counts.values()))
+        for term, tf in counts.items():
+            ids, tfs = postings.setdefault(term, ([], []))
+            ids.append(doc_id)
+            tfs.append(tf)
+
+    vocab = {}
+    all_ids, all_tfs = [], []
+    offset = 0
+    for term in sorted(postings):
+        ids, tfs = postings[term]
+        vocab[term] = [offset, len(ids)]
+        all_ids.extend(ids)
+        all_tfs.extend(tfs)
+        offset += len(ids)
+
+    os.makedirs(index_dir, exist_ok=True)
+    np.save(os.path.join(index_dir, 'postings_doc.npy'), np.asarray(all_ids, dtype=np.uint32))
+    np.save(os.path.join(index_dir, 'postings_tf.npy'), np.asarray(all_tfs, dtype=np.uint32))
+    np.save(os.path.join(index_dir, 'doc_len.npy'), np.asarray(doc_len, dtype=np.uint32))
+    with open(os.path.join(index_dir, 'vocab.json'), 'w', encoding='utf-8') as f:
+        json.dump(vocab, f, ensure_ascii=False)
+    with open(os.path.join(index_dir, 'docs.json'), 'w', encoding='utf-8') as f:
+        json.dump(docs, f, ensure_ascii=False)
+    return len(doc_len)
+
+
+def load_themes(docs, path=DASHBOARD_DATA):
+    """Theme of each indexed article, joined on (year, month, day, num_article); '' if unknown."""
+    try:
+        import pandas as pd
+        df = pd.read_csv(path, usecols=['year', 'month', 'day', 'num_article', 'Theme'])
+    except (FileNotFoundError, ValueError):
+        return [''] * len(docs['url'])
+    themes = {
+        (str(y), str(m), str(d), int(n)): t
+        for y, m, d, n, t in df[['year', 'month', 'day', 'num_article', 'Theme']].itertuples(index=False)
+    }
+    return [
+        themes.get((str(y), str(int(m)), str(int(d)), int(n)), '')
+        for y, m, d, n in zip(docs['year'], docs['month'], docs['day'], docs['num_article'])
+    ]
+
+
+class Searcher:
+    """BM25 scoring over the memory-mapped index, with year / Theme filters."""
+
+    def __init__(self, index_dir=SEARCH_INDEX_DIR, dashboard_data=DASHBOARD_DATA):
+        with open(os.path.join(index_dir, 'vocab.json'), encoding='utf-8') as f:
+            self.vocab = json.load(f)
+        with open(os.path.join(index_dir, 'docs.json'), encoding='utf-8') as f:
+            self.docs = json.load(f)
+        self.postings_doc = np.load(os.path.join(index_dir, 'postings_doc.npy'), mmap_mode='r')
+        self.postings_tf = np.load(os.path.join(index_dir, 'postings_tf.npy'), mmap_mode='r')
+        self.doc_len = np.load(os.path.join(index_dir, 'doc_len.npy')).astype(np.float32)
+        self.n_docs = len(self.doc_len)
+        avg_len = float(self.doc_len.mean()) if self.n_docs else 1.0
+        # Length normalisation of BM25, computed once per article
+        self._norm = (K1 * (1 - B + B * self.doc_len / max(avg_len, 1.0))).astype(np.float32)
+
+        self.years = np.asarray(self.docs['year'])
+        self.themes = np.asarray(load_themes(self.docs, dashboard_data))
+
+    def _mask(self, year=None, theme=None):
+        mask = None
+        if year not in (None, '', 'ALL'):
+            mask = self.years == str(year)
+        if theme not in (None, '', 'ALL'):
+            theme_mask = self.themes == theme
+            mask = theme_mask if mask is None else mask & theme_mask
+        return mask
+
+    def search(self, query, k=10, year=None, theme=None):
+        """Top `k` articles for `query` as dicts (article table row + Theme + score)."""
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        matched = False
+        for term in set(tokenize(query)):
+            entry = self.vocab.get(term)
+            if entry is None:
+                continue
+            matched = True
+            offset, df = entry
+            ids = self.postings_doc[offset:offset + df]
+            tfs = self.postings_tf[offset:offset + df].astype(np.float32)
+            idf = math.log(1 + (self.n_docs - df + 0.5) / (df + 0.5))
+            # Each article appears once per posting list: plain fancy-index add is safe
+            scores[ids] += idf * tfs * (K1 + 1) / (tfs + self._norm[ids])
+        if not matched:
+            return []
+
+        mask = self._mask(year, theme)
+        if mask is not None:
+            scores[~mask] = 0
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [
+            dict({field: values[i] for field, values in self.docs.items()},
+                 Theme=str(self.themes[i]), score=float(scores[i]))
+            for i in candidates
+        ]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build or query the BM25 article index.")
+    parser.add_argument('corpus', nargs='?', default=CORPUS_PATH)
+    parser.add_argument('index_dir', nargs='?', default=SEARCH_INDEX_DIR)
+    parser.add_argument('--query', help="search instead of building")
+    parser.add_argument('--year')
+    parser.add_argument('--theme')
+    parser.add_argument('-k', type=int, default=10)
+    args = parser.parse_args()
+
+    if args.query is None:
+        print(f"Indexing {args.corpus} into {args.index_dir}...")
+        print(f"Indexed {build_index(args.corpus, args.index_dir)} articles.")
+        sys.exit(0)
+    for hit in Searcher(args.index_dir).search(args.query, args.k, args.year, args.theme):
+        print(f"{hit['score']:6.2f}  {hit['date']}  [{hit['Theme'] or '-'}]  {hit['title']}")
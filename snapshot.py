@@ -0,0 +1,172 @@
+"""Memory-mapped Arrow snapshot of the dashboard tables.
+
+The dashboard reads four CSV files. Behind gunicorn every worker used to
+parse them and hold its own copy; the snapshot converts each one once into an
+uncompressed Arrow IPC file that workers map read-only, so the pages are
+shared through the OS page cache and a worker starts without parsing text:
+
+    python snapshot.py                 (re)build snapshot/ from the CSV files
+    python snapshot.py --layouts       prebuild the dashboard tabs (snapshot/layouts.json)
+    df = read_table('locations_by_year.csv')
+
+The CSV stays the source of truth. read_table() maps the snapshot only while
+it matches the CSV it was built from (same size and mtime, recorded in
+snapshot/manifest.json) and otherwise parses the CSV as before. Mapped frames
+use pd.ArrowDtype columns backed by the mapping: adding columns is fine,
+anything that modifies existing values makes a private copy.
+
+The dashboard tabs themselves (component tree and figures, as JSON) can be
+prebuilt the same way: prebuilt_layout() returns one only while the files it
+was built from are unchanged, so the first page needs no pandas work at all.
+"""
+import argparse
+import json
+import os
+import time
+
+from lazy_imports import lazy_import
+
+pd = lazy_import('pandas')
+pa = lazy_import('pyarrow')
+
+SNAPSHOT_DIR = os.environ.get('SNAPSHOT_DIR', 'snapshot')
+LAYOUTS_FILE = 'layouts.json'
+TABLES = [
+    'dashboard_data_final.csv',
+    'df_top_words_clean.csv',
+    'aggregated_locations_geocoded.csv',
+    'locations_by_year.csv',
+]
+
+
+def snapshot_path(csv_path, directory=SNAPSHOT_DIR):
+    return os.path.join(directory, os.path.splitext(os.path.basename(csv_path))[0] + '.arrow')
+
+
+def _stamp(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def read_manifest(directory=SNAPSHOT_DIR):
+    try:
+        with open(os.path.join(directory, 'manifest.json'), encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _write_atomic(path, write):
+    tmp = path + '.tmp'
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def build(tables=TABLES, directory=SNAPSHOT_DIR, verbose=True):
+    """Convert each CSV of `tables` into directory/<name>.arrow; missing CSV files are skipped."""
+    os.makedirs(directory, exist_ok=True)
+    manifest = read_manifest(directory)
+    for csv_path in tables:
+        if not os.path.exists(csv_path):
+            if verbose:
+                print(f"{csv_path} not found, not in the snapshot.")
+            continue
+        started = time.perf_counter()
+        stamp = _stamp(csv_path)
+        # Parsed by pandas, so the snapshot has the dtypes the dashboard always had
+        table = pa.Table.from_pandas(pd.read_csv(csv_path), preserve_index=False)
+
+        def write(tmp):
+            with pa.OSFile(tmp, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+        _write_atomic(snapshot_path(csv_path, directory), write)
+        manifest[os.path.basename(csv_path)] = {'source': stamp, 'rows': table.num_rows}
+        if verbose:
+            print(f"{csv_path}: {table.num_rows} rows -> {snapshot_path(csv_path, directory)} "
+                  f"({time.perf_counter() - started:.2f}s)")
+
+    def write_manifest(tmp):
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1)
+
+    _write_atomic(os.path.join(directory, 'manifest.json'), write_manifest)
+    return manifest
+
+
+def is_fresh(csv_path, directory=SNAPSHOT_DIR):
+    """True if the snapshot of `csv_path` exists and was built from its current content."""
+    entry = read_manifest(directory).get(os.path.basename(csv_path))
+    if entry is None or not os.path.exists(snapshot_path(csv_path, directory)):
+        return False
+    return entry['source'] == _stamp(csv_path)
+
+
+def map_table(csv_path, columns=None, directory=SNAPSHOT_DIR):
+    """DataFrame mapped from the snapshot of `csv_path` (zero-copy, pd.ArrowDtype columns)."""
+    table = pa.ipc.open_file(pa.memory_map(snapshot_path(csv_path, directory), 'r')).read_all()
+    if columns is not None:
+        table = table.select(columns)
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def read_table(csv_path, columns=None, directory=SNAPSHOT_DIR):
+    """`csv_path` as a DataFrame: mapped from the snapshot when fresh, parsed from the CSV otherwise."""
+    if is_fresh(csv_path, directory):
+        return map_table(csv_path, columns, directory)
+    return pd.read_csv(csv_path, usecols=columns)
+
+
+def _stamp_or_none(path):
+    return _stamp(path) if os.path.exists(path) else None
+
+
+def write_layouts(layouts, sources, directory=SNAPSHOT_DIR):
+    """Save {name: Dash component} with the stamps of the `sources` files they were built from."""
+    from plotly.io.json import to_json_plotly
+
+    os.makedirs(directory, exist_ok=True)
+    text = to_json_plotly({'sources': {path: _stamp_or_none(path) for path in sources}, 'layouts': layouts})
+
+    def write(tmp):
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    _write_atomic(os.path.join(directory, LAYOUTS_FILE), write)
+    return len(text)
+
+
+_loaded_layouts = {}    # layouts.json path -> (mtime, content)
+
+
+def prebuilt_layout(name, directory=SNAPSHOT_DIR):
+    """The prebuilt layout `name` (JSON dict) if its source files are unchanged, else None."""
+    path = os.path.join(directory, LAYOUTS_FILE)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    loaded = _loaded_layouts.get(path)
+    if loaded is None or loaded[0] != mtime:
+        with open(path, encoding='utf-8') as f:
+            loaded = _loaded_layouts[path] = (mtime, json.load(f))
+    content = loaded[1]
+    if any(_stamp_or_none(source) != stamp for source, stamp in content['sources'].items()):
+        return None
+    return content['layouts'].get(name)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build the memory-mapped snapshot of the dashboard tables.")
+    parser.add_argument('--layouts', action='store_true',
+                        help="prebuild the app_friend tabs into snapshot/layouts.json instead")
+    args = parser.parse_args()
+
+    if args.layouts:
+        import app_friend
+        started = time.perf_counter()
+        size = app_friend.prebuild_layouts()
+        print(f"{len(app_friend.TAB_BUILDERS)} tabs -> {os.path.join(SNAPSHOT_DIR, LAYOUTS_FILE)} "
+              f"({size / 2**10:.0f} KB, {time.perf_counter() - started:.2f}s)")
+    else:
+        build()
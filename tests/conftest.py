@@ -0,0 +1,26 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+# The modules live at the root of the repository, next to the data files
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope='module')
+def fitted(tmp_path_factory):
+    """Directory where data_mining.py ran on the bundled words, from copies of the committed tables."""
+    import data_mining
+
+    directory = tmp_path_factory.mktemp('fit')
+    for name in [data_mining.WORDS_FILE, data_mining.DASHBOARD_DATA, data_mining.TOP_WORDS_FILE]:
+        shutil.copy(os.path.join(ROOT, name), directory / name)
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        assert data_mining.run()
+    finally:
+        os.chdir(cwd)
+    return directory
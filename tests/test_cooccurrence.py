@@ -0,0 +1,60 @@
+"""Keyword co-occurrence index on the bundled lemma files, and the keyword click of the dashboard."""
+import os
+from collections import Counter
+
+import pytest
+
+import cooccurrence
+import token_store
+from annotations import decode_field
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope='module')
+def index(tmp_path_factory):
+    base = tmp_path_factory.mktemp('cooccurrence')
+    token_store.build(os.path.join(ROOT, token_store.ARTICLE_WORDS), os.path.join(ROOT, token_store.PARAGRAPH_WORDS),
+                      str(base / 'token_store'))
+    cooccurrence.build_index(str(base / 'token_store'), str(base / 'index'),
+                             os.path.join(ROOT, cooccurrence.DASHBOARD_DATA))
+    return cooccurrence.CooccurrenceIndex(str(base / 'index'))
+
+
+def brute_force(lemmas, min_count=cooccurrence.MIN_COUNT):
+    """{term: count} over the paragraphs containing all `lemmas`."""
+    import pandas as pd
+    counts = Counter()
+    for words in pd.read_csv(os.path.join(ROOT, token_store.PARAGRAPH_WORDS))['words']:
+        for paragraph in map(set, decode_field(words)):
+            if set(lemmas) <= paragraph:
+                counts.update(paragraph - set(lemmas))
+    return {term: count for term, count in counts.items() if count >= min_count}
+
+
+def test_unigram_matches_brute_force(index):
+    hits = index.associated('ukraine', k=10 ** 6, measure='count')
+    assert {hit['term']: hit['count'] for hit in hits} == brute_force(['ukraine'])
+
+
+def test_bigram_is_queried_by_its_lemmas(index):
+    hits = index.associated('royaume uni', k=10 ** 6, measure='count')
+    assert hits
+    assert {hit['term']: hit['count'] for hit in hits} == brute_force(['royaume', 'uni'])
+
+
+def test_unknown_lemma_has_no_association(index):
+    assert index.associated('royaume zzzinconnu') == []
+
+
+def test_clicking_a_bigram_keyword(index, monkeypatch):
+    # The dashboard reads its tables from the working directory
+    monkeypatch.chdir(ROOT)
+    import app_friend
+
+    monkeypatch.setattr(app_friend, 'load_cooccurrence', lambda: index)
+    click = {'points': [{'y': 'royaume uni', 'customdata': ['Diplomatie Bloc Occidental']}]}
+    term, theme = app_friend.select_keyword(click)
+    result = app_friend.update_cooccurrences(term, 'paragraph', 'llr', 'ALL', theme)
+    assert type(result).__name__ == 'Graph'
+    assert 'Aucun terme associé' not in str(result)
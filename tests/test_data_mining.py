@@ -0,0 +1,41 @@
+"""Theme fit of data_mining.py on the bundled words, against the committed tables."""
+import os
+
+import pandas as pd
+
+import data_mining
+from conftest import ROOT
+
+
+def read(directory, name):
+    return pd.read_csv(os.path.join(directory, name))
+
+
+def test_refit_on_unchanged_input_reproduces_the_committed_labelling(fitted):
+    committed = read(ROOT, data_mining.DASHBOARD_DATA)
+    refitted = read(fitted, data_mining.DASHBOARD_DATA)
+    assert len(refitted) == len(committed)
+    key = data_mining.KEY_COLUMNS
+    merged = committed.merge(refitted, on=key, suffixes=('', '_refit'), validate='one_to_one')
+    assert len(merged) == len(committed)
+    assert (merged['Cluster_ID'] == merged['Cluster_ID_refit']).all()
+    assert (merged['Theme'] == merged['Theme_refit']).all()
+
+
+def test_noise_cluster_is_left_out_of_both_tables(fitted):
+    assert data_mining.NOISE_THEME not in set(read(fitted, data_mining.DASHBOARD_DATA)['Theme'])
+    committed = read(ROOT, data_mining.TOP_WORDS_FILE)
+    top = read(fitted, data_mining.TOP_WORDS_FILE)
+    assert set(zip(top['Theme_ID'], top['Theme'])) == set(zip(committed['Theme_ID'], committed['Theme']))
+
+
+def test_second_run_keeps_the_labelling(fitted):
+    before = read(fitted, data_mining.DASHBOARD_DATA)[['Cluster_ID', 'Theme']]
+    cwd = os.getcwd()
+    os.chdir(fitted)
+    try:
+        assert data_mining.run()
+    finally:
+        os.chdir(cwd)
+    after = read(fitted, data_mining.DASHBOARD_DATA)[['Cluster_ID', 'Theme']]
+    pd.testing.assert_frame_equal(before, after)
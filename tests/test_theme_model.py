@@ -0,0 +1,55 @@
+"""Assignment and drift of the saved theme model (fitted on the bundled words)."""
+import os
+
+import pandas as pd
+
+import data_mining
+import theme_model
+
+
+def load(fitted):
+    model = theme_model.ThemeModel.load(os.path.join(fitted, theme_model.MODEL_DIR))
+    articles = pd.concat(data_mining.iter_chunks(os.path.join(fitted, data_mining.WORDS_FILE)), ignore_index=True)
+    return model, articles
+
+
+def test_reassigning_the_fitted_articles_does_not_ask_for_a_refit(fitted):
+    model, articles = load(fitted)
+    for batch in [articles, articles.tail(50), articles.tail(200), articles.head(150)]:
+        report = model.drift(model.assign(batch['text_for_tfidf']))
+        assert not report['refit'], report
+
+
+def test_unknown_vocabulary_asks_for_a_refit(fitted):
+    model, articles = load(fitted)
+    texts = [' '.join(f'inconnu{i}x{j}' for j in range(40)) for i in range(len(articles))]
+    assert model.drift(model.assign(texts))['refit']
+
+
+def test_update_does_not_ingest_the_noise_articles_again(fitted, tmp_path):
+    words = os.path.join(fitted, data_mining.WORDS_FILE)
+    table = tmp_path / data_mining.DASHBOARD_DATA
+    model_dir = tmp_path / theme_model.MODEL_DIR
+    pd.read_csv(os.path.join(fitted, data_mining.DASHBOARD_DATA)).to_csv(table, index=False)
+    model = theme_model.ThemeModel.load(os.path.join(fitted, theme_model.MODEL_DIR))
+    assert model.excluded
+    model.save(str(model_dir))
+
+    report = theme_model.update(words, str(table), str(model_dir))
+    assert report['articles'] == 0
+    assert len(pd.read_csv(table)) == len(pd.read_csv(os.path.join(fitted, data_mining.DASHBOARD_DATA)))
+
+
+def test_update_leaves_new_noise_articles_out(fitted, tmp_path):
+    table = tmp_path / data_mining.DASHBOARD_DATA
+    model_dir = tmp_path / theme_model.MODEL_DIR
+    model = theme_model.ThemeModel.load(os.path.join(fitted, theme_model.MODEL_DIR))
+    excluded = set(model.excluded)
+    model.excluded = []
+    model.save(str(model_dir))
+    pd.read_csv(os.path.join(fitted, data_mining.DASHBOARD_DATA)).to_csv(table, index=False)
+
+    report = theme_model.update(os.path.join(fitted, data_mining.WORDS_FILE), str(table), str(model_dir))
+    assert report['noise'] == len(excluded)
+    assert data_mining.NOISE_THEME not in set(pd.read_csv(table)['Theme'])
+    assert set(theme_model.ThemeModel.load(str(model_dir)).excluded) == excluded
@@ -0,0 +1,286 @@
+"""Persisted theme model: assigns new articles to the existing themes without a refit.
+
+data_mining.py saves, next to the two tables it writes, everything needed to
+place one more article exactly as the fit placed the others:
+
+    theme_model/terms.json        vocabulary (unigrams and bigrams of lemmas)
+    theme_model/idf.npy           float32 idf of each term
+    theme_model/components.npy    (k, n_terms) float32 TruncatedSVD projection
+    theme_model/centroids.npy     (n_clusters, k) float32 k-means centroids (normalised LSA space)
+    theme_model/meta.json         cluster id -> theme name, drift reference, keys of the noise articles
+
+New articles go through one vectorised transform (counts on the fixed
+vocabulary, idf, L2 norm, projection, nearest centroid) and are appended to
+dashboard_data_final.csv, so a daily update takes seconds and leaves the
+theme labels (and THEME_IMAGE_MAP in app_friend.py) untouched:
+
+    python theme_model.py                   articles of words_per_article.csv not in the dashboard yet
+    python theme_model.py new_words.csv     the articles of another file (same columns)
+
+Articles assigned to the noise theme (data_mining.NOISE_THEME) are not
+appended: their keys join the ones the fit left out of the table, in
+meta.json, so they are not assigned again on the next run.
+
+Assigning never learns: new vocabulary is ignored and the centroids do not
+move. drift() compares a batch with the articles the model was fitted on
+(distance to the assigned centroid, share of articles farther than 95% of
+the fitted ones, share of unigrams/bigrams outside the vocabulary) and says
+when a full refit (python data_mining.py --refit) is worthwhile: a statistic
+must pass its threshold by more than DRIFT_Z standard errors of a batch of
+that size, and batches under MIN_DRIFT_BATCH articles never ask for one.
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.preprocessing import normalize
+
+from data_mining import (CHUNK_SIZE, DASHBOARD_DATA, KEY_COLUMNS, NOISE_THEME, WORDS_FILE, _vectorizer, article_keys,
+                         iter_chunks, tfidf_rows)
+
+MODEL_DIR = os.environ.get('THEME_MODEL', 'theme_model')
+OUTPUT_COLUMNS = KEY_COLUMNS + ['words', 'text_for_tfidf', 'Cluster_ID', 'Theme', 'CP1', 'CP2', 'CP3']
+
+# Refit advised above any of these (ratios to the fitted articles, shares)...
+MAX_DISTANCE_RATIO = 1.25
+MAX_FAR_SHARE = 0.15
+MAX_OOV_INCREASE = 0.05
+# ... if the excess is significant for the batch size
+DRIFT_Z = 3.0
+MIN_DRIFT_BATCH = 100
+FAR_QUANTILE = 0.95
+
+
+class ThemeModel:
+    """Vocabulary, idf, SVD projection and centroids of a fit, with the cluster names."""
+
+    def __init__(self, terms, idf, components, centroids, names, reference=None, excluded=()):
+        self.terms = list(terms)
+        self.idf = np.asarray(idf, dtype=np.float32)
+        self.components = np.ascontiguousarray(components, dtype=np.float32)
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.names = {int(c): name for c, name in names.items()}
+        self.reference = reference or {}
+        # (year, month, day, num_article) of the noise articles, left out of the dashboard table
+        self.excluded = [tuple(int(v) for v in key) for key in excluded]
+        self._vectorizer = _vectorizer({term: i for i, term in enumerate(self.terms)})
+        self._weights = sp.diags(self.idf)
+        self._centroid_norms = (self.centroids ** 2).sum(axis=1)
+
+    # -- persistence --
+
+    def save(self, directory=MODEL_DIR):
+        os.makedirs(directory, exist_ok=True)
+        for name in ['idf', 'components', 'centroids']:
+            np.save(os.path.join(directory, f'{name}.npy'), getattr(self, name))
+        with open(os.path.join(directory, 'terms.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.terms, f, ensure_ascii=False)
+        # meta.json last: a model directory without it is incomplete
+        self.save_meta(directory)
+
+    def save_meta(self, directory=MODEL_DIR):
+        with open(os.path.join(directory, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'names': self.names, 'reference': self.reference, 'excluded': self.excluded}, f,
+                      ensure_ascii=False, indent=1)
+
+    @classmethod
+    def load(cls, directory=MODEL_DIR):
+        with open(os.path.join(directory, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        with open(os.path.join(directory, 'terms.json'), encoding='utf-8') as f:
+            terms = json.load(f)
+        arrays = [np.load(os.path.join(directory, f'{name}.npy')) for name in ['idf', 'components', 'centroids']]
+        return cls(terms, *arrays, meta['names'], meta['reference'], meta.get('excluded', ()))
+
+    # -- assignment --
+
+    def project(self, X):
+        """(n, k) LSA coordinates of L2-normalised TF-IDF rows (what fit_transform gave the fitted articles)."""
+        return np.asarray(X @ self.components.T, dtype=np.float32)
+
+    def nearest(self, Z):
+        """(cluster id, squared distance) of each row of `Z` to the nearest centroid, after L2 norm."""
+        L = normalize(Z)
+        # |l - c|^2 = |l|^2 - 2 l.c + |c|^2, with |l| = 1 (0 for an article without known term)
+        distances = (L ** 2).sum(axis=1)[:, None] - 2 * L @ self.centroids.T + self._centroid_norms
+        labels = distances.argmin(axis=1)
+        return labels, np.maximum(distances[np.arange(len(labels)), labels], 0)
+
+    def assign(self, texts):
+        """DataFrame Cluster_ID, Theme, CP1..CP3, distance, oov for lemma strings `texts` (one per article)."""
+        X, oov = tfidf_rows(self._vectorizer, texts, self._weights)
+        Z = self.project(X)
+        labels, distances = self.nearest(Z)
+        return pd.DataFrame({
+            'Cluster_ID': labels,
+            'Theme': [self.names[c] for c in labels.tolist()],
+            'CP1': Z[:, 0], 'CP2': Z[:, 1], 'CP3': Z[:, 2],
+            'distance': distances,
+            'oov': oov,
+        })
+
+    # -- drift --
+
+    def calibrate(self, Z, labels, oov):
+        """Record the reference statistics of the fitted articles (their coordinates, clusters and oov)."""
+        L = normalize(Z)
+        distances = ((L - self.centroids[labels]) ** 2).sum(axis=1)
+        counts = np.bincount(labels, minlength=len(self.centroids))
+        self.reference = {
+            'articles': int(len(labels)),
+            'mean_distance': float(distances.mean()) if len(labels) else 0.0,
+            'distance_std': float(distances.std()) if len(labels) else 0.0,
+            'far_distance': float(np.quantile(distances, FAR_QUANTILE)) if len(labels) else 0.0,
+            'oov': float(np.mean(oov)) if len(labels) else 0.0,
+            'oov_std': float(np.std(oov)) if len(labels) else 0.0,
+            'theme_shares': (counts / max(len(labels), 1)).round(4).tolist(),
+        }
+
+    def drift(self, assigned):
+        """Drift of a batch (an assign() frame) from the fitted articles, with the refit advice.
+
+        Each *_z is the excess over the fitted articles in standard errors of
+        a batch of this size (models saved without the spreads: any excess).
+        """
+        ref = self.reference
+        n = len(assigned)
+        if assigned.empty or not ref:
+            return {'articles': n, 'refit': False}
+        counts = np.bincount(assigned['Cluster_ID'], minlength=len(self.centroids))
+        shares = counts / n
+        far_share = float((assigned['distance'] > ref['far_distance']).mean())
+        distance_excess = float(assigned['distance'].mean() - ref['mean_distance'])
+        oov_increase = float(assigned['oov'].mean() - ref['oov'])
+        report = {
+            'articles': n,
+            'distance_ratio': float(assigned['distance'].mean() / max(ref['mean_distance'], 1e-9)),
+            'distance_z': _z(distance_excess, ref.get('distance_std', 0), n),
+            'far_share': far_share,
+            'far_z': _z(far_share - (1 - FAR_QUANTILE), np.sqrt(FAR_QUANTILE * (1 - FAR_QUANTILE)), n),
+            'oov_increase': oov_increase,
+            'oov_z': _z(oov_increase, ref.get('oov_std', 0), n),
+            # Total variation distance between the theme distributions
+            'theme_shift': float(np.abs(shares - np.asarray(ref['theme_shares'])).sum() / 2),
+        }
+        report['refit'] = bool(n >= MIN_DRIFT_BATCH and (
+            report['distance_ratio'] > MAX_DISTANCE_RATIO and report['distance_z'] > DRIFT_Z
+            or report['far_share'] > MAX_FAR_SHARE and report['far_z'] > DRIFT_Z
+            or report['oov_increase'] > MAX_OOV_INCREASE and report['oov_z'] > DRIFT_Z))
+        return report
+
+
+def _z(excess, std, n):
+    """`excess` of a batch mean in standard errors (std / sqrt(n)); inf for any excess without a spread."""
+    if std > 0:
+        return float(excess / (std / np.sqrt(n)))
+    return float('inf') if excess > 0 else 0.0
+
+
+def previous_labelling(path, model_dir=MODEL_DIR, table=DASHBOARD_DATA, chunk_size=CHUNK_SIZE):
+    """(old cluster id of each article of `path`, -1 if none; {old cluster id: name}), or None.
+
+    The Cluster_ID and Theme columns of the dashboard table (joined on the
+    article keys), the noise articles of the saved model in its noise
+    cluster. Without the table, the saved model's assignment of `path`.
+    """
+    previous = ThemeModel.load(model_dir) if os.path.exists(os.path.join(model_dir, 'meta.json')) else None
+    try:
+        labelled = pd.read_csv(table, usecols=KEY_COLUMNS + ['Cluster_ID', 'Theme'])
+    except (FileNotFoundError, ValueError):
+        if previous is None:
+            return None
+        old = np.concatenate([previous.assign(chunk['text_for_tfidf'])['Cluster_ID'].to_numpy()
+                              for chunk in iter_chunks(path, chunk_size)] or [np.zeros(0, dtype=np.intp)])
+        return old, previous.names
+    labelled = labelled.drop_duplicates(KEY_COLUMNS)
+    keys = article_keys(path, chunk_size)
+    old = keys.merge(labelled, how='left', on=KEY_COLUMNS)['Cluster_ID'].fillna(-1).to_numpy(dtype=np.intp)
+    names = dict(zip(labelled['Cluster_ID'].astype(int), labelled['Theme']))
+    if previous is not None:
+        names = {**previous.names, **names}
+        noise = [c for c, name in previous.names.items() if name == NOISE_THEME]
+        if noise and previous.excluded:
+            excluded = pd.MultiIndex.from_tuples(previous.excluded, names=KEY_COLUMNS)
+            old[pd.MultiIndex.from_frame(keys).isin(excluded) & (old < 0)] = noise[0]
+    return old, names
+
+
+def inherit_names(old, old_names, labels, n_clusters):
+    """{new cluster id: name}: greedy best overlaps of the new `labels` with the `old` ones (-1: unlabelled)."""
+    old_ids = sorted(old_names)
+    known = old >= 0
+    overlap = np.zeros((n_clusters, len(old_ids)), dtype=np.int64)
+    np.add.at(overlap, (labels[known], np.searchsorted(old_ids, old[known])), 1)
+    named = {}
+    for flat in np.argsort(overlap, axis=None, kind='stable')[::-1]:
+        c, o = np.unravel_index(flat, overlap.shape)
+        if overlap[c, o] == 0:
+            break
+        if c not in named and old_names[old_ids[o]] not in named.values():
+            named[int(c)] = old_names[old_ids[o]]
+    return named
+
+
+def known_keys(path=DASHBOARD_DATA):
+    """Set of the (year, month, day, num_article) keys already in the dashboard table."""
+    if not os.path.exists(path):
+        return set()
+    return set(pd.read_csv(path, usecols=KEY_COLUMNS).itertuples(index=False, name=None))
+
+
+def update(words_path=WORDS_FILE, out_path=DASHBOARD_DATA, model_dir=MODEL_DIR, chunk_size=CHUNK_SIZE):
+    """Assign the articles of `words_path` missing from `out_path` and append them; returns the drift report.
+
+    Keys excluded as noise are skipped; new noise articles are not appended but excluded in meta.json.
+    """
+    model = ThemeModel.load(model_dir)
+    known = known_keys(out_path) | set(model.excluded)
+    batches = []
+    for chunk in iter_chunks(words_path, chunk_size):
+        new = ~pd.Series(list(chunk[KEY_COLUMNS].itertuples(index=False, name=None)), index=chunk.index).isin(known)
+        chunk = chunk[new.to_numpy()]
+        if chunk.empty:
+            continue
+        assigned = model.assign(chunk['text_for_tfidf'])
+        assigned.index = chunk.index
+        batches.append(pd.concat([chunk, assigned], axis=1))
+
+    if not batches:
+        return model.drift(pd.DataFrame(columns=['Cluster_ID', 'distance', 'oov']))
+    rows = pd.concat(batches, ignore_index=True)
+    noise = (rows['Theme'] == NOISE_THEME).to_numpy()
+    header = not os.path.exists(out_path)
+    rows.loc[~noise, OUTPUT_COLUMNS].to_csv(out_path, mode='a', header=header, index=False)
+    if noise.any():
+        model.excluded += list(rows.loc[noise, KEY_COLUMNS].itertuples(index=False, name=None))
+        model.save_meta(model_dir)
+    report = model.drift(rows)
+    report['noise'] = int(noise.sum())
+    report['themes'] = rows['Theme'].value_counts().to_dict()
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Append the new articles to dashboard_data_final.csv "
+                                                 "with the saved theme model (no refit).")
+    parser.add_argument('words', nargs='?', default=WORDS_FILE)
+    parser.add_argument('--model', default=MODEL_DIR)
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    report = update(args.words, model_dir=args.model, chunk_size=args.chunk_size)
+    print(f"{report['articles'] - report.get('noise', 0)} new articles appended to {DASHBOARD_DATA}, "
+          f"{report.get('noise', 0)} left out as {NOISE_THEME} ({time.perf_counter() - started:.2f}s)")
+    for theme, count in report.get('themes', {}).items():
+        print(f"  {count:6d}  {theme}")
+    if 'distance_ratio' in report:
+        print(f"Drift: distance x{report['distance_ratio']:.2f} (max {MAX_DISTANCE_RATIO}), "
+              f"far {report['far_share']:.1%} (max {MAX_FAR_SHARE:.0%}), "
+              f"out-of-vocabulary {report['oov_increase']:+.1%} (max +{MAX_OOV_INCREASE:.0%}), "
+              f"theme shift {report['theme_shift']:.1%}")
+        print("Full refit advised: python data_mining.py --refit" if report['refit'] else "No refit needed.")
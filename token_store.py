@@ -0,0 +1,265 @@
+"""Vocabulary-encoded copy of words_per_article.csv and words_per_paragraph.csv.
+
+The CSV files store every lemma list as a Python-repr string, parsed again by
+every reader. The store encodes both once against one shared vocabulary:
+
+    token_store/vocab.json                    term of each id (most frequent first)
+    token_store/meta.json                     source stamps, counts, id dtype
+    token_store/article_keys.npy              (n, 4) int32 year, month, day, num_article
+    token_store/article_tokens.npy            ids of all articles, end to end
+    token_store/article_indptr.npy            article i = article_tokens[indptr[i]:indptr[i + 1]]
+    token_store/paragraph_keys.npy            (n, 4) keys of words_per_paragraph.csv
+    token_store/paragraph_tokens.npy          ids of all paragraphs, end to end
+    token_store/paragraph_indptr.npy          paragraph j = paragraph_tokens[indptr[j]:indptr[j + 1]]
+    token_store/paragraph_article_indptr.npy  article i has paragraphs indptr[i] to indptr[i + 1] - 1
+
+Ids are uint16 while the vocabulary fits, uint32 otherwise. Every array is a
+plain .npy file, memory-mapped read-only by TokenStore (np.savez archives
+cannot be mapped), so readers share the pages and counting is NumPy on the
+id arrays:
+
+    python token_store.py          (re)build token_store/ from the two CSV files
+    store = TokenStore()
+    store.article(0)                     # ids (a read-only view)
+    store.article(0, strings=True)       # ['attaque', 'drone', ...]
+    store.paragraphs(0, strings=True)    # [['attaque', ...], ['ministère', ...]]
+    store.count_matrix('paragraph')      # CSR paragraph x term counts
+
+A store built from other CSV contents is stale: is_fresh() compares the
+source stamps (size, mtime) like snapshot.py does.
+"""
+import json
+import os
+import shutil
+import sys
+import time
+from array import array
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from annotations import decode_field
+
+TOKEN_STORE = os.environ.get('TOKEN_STORE', 'token_store')
+ARTICLE_WORDS = 'words_per_article.csv'
+PARAGRAPH_WORDS = 'words_per_paragraph.csv'
+CHUNK_SIZE = 10000
+ARRAYS = ['article_keys', 'article_tokens', 'article_indptr', 'paragraph_keys', 'paragraph_tokens',
+          'paragraph_indptr', 'paragraph_article_indptr']
+
+
+def _stamp(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class _Encoder:
+    """Growing term -> id table (first-appearance ids until finish())."""
+
+    def __init__(self):
+        self.ids = {}
+        self.terms = []
+
+    def encode(self, words):
+        ids = self.ids
+        for word in words:
+            if word not in ids:
+                ids[word] = len(self.terms)
+                self.terms.append(word)
+        return [ids[word] for word in words]
+
+    def finish(self, token_arrays):
+        """(terms by decreasing frequency, then alphabetical; old id -> new id)."""
+        counts = np.zeros(len(self.terms), dtype=np.int64)
+        for tokens in token_arrays:
+            counts += np.bincount(tokens, minlength=len(self.terms))
+        order = np.lexsort((np.asarray(self.terms, dtype=object).astype(str), -counts))
+        remap = np.empty(len(order), dtype=np.int64)
+        remap[order] = np.arange(len(order))
+        return [self.terms[i] for i in order], remap
+
+
+def _read_keys(chunk):
+    # words_per_paragraph.csv names the last key column 'article number'
+    return chunk.iloc[:, :4].to_numpy(dtype=np.int32)
+
+
+def _encode_articles(path, encoder, chunk_size):
+    keys, tokens, lengths = [], array('q'), []
+    for chunk in pd.read_csv(path, chunksize=chunk_size):
+        keys.append(_read_keys(chunk))
+        for words in chunk['words']:
+            ids = encoder.encode(decode_field(words))
+            tokens.extend(ids)
+            lengths.append(len(ids))
+    return keys, np.frombuffer(tokens, dtype=np.int64), lengths
+
+
+def _encode_paragraphs(path, encoder, chunk_size):
+    keys, tokens, lengths, counts = [], array('q'), [], []
+    for chunk in pd.read_csv(path, chunksize=chunk_size):
+        keys.append(_read_keys(chunk))
+        for words in chunk['words']:
+            paragraphs = decode_field(words)
+            for paragraph in paragraphs:
+                ids = encoder.encode(paragraph)
+                tokens.extend(ids)
+                lengths.append(len(ids))
+            counts.append(len(paragraphs))
+    return keys, np.frombuffer(tokens, dtype=np.int64), lengths, counts
+
+
+def _indptr(lengths):
+    indptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+    return indptr
+
+
+def _stack_keys(keys):
+    return np.concatenate(keys) if keys else np.zeros((0, 4), dtype=np.int32)
+
+
+def build(article_csv=ARTICLE_WORDS, paragraph_csv=PARAGRAPH_WORDS, store_dir=TOKEN_STORE, chunk_size=CHUNK_SIZE):
+    """Encode both CSV files into `store_dir` (replaces any previous store); returns meta.json content."""
+    encoder = _Encoder()
+    article_keys, article_tokens, article_lengths = _encode_articles(article_csv, encoder, chunk_size)
+    paragraph_keys, paragraph_tokens, paragraph_lengths, paragraph_counts = \
+        _encode_paragraphs(paragraph_csv, encoder, chunk_size)
+
+    terms, remap = encoder.finish([article_tokens, paragraph_tokens])
+    dtype = np.uint16 if len(terms) <= np.iinfo(np.uint16).max + 1 else np.uint32
+    arrays = {
+        'article_keys': _stack_keys(article_keys),
+        'article_tokens': remap[article_tokens].astype(dtype),
+        'article_indptr': _indptr(article_lengths),
+        'paragraph_keys': _stack_keys(paragraph_keys),
+        'paragraph_tokens': remap[paragraph_tokens].astype(dtype),
+        'paragraph_indptr': _indptr(paragraph_lengths),
+        'paragraph_article_indptr': _indptr(paragraph_counts),
+    }
+    meta = {
+        'sources': {'article': [article_csv, _stamp(article_csv)],
+                    'paragraph': [paragraph_csv, _stamp(paragraph_csv)]},
+        'terms': len(terms),
+        'dtype': np.dtype(dtype).name,
+        'articles': len(arrays['article_keys']),
+        'article_tokens': len(arrays['article_tokens']),
+        'paragraph_articles': len(arrays['paragraph_keys']),
+        'paragraphs': len(paragraph_lengths),
+        'paragraph_tokens': len(arrays['paragraph_tokens']),
+    }
+
+    tmp_dir = store_dir.rstrip('/') + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for name, values in arrays.items():
+        np.save(os.path.join(tmp_dir, f'{name}.npy'), values)
+    with open(os.path.join(tmp_dir, 'vocab.json'), 'w', encoding='utf-8') as f:
+        json.dump(terms, f, ensure_ascii=False)
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=1)
+    shutil.rmtree(store_dir, ignore_errors=True)
+    os.rename(tmp_dir, store_dir)
+    return meta
+
+
+def is_fresh(store_dir=TOKEN_STORE):
+    """True if `store_dir` exists and was built from the current content of its two source files."""
+    try:
+        with open(os.path.join(store_dir, 'meta.json'), encoding='utf-8') as f:
+            sources = json.load(f)['sources']
+        return all(os.path.exists(path) and _stamp(path) == stamp for path, stamp in sources.values())
+    except (FileNotFoundError, ValueError, KeyError):
+        return False
+
+
+class TokenStore:
+    """Read side of the store: memory-mapped id arrays, terms decoded on demand."""
+
+    def __init__(self, store_dir=TOKEN_STORE):
+        for name in ARRAYS:
+            # Still file-backed, but slicing a plain ndarray view is much cheaper than slicing a memmap
+            setattr(self, name, np.load(os.path.join(store_dir, f'{name}.npy'), mmap_mode='r').view(np.ndarray))
+        with open(os.path.join(store_dir, 'vocab.json'), encoding='utf-8') as f:
+            self.terms = np.asarray(json.load(f), dtype=object)
+        with open(os.path.join(store_dir, 'meta.json'), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self._ids = None
+
+    def __len__(self):
+        return len(self.article_keys)
+
+    @property
+    def n_terms(self):
+        return len(self.terms)
+
+    # -- terms <-> ids --
+
+    def id_of(self, term):
+        """Id of `term`, or None if it is not in the vocabulary."""
+        if self._ids is None:
+            self._ids = {term: i for i, term in enumerate(self.terms.tolist())}
+        return self._ids.get(term)
+
+    def decode(self, ids):
+        """List of the terms of `ids`."""
+        return self.terms[np.asarray(ids, dtype=np.intp)].tolist()
+
+    # -- documents --
+
+    def article(self, i, strings=False):
+        """Tokens of article `i` of words_per_article.csv (ids, or terms with strings=True)."""
+        ids = self.article_tokens[self.article_indptr[i]:self.article_indptr[i + 1]]
+        return self.decode(ids) if strings else ids
+
+    def paragraphs(self, i, strings=False):
+        """Paragraphs of article `i` of words_per_paragraph.csv, each as ids (or terms with strings=True)."""
+        start, stop = self.paragraph_article_indptr[i], self.paragraph_article_indptr[i + 1]
+        bounds = self.paragraph_indptr[start:stop + 1]
+        ids = [self.paragraph_tokens[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+        return [self.decode(paragraph) for paragraph in ids] if strings else ids
+
+    def keys(self, level='article'):
+        """DataFrame year, month, day, num_article of the articles of `level` ('article' or 'paragraph')."""
+        return pd.DataFrame(getattr(self, f'{level}_keys'), columns=['year', 'month', 'day', 'num_article'])
+
+    def units(self, level='article'):
+        """(token ids, indptr) of the counting units of `level`: articles or single paragraphs."""
+        if level == 'article':
+            return self.article_tokens, self.article_indptr
+        if level == 'paragraph':
+            return self.paragraph_tokens, self.paragraph_indptr
+        raise ValueError(f"level must be 'article' or 'paragraph', not {level!r}")
+
+    # -- counting --
+
+    def term_counts(self, level='article'):
+        """Occurrences of every term over all units of `level`."""
+        tokens, _ = self.units(level)
+        return np.bincount(tokens, minlength=self.n_terms)
+
+    def count_matrix(self, level='article', binary=False):
+        """CSR (units x terms) occurrence counts (1 per unit containing the term with binary=True)."""
+        tokens, indptr = self.units(level)
+        matrix = sp.csr_matrix((np.ones(len(tokens), dtype=np.int32), tokens, indptr),
+                               shape=(len(indptr) - 1, self.n_terms))
+        matrix.sum_duplicates()
+        if binary:
+            matrix.data[:] = 1
+        return matrix
+
+    def document_frequencies(self, level='article'):
+        """Number of units of `level` containing each term."""
+        return np.bincount(self.count_matrix(level).indices, minlength=self.n_terms)
+
+
+if __name__ == '__main__':
+    target = sys.argv[1] if len(sys.argv) > 1 else TOKEN_STORE
+    started = time.perf_counter()
+    meta = build(store_dir=target)
+    size = sum(os.path.getsize(os.path.join(target, name)) for name in os.listdir(target))
+    sources = sum(os.path.getsize(path) for path, _ in meta['sources'].values())
+    print(f"{meta['articles']} articles ({meta['article_tokens']} tokens), {meta['paragraphs']} paragraphs "
+          f"({meta['paragraph_tokens']} tokens), {meta['terms']} terms as {meta['dtype']} -> {target}")
+    print(f"  {sources / 2**20:.1f} MB of CSV -> {size / 2**20:.1f} MB ({time.perf_counter() - started:.2f}s)")